@@ -1,7 +1,113 @@
+import threading
 from abc import ABC, abstractmethod
-from typing import Optional
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional
+
+
+class LLMUnavailableError(RuntimeError):
+    """
+    LLM сейчас не принимает запросы; retry_after — через сколько секунд имеет смысл повторить.
+    """
+
+    def __init__(self, message: str = "LLM unavailable", retry_after: float = 0.0) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class LLMTurn:
+    text: str
+    # Состояние модели после ответа: передаётся в следующий ход вместо всей истории
+    context: Optional[List[int]] = None
+    # Фактические счётчики модели, если провайдер их отдаёт
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+
+class StreamCancel:
+    """
+    Отмена потоковой генерации из другого потока (клиент отключился, пока поток ждёт токен).
+    Провайдер регистрирует on_cancel (например, рвёт соединение с моделью) и завершает генератор сам:
+    закрывать генератор, который в этот момент выполняется в другом потоке, нельзя.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
 
 
 class ILLMService(ABC):
+    # Модель, к которой привязан context из LLMTurn; None — провайдер не умеет продолжать диалог
+    model_name: Optional[str] = None
+
     @abstractmethod
     def chat(self, prompt: str, user_context: Optional[dict] = None) -> str: ...
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Сколько токенов займёт текст в промпте. По умолчанию — грубая оценка с запасом.
+        """
+        return len(text) // 2 + 1 if text else 0
+
+    def chat_json(self, prompt: str, schema: dict, user_context: Optional[dict] = None) -> str:
+        """
+        Ответ в виде JSON по схеме schema (JSON Schema). Провайдер без ограниченной генерации
+        просто полагается на инструкцию в промпте.
+        """
+        return self.chat(prompt, user_context=user_context)
+
+    def chat_turn(
+        self,
+        prompt: str,
+        context: Optional[List[int]] = None,
+        user_context: Optional[dict] = None,
+    ) -> LLMTurn:
+        """
+        Ход диалога: с context prompt — только новая реплика, без context — весь диалог.
+        """
+        return LLMTurn(text=self.chat(prompt, user_context=user_context))
+
+    def stream_chat(
+        self,
+        prompt: str,
+        user_context: Optional[dict] = None,
+        cancel: Optional[StreamCancel] = None,
+    ) -> Iterator[str]:
+        """
+        Ответ по кускам по мере генерации. Закрытие генератора или cancel.cancel() отменяет генерацию.
+        По умолчанию — весь ответ одним куском.
+        """
+        yield self.chat(prompt, user_context=user_context)
+
+    def retry_after(self) -> Optional[float]:
+        """
+        None — запрос к LLM сейчас имеет смысл; иначе через сколько секунд пробовать снова
+        (например, разомкнут предохранитель). Позволяет сразу отдать заглушку, не дожидаясь таймаута.
+        """
+        return None
+
+    def ensure_available(self) -> None:
+        wait = self.retry_after()
+        if wait is not None:
+            raise LLMUnavailableError(retry_after=wait)
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import Optional
 
+from app.domain.entities.principal import Principal
 from app.domain.entities.user import User
 
 
@@ -20,3 +21,16 @@ class IUserRepository(ABC):
     def get_roles(self, user_id: int) -> set[str]: ...
     def get_permissions(self, user_id: int) -> set[str]: ...
     def set_roles(self, user_id: int, role_names: list[str]) -> set[str]: ...
+
+    def get_principal(self, user_id: int) -> Optional[Principal]:
+        """
+        Пользователь + роли + права; реализации на БД собирают всё одним запросом.
+        """
+        user = self.get_by_id(user_id)
+        if user is None:
+            return None
+        return Principal(
+            user=user,
+            roles=frozenset(self.get_roles(user_id)),
+            permissions=frozenset(self.get_permissions(user_id)),
+        )
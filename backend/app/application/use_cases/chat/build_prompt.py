@@ -1,22 +1,34 @@
+from typing import Optional
+
 from app.domain.entities.chat_message import ChatMessage
 
 MAX_PROMPT_CHARS = 8000
 
 
-def build_chat_context(messages: list[ChatMessage]) -> str:
+def format_message(msg: ChatMessage) -> str:
+    prefix = "User: " if msg.role == "user" else "FinPulse: "
+    return prefix + msg.content + "\n"
+
+
+def build_chat_context(
+    messages: list[ChatMessage],
+    summary: Optional[str] = None,
+    max_chars: Optional[int] = MAX_PROMPT_CHARS,
+) -> str:
     """
     Собирает контекст для модели из последних сообщений,
-    обрезая по длине (по символам).
+    обрезая по длине (по символам; max_chars=None — сообщения уже отобраны по бюджету токенов).
+    summary — краткое содержание более ранней части разговора, идёт перед сообщениями.
     """
+    summary_text = f"Краткое содержание предыдущего разговора:\n{summary}\n\n" if summary else ""
     parts: list[str] = []
-    total_len = 0
+    total_len = len(summary_text)
 
     for msg in reversed(messages):
-        prefix = "User: " if msg.role == "user" else "FinPulse: "
-        chunk = prefix + msg.content + "\n"
+        chunk = format_message(msg)
         chunk_len = len(chunk)
 
-        if total_len + chunk_len > MAX_PROMPT_CHARS:
+        if max_chars is not None and total_len + chunk_len > max_chars:
             break
 
         parts.append(chunk)
@@ -30,4 +42,4 @@ def build_chat_context(messages: list[ChatMessage]) -> str:
         "лучше понимать рынки, новости и собственные финансы.\n\n"
     )
 
-    return system_prompt + history_text
+    return system_prompt + summary_text + history_text
@@ -0,0 +1,58 @@
+import logging
+from typing import Optional
+
+from app.application.interfaces.llm import LLMUnavailableError
+from app.application.use_cases.chat.chat_with_llm import ChatWithLLM
+from app.infrastructure.database.chat_job_repo_impl import ChatJob, ChatJobRepoSQL
+from app.infrastructure.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ChatJobs:
+    """
+    Чат без удержания HTTP-потока: submit сохраняет вопрос и ставит задачу в chat_jobs,
+    run_next (воркер) генерирует ответ, клиент забирает результат по id задачи.
+    """
+
+    def __init__(self, chat: ChatWithLLM, job_repo: ChatJobRepoSQL):
+        self.chat = chat
+        self.job_repo = job_repo
+
+    def submit(self, user_id: int, user_message: str, chat_id: Optional[int] = None) -> ChatJob:
+        question = self.chat.submit(user_id, user_message, chat_id)
+        job = self.job_repo.create(user_id=user_id, chat_id=question.chat_id, message_id=question.id)
+        metrics.incr("chat.jobs.submitted")
+        return job
+
+    def get(self, user_id: int, job_id: int) -> Optional[ChatJob]:
+        return self.job_repo.get(user_id, job_id)
+
+    def run_next(self) -> bool:
+        """
+        Обрабатывает одну задачу из очереди. False — брать нечего (или LLM недоступен).
+        """
+        if self.chat.llm.retry_after() is not None:
+            return False
+        jobs = self.job_repo.claim(limit=1)
+        if not jobs:
+            return False
+        self.run(jobs[0])
+        return True
+
+    def run(self, job: ChatJob) -> None:
+        try:
+            with metrics.timer("chat.jobs.run"):
+                answer = self.chat.answer(job.user_id, job.question)
+        except LLMUnavailableError:
+            # предохранитель разомкнулся уже после claim: задача дождётся LLM в очереди
+            metrics.incr("chat.jobs.released")
+            self.job_repo.release(job.id)
+            return
+        except Exception as e:
+            metrics.incr("chat.jobs.failed")
+            logger.warning("[ChatJobs] Задача %s: не удалось получить ответ: %s", job.id, e)
+            self.job_repo.finish(job.id, error="LLM_FAILED")
+            return
+        metrics.incr("chat.jobs.done")
+        self.job_repo.finish(job.id, answer=answer)
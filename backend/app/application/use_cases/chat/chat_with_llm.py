@@ -1,49 +1,186 @@
 import datetime
-from typing import Optional
+import time
+from typing import Iterator, List, Optional
 
-from app.application.interfaces.llm import ILLMService
-from app.application.use_cases.chat.build_prompt import build_chat_context
+from app.application.interfaces.llm import ILLMService, StreamCancel
+from app.application.use_cases.chat.build_prompt import build_chat_context, format_message
+from app.application.use_cases.chat.compact_chat import CompactChatHistory
+from app.core.constants import LLM_PRIORITY_CHAT
+from app.core.settings import settings
 from app.domain.entities.chat_message import ChatMessage
 from app.infrastructure.database.chat_repo_impl import ChatRepositorySQL
+from app.infrastructure.metrics import metrics
 
 
 class ChatWithLLM:
-    def __init__(self, llm: ILLMService, chat_repo: ChatRepositorySQL):
+    def __init__(
+        self,
+        llm: ILLMService,
+        chat_repo: ChatRepositorySQL,
+        compactor: Optional[CompactChatHistory] = None,
+    ):
         self.llm = llm
         self.chat_repo = chat_repo
+        # None — без свёртки: промпт из последних сообщений, как раньше
+        self.compactor = compactor
+
+    def ensure_llm_available(self) -> None:
+        """
+        LLMUnavailableError сразу, если LLM заведомо не ответит: сообщение пользователя не сохраняем.
+        """
+        self.llm.ensure_available()
 
     def execute(self, user_id: int, user_message: str, chat_id: Optional[int] = None) -> str:
-        self.chat_repo.add_message(
-            ChatMessage(
-                id=None,
-                user_id=user_id,
-                chat_id=chat_id,
-                role="user",
-                content=user_message,
-                timestamp=datetime.datetime.utcnow(),
-            ),
-            chat_id=chat_id,
+        """
+        Если у чата сохранён контекст модели после последнего ответа, отправляем только новую реплику;
+        иначе (другая модель, сообщения вне этого пути, контекст разросся) — весь диалог заново.
+        """
+        return self.answer(user_id, self.submit(user_id, user_message, chat_id))
+
+    def submit(self, user_id: int, user_message: str, chat_id: Optional[int] = None) -> ChatMessage:
+        """
+        Первая половина execute: проверка LLM и сохранение вопроса; ответ — answer(), можно в другом процессе.
+        """
+        self.ensure_llm_available()
+        return self._save_user_message(user_id, user_message, chat_id)
+
+    def answer(self, user_id: int, question: ChatMessage) -> str:
+        chat_id = question.chat_id
+        prompt = format_message(question)
+        context = self._reusable_context(user_id, chat_id, prompt) if self.llm.model_name else None
+        if context is not None:
+            metrics.incr("chat.context.reused")
+        else:
+            prompt = self._build_prompt(user_id, chat_id)
+
+        turn = self.llm.chat_turn(
+            prompt=prompt,
+            context=context,
+            user_context={"user_id": user_id, "chat_id": chat_id, "priority": LLM_PRIORITY_CHAT},
         )
 
-        history = self.chat_repo.get_last_messages(user_id=user_id, limit=50, chat_id=chat_id)
+        answer = self._save_answer(user_id, turn.text, chat_id, token_count=turn.completion_tokens)
+        if self.llm.model_name and chat_id is not None:
+            self.chat_repo.save_llm_context(chat_id, turn.context, self.llm.model_name, answer.id)
+        self._schedule_compaction(user_id, chat_id)
+        return turn.text
 
-        prompt = build_chat_context(history)
+    def stream(
+        self,
+        user_id: int,
+        user_message: str,
+        chat_id: Optional[int] = None,
+        cancel: Optional[StreamCancel] = None,
+    ) -> Iterator[str]:
+        """
+        То же, что execute, но ответ отдаётся кусками по мере генерации.
+        Ответ FinPulse сохраняется, только когда поток дошёл до конца;
+        закрытие генератора или cancel (клиент отключился) отменяет генерацию без сохранения.
+        """
+        self.ensure_llm_available()
+        self._save_user_message(user_id, user_message, chat_id)
+        prompt = self._build_prompt(user_id, chat_id)
 
-        response_text = self.llm.chat(
+        started = time.perf_counter()
+        parts: list[str] = []
+        chunks = self.llm.stream_chat(
             prompt=prompt,
-            user_context={"user_id": user_id, "chat_id": chat_id},
+            user_context={"user_id": user_id, "chat_id": chat_id, "priority": LLM_PRIORITY_CHAT},
+            cancel=cancel,
         )
+        try:
+            for chunk in chunks:
+                if not parts:
+                    metrics.observe_ms("chat.stream.ttft", (time.perf_counter() - started) * 1000)
+                parts.append(chunk)
+                yield chunk
+        finally:
+            # явно закрываем поток LLM, чтобы соединение с Ollama рвалось сразу, а не при сборке мусора
+            chunks.close()
+
+        if cancel is not None and cancel.cancelled:
+            return
+        metrics.observe_ms("chat.stream.total", (time.perf_counter() - started) * 1000)
+        self._save_answer(user_id, "".join(parts), chat_id)
+        self._schedule_compaction(user_id, chat_id)
+
+    def _reusable_context(self, user_id: int, chat_id: Optional[int], prompt: str) -> Optional[List[int]]:
+        if chat_id is None or settings.OLLAMA_CONTEXT_REUSE_MAX_TOKENS <= 0:
+            return None
+        state = self.chat_repo.get_llm_context(chat_id)
+        if state is None:
+            return None
+
+        # контекст + новая реплика должны оставить в окне модели место на ответ, иначе Ollama обрежет начало
+        window = settings.OLLAMA_NUM_CTX - settings.CHAT_RESPONSE_RESERVE_TOKENS - self.llm.count_tokens(prompt)
+        if state.model != self.llm.model_name:
+            reason = "model_changed"
+        elif len(state.context) > min(settings.OLLAMA_CONTEXT_REUSE_MAX_TOKENS, window):
+            reason = "too_long"
+        else:
+            # контекст заканчивается ответом upto_message_id: между ним и новым вопросом ничего не было
+            last = self.chat_repo.get_last_messages(user_id=user_id, limit=2, chat_id=chat_id)
+            if len(last) == 2 and last[0].id == state.upto_message_id:
+                return state.context
+            reason = "history_changed"
 
-        self.chat_repo.add_message(
-            ChatMessage(
-                id=None,
-                user_id=user_id,
-                chat_id=chat_id,
-                role="FinPulse",
-                content=response_text,
-                timestamp=datetime.datetime.utcnow(),
-            ),
+        metrics.incr(f"chat.context.rebuilt.{reason}")
+        return None
+
+    def _save_user_message(self, user_id: int, user_message: str, chat_id: Optional[int]) -> ChatMessage:
+        return self._add_message(user_id, "user", user_message, chat_id)
+
+    def _build_prompt(self, user_id: int, chat_id: Optional[int]) -> str:
+        """
+        Сообщения берутся с конца, пока укладываются в окно модели за вычетом системного промпта,
+        summary и запаса на ответ; сколько их войдёт, считает БД по сохранённым token_count.
+        """
+        summary = self.chat_repo.get_summary(chat_id) if self.compactor and chat_id is not None else None
+        summary_text = summary.text if summary else None
+
+        budget = (
+            settings.OLLAMA_NUM_CTX
+            - settings.CHAT_RESPONSE_RESERVE_TOKENS
+            - self.llm.count_tokens(build_chat_context([], summary=summary_text))
+        )
+        history = self.chat_repo.get_recent_within_budget(
+            user_id=user_id,
             chat_id=chat_id,
+            budget_tokens=max(0, budget),
+            after_id=summary.upto_message_id if summary else None,
+            max_rows=50,
         )
+        return build_chat_context(history, summary=summary_text, max_chars=None)
 
-        return response_text
+    def _schedule_compaction(self, user_id: int, chat_id: Optional[int]) -> None:
+        if self.compactor is not None:
+            self.compactor.schedule(user_id, chat_id)
+
+    def _save_answer(
+        self,
+        user_id: int,
+        response_text: str,
+        chat_id: Optional[int],
+        token_count: Optional[int] = None,
+    ) -> ChatMessage:
+        return self._add_message(user_id, "FinPulse", response_text, chat_id, token_count=token_count)
+
+    def _add_message(
+        self,
+        user_id: int,
+        role: str,
+        content: str,
+        chat_id: Optional[int],
+        token_count: Optional[int] = None,
+    ) -> ChatMessage:
+        message = ChatMessage(
+            id=None,
+            user_id=user_id,
+            chat_id=chat_id,
+            role=role,
+            content=content,
+            timestamp=datetime.datetime.utcnow(),
+        )
+        # считаем один раз при записи: сборка промпта дальше не токенизирует историю
+        message.token_count = token_count or self.llm.count_tokens(format_message(message))
+        return self.chat_repo.add_message(message, chat_id=chat_id)
@@ -0,0 +1,95 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app.application.interfaces.llm import ILLMService
+from app.application.use_cases.chat.build_prompt import format_message
+from app.core.constants import LLM_PRIORITY_BACKGROUND
+from app.core.settings import settings
+from app.infrastructure.database.chat_repo_impl import ChatRepositorySQL
+from app.infrastructure.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Сколько сообщений за раз поднимаем для свёртки; остальное свернётся следующим проходом
+_COMPACT_BATCH = 100
+
+# Один поток: свёртка идёт с фоновым приоритетом LLM и не должна занимать несколько слотов
+_COMPACT_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-compact")
+_PENDING: set[int] = set()
+_PENDING_LOCK = threading.Lock()
+
+
+class CompactChatHistory:
+    """
+    Сворачивает старую часть переписки в краткое содержание чата (chat_sessions.summary):
+    промпт чата — summary + последние сообщения, его размер не растёт с длиной разговора.
+    """
+
+    def __init__(self, llm: ILLMService, chat_repo: ChatRepositorySQL):
+        self.llm = llm
+        self.chat_repo = chat_repo
+
+    def schedule(self, user_id: int, chat_id: Optional[int]) -> None:
+        """
+        Проверка и свёртка в фоне; для одного чата одновременно не больше одной задачи.
+        """
+        if chat_id is None or not settings.CHAT_COMPACT_ENABLED:
+            return
+        with _PENDING_LOCK:
+            if chat_id in _PENDING:
+                return
+            _PENDING.add(chat_id)
+
+        def _run() -> None:
+            try:
+                self.execute(user_id, chat_id)
+            except Exception as e:
+                logger.warning("[ChatCompact] Не удалось свернуть чат %s: %s", chat_id, e)
+            finally:
+                with _PENDING_LOCK:
+                    _PENDING.discard(chat_id)
+
+        _COMPACT_EXECUTOR.submit(_run)
+
+    def execute(self, user_id: int, chat_id: int) -> bool:
+        """
+        True — summary обновлено.
+        """
+        current = self.chat_repo.get_summary(chat_id)
+        upto = current.upto_message_id if current else None
+        messages = self.chat_repo.get_messages_after(user_id, chat_id, after_id=upto, limit=_COMPACT_BATCH)
+
+        fold = messages[: -settings.CHAT_RECENT_MESSAGES]
+        pending_chars = sum(len(m.content) for m in messages)
+        if not fold or pending_chars <= settings.CHAT_COMPACT_THRESHOLD_CHARS:
+            return False
+
+        if self.llm.retry_after() is not None:
+            return False
+
+        with metrics.timer("chat.compact"):
+            summary = self.llm.chat(
+                self._make_prompt(current.text if current else None, "".join(format_message(m) for m in fold)),
+                user_context={"user_id": user_id, "chat_id": chat_id, "priority": LLM_PRIORITY_BACKGROUND},
+            )
+        summary = " ".join(summary.split())[: settings.CHAT_SUMMARY_MAX_CHARS]
+        if not summary:
+            metrics.incr("chat.compact.empty")
+            return False
+
+        saved = self.chat_repo.save_summary(chat_id, summary, upto_message_id=fold[-1].id, expected_upto=upto)
+        metrics.incr("chat.compact.saved" if saved else "chat.compact.conflict")
+        return saved
+
+    @staticmethod
+    def _make_prompt(previous: Optional[str], transcript: str) -> str:
+        return (
+            "Ты ведёшь краткое содержание разговора пользователя с финансовым ассистентом FinPulse.\n"
+            f"Обнови его с учётом новых сообщений. Не длиннее {settings.CHAT_SUMMARY_MAX_CHARS} символов.\n"
+            "Сохрани: цели и профиль пользователя, упомянутые тикеры и цифры, договорённости и открытые вопросы.\n"
+            "Верни только текст содержания, без вступлений.\n\n"
+            f"Текущее содержание:\n{previous or '(пока нет)'}\n\n"
+            f"Новые сообщения:\n{transcript}"
+        )
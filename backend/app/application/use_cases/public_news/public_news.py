@@ -1,9 +1,33 @@
+import logging
+from datetime import datetime
 from typing import List, Optional
+from app.core.constants import NEWS_SOURCES
+from app.core.settings import settings
 from app.presentation.schemas.summary import NewsBlockOut
+from app.infrastructure.database.crawl_frontier_repo_impl import (
+    STATUS_DONE,
+    STATUS_FAILED,
+    STATUS_PENDING,
+    CrawlFrontierRepoSQL,
+    FrontierItem,
+)
 from app.infrastructure.database.news_repo_impl import NewsRepositorySQL
+from app.infrastructure.llm.scraper_service import ScraperService
+from app.infrastructure.metrics import metrics
 from app.application.use_cases.summarize_article import GetNewsFeed
 from app.domain.entities.user import User
 
+logger = logging.getLogger(__name__)
+
+
+def _public_user() -> User:
+    return User(
+        id=0,
+        name="Public",
+        email="public@finpulse.local",
+        password_hash="",
+    )
+
 
 class GetPublicNewsFeed:
     def __init__(self, repo: NewsRepositorySQL, generator: GetNewsFeed):
@@ -11,18 +35,122 @@ class GetPublicNewsFeed:
         self.generator = generator
 
     def execute(self, limit: int = 50, force: bool = False) -> List[NewsBlockOut]:
-        # Обновляем публичную витрину в отдельном "public"-режиме (почасовой кэш).
-        public_user = User(
-            id=0,
-            name="Public",
-            email="public@finpulse.local",
-            password_hash="",
-        )
-        self.generator.execute(public_user, force=force, audience="public")
+        # Витрину заполняет фоновый PrecomputePublicNews, GET только читает таблицу news.
+        # force=True оставлен как ручной способ пересобрать текущий слот синхронно.
+        if force:
+            self.generator.execute(_public_user(), force=True, audience="public")
         items = self.repo.list_public(limit=limit)
         return [self.repo.to_news_block_out(i) for i in items]
 
 
+class CrawlNewArticles:
+    """
+    Краулер статей: на индексных страницах NEWS_SOURCES ищет ссылки на статьи,
+    новые кладёт во фронтир и суммаризирует каждую отдельной строкой News.
+    Работа за прогон пропорциональна числу новых статей (не более max_articles),
+    неизменившийся индекс (304 / тот же body) не разбирается вовсе.
+    """
+
+    def __init__(
+        self,
+        scraper: ScraperService,
+        generator: GetNewsFeed,
+        frontier: CrawlFrontierRepoSQL,
+        max_articles: int = 10,
+        max_links_per_index: int = 40,
+        max_attempts: int = 3,
+    ):
+        self.scraper = scraper
+        self.generator = generator
+        self.frontier = frontier
+        self.max_articles = max_articles
+        self.max_links_per_index = max_links_per_index
+        self.max_attempts = max_attempts
+
+    def discover(self) -> int:
+        discovered = 0
+        for market, categories in NEWS_SOURCES.items():
+            for category, index_urls in categories.items():
+                for index_url in index_urls:
+                    links, unchanged = self.scraper.fetch_article_links(index_url, limit=self.max_links_per_index)
+                    if unchanged:
+                        metrics.incr("crawler.index_unchanged")
+                        continue
+                    if not links:
+                        continue
+
+                    titles = {link.url: link.title for link in links}
+                    new_urls = self.frontier.filter_unseen(list(titles))
+                    discovered += self.frontier.enqueue(
+                        [
+                            FrontierItem(
+                                url=url,
+                                source_url=index_url,
+                                market=market,
+                                category=category,
+                                title=titles[url],
+                            )
+                            for url in new_urls
+                        ]
+                    )
+        metrics.incr("crawler.discovered", discovered)
+        return discovered
+
+    def execute(self, slot_time: Optional[datetime] = None) -> int:
+        """
+        Возвращает число опубликованных статей за прогон.
+        """
+        self.discover()
+
+        # LLM недоступен — статьи не забираем, иначе на заглушках сгорят их попытки
+        if self.generator.llm_retry_after() is not None:
+            metrics.incr("crawler.skipped_llm_down")
+            return 0
+
+        published = 0
+        for item in self.frontier.claim_pending(self.max_articles):
+            try:
+                payload = self.generator.summarize_article(
+                    market=item.market,
+                    category=item.category,
+                    url=item.url,
+                    title=item.title or item.url,
+                    slot_time=slot_time,
+                )
+                ok = not payload.get("_fallback")
+            except Exception as e:
+                logger.warning("[Crawler] Не удалось обработать %s: %s", item.url, e)
+                ok = False
+
+            if ok:
+                published += 1
+                self.frontier.mark(item.url, STATUS_DONE)
+            else:
+                retry = item.attempts < self.max_attempts
+                self.frontier.mark(item.url, STATUS_PENDING if retry else STATUS_FAILED)
+
+        metrics.incr("crawler.published", published)
+        return published
+
+
+class PrecomputePublicNews:
+    """
+    Собирает публичную витрину за указанный час (slot_time) заранее,
+    чтобы GET /public/news не ждал скрапинга и LLM.
+    """
+
+    def __init__(self, generator: GetNewsFeed, crawler: Optional[CrawlNewArticles] = None):
+        self.generator = generator
+        self.crawler = crawler
+
+    def execute(self, slot_time: datetime, force: bool = False) -> int:
+        blocks = self.generator.execute(_public_user(), force=force, audience="public", slot_time=slot_time)
+        articles = 0
+        if self.crawler is not None and settings.CRAWLER_ENABLED:
+            articles = self.crawler.execute(slot_time=slot_time)
+        return len(blocks) + articles
+
+
 class GetPublicNewsItem:
     def __init__(self, repo: NewsRepositorySQL):
         self.repo = repo
@@ -1,31 +1,63 @@
 from __future__ import annotations
 
+import copy
 import json
 import re
-from datetime import date, datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
 import hashlib
 import logging
-from typing import List, Optional
+import threading
+import time
+from typing import Dict, List, Optional
 from urllib.parse import urlparse
 
-from app.application.interfaces.llm import ILLMService
+from app.application.interfaces.llm import ILLMService, LLMUnavailableError
 from app.core.constants import (
+    ALLOWED_HORIZONS,
+    ALLOWED_RISK,
     CATEGORY_MACRO,
     CATEGORY_STOCKS,
+    LLM_PRIORITY_PERSONAL_FEED,
+    LLM_PRIORITY_PUBLIC_PRECOMPUTE,
     MARKET_RU,
     NEWS_SOURCES,
+    SECTOR_GROUP_LABELS,
+    SECTOR_GROUPS,
+)
+from app.application.use_cases.summary_json import (
+    CONFIDENCE_VALUES,
+    IMPACT_VALUES,
+    REQUIRED_FIELDS,
+    SUMMARY_SCHEMA,
+    make_repair_prompt,
+    parse_summary,
+    summary_schema,
 )
 from app.domain.entities.news_block import NewsBlock, NewsIndicator
 from app.domain.entities.user import User
-from app.infrastructure.database.news_cache_repo_impl import NewsCacheRepoSQL
+from app.infrastructure.concurrency.single_flight import SingleFlight
+from app.infrastructure.database.news_cache_repo_impl import CachedSummaryRow, NewsCacheRepoSQL
+from app.infrastructure.database.news_summary_repo_impl import NewsSummaryRepoSQL
+from app.core.settings import settings
 from app.infrastructure.llm.scraper_service import ScraperService
 from app.infrastructure.database.news_repo_impl import NewsRepositorySQL
+from app.infrastructure.metrics import metrics
 from app.infrastructure.utils import slugify
 
 _WS_RE = re.compile(r"\s+")
 
-_ALLOWED_IMPACT = {"positive", "neutral", "negative"}
-_ALLOWED_CONFIDENCE = {"low", "medium", "high"}
+_ALLOWED_IMPACT = set(IMPACT_VALUES)
+_ALLOWED_CONFIDENCE = set(CONFIDENCE_VALUES)
+
+# Сколько текста статьи уходит в короткий промпт дозапроса недостающих полей
+REPAIR_MAX_CHARS = 4000
+
+# Сколько символов статьи уходит в промпт; скрапер дочитывает страницу ровно до этого объёма.
+ARTICLE_MAX_CHARS = 15000
+
+# Меняем при любой правке _make_base_prompt: старые суммаризации из news_summaries перестанут совпадать.
+PROMPT_VERSION = "base-v3"
 
 import re
 
@@ -33,6 +65,21 @@ _SLUG_RE = re.compile(r"[^a-zа-я0-9\s-]+", re.IGNORECASE)
 _WS_RE2 = re.compile(r"\s+")
 logger = logging.getLogger(__name__)
 
+# Общий пул для параллельной сборки источников: скрапинг идёт одновременно,
+# LLM-вызов каждого источника уходит сразу, как только готов его текст.
+_FEED_EXECUTOR = ThreadPoolExecutor(max_workers=settings.NEWS_FEED_MAX_WORKERS, thread_name_prefix="news-feed")
+_BASE_FLIGHT: SingleFlight[dict] = SingleFlight()
+# Отдельный пул для фоновых обновлений stale-while-revalidate, чтобы не занимать потоки запросов.
+_REFRESH_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="news-refresh")
+_REFRESHING: set[str] = set()
+_REFRESHING_LOCK = threading.Lock()
+metrics.register_collector("news_feed.single_flight", _BASE_FLIGHT.stats)
+
+
+def _elapsed_ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
+
+
 def slugify(text: str) -> str:
     t = (text or "").strip().lower()
     t = _SLUG_RE.sub("", t)
@@ -93,11 +140,14 @@ class GetNewsFeed:
         llm: ILLMService,
         cache_repo: NewsCacheRepoSQL,
         news_repo: NewsRepositorySQL,
+        summary_repo: Optional[NewsSummaryRepoSQL] = None,
     ):
         self.scraper = scraper
         self.llm = llm
         self.cache_repo = cache_repo
         self.news_repo = news_repo
+        self.summary_repo = summary_repo
+        self.last_timings: dict = {}
 
     def _pick_sources(
         self,
@@ -117,7 +167,7 @@ class GetNewsFeed:
             if audience == "public":
                 picked.append((MARKET_RU, CATEGORY_MACRO, macro_urls[0]))
             else:
-                key = self._user_persona_key(user)
+                key = self._persona_bucket(user)
                 idx = self._stable_index(key + "|macro", len(macro_urls))
                 picked.append((MARKET_RU, CATEGORY_MACRO, macro_urls[idx]))
 
@@ -129,7 +179,7 @@ class GetNewsFeed:
                 picked.append((MARKET_RU, CATEGORY_STOCKS, url))
         else:
             if stocks_urls:
-                key = self._user_persona_key(user)
+                key = self._persona_bucket(user)
                 start = self._stable_index(key + "|stocks", len(stocks_urls))
                 rotated = stocks_urls[start:] + stocks_urls[:start]
                 for url in rotated:
@@ -147,13 +197,14 @@ class GetNewsFeed:
         )
         persona_hint = ""
         if audience == "personal" and user is not None:
+            # в промпт попадает только кластер профиля: тикеры добавляются дешёвым _apply_user_overlay
+            horizon, risk, sector_group = self._persona_bucket_parts(user)
             persona_hint = (
-                "\nПрофиль пользователя:\n"
-                f"- горизонт: {user.investment_horizon or 'не указан'}\n"
-                f"- риск: {user.risk_level or 'не указан'}\n"
-                f"- тикеры: {', '.join(user.tickers) if user.tickers else 'не указаны'}\n"
-                f"- секторы: {', '.join(user.sectors) if user.sectors else 'не указаны'}\n"
-                "Сделай вывод чуть более прикладным к профилю пользователя.\n"
+                "\nПрофиль инвестора:\n"
+                f"- горизонт: {horizon if horizon != 'any' else 'не указан'}\n"
+                f"- риск: {risk if risk != 'any' else 'не указан'}\n"
+                f"- интересы: {SECTOR_GROUP_LABELS.get(sector_group, 'не указаны')}\n"
+                "Сделай вывод чуть более прикладным к профилю инвестора.\n"
             )
 
         return (
@@ -193,33 +244,254 @@ class GetNewsFeed:
         *,
         audience: str,
         force: bool = False,
+        slot_time: Optional[datetime] = None,
+        timings: Optional[Dict[str, float]] = None,
+        title: Optional[str] = None,
     ) -> dict:
-        now = datetime.now(timezone.utc)
+        if timings is None:
+            timings = {}
+        now = slot_time or datetime.now(timezone.utc)
         today = now.date()
         hour_slot = now.replace(minute=0, second=0, microsecond=0).strftime("%Y%m%d%H")
-        cache_category = f"{category}::aud={audience}::slot={hour_slot}"
+        category_prefix = f"{category}::aud={audience}"
+        if audience == "personal":
+            category_prefix = f"{category_prefix}::persona={self._persona_bucket(user)}"
+        cache_category = f"{category_prefix}::slot={hour_slot}"
+
+        build_kwargs = dict(
+            market=market,
+            category=category,
+            url=url,
+            user=user,
+            audience=audience,
+            force=force,
+            today=today,
+            hour_slot=hour_slot,
+            cache_category=cache_category,
+            title=title,
+        )
 
         if not force:
+            stage = time.perf_counter()
             cached = self.cache_repo.get(cache_date=today, category=cache_category, url=url)
+            timings["cache_ms"] = _elapsed_ms(stage)
             if cached:
-                payload = _safe_json_loads(cached.payload_json)
-                if not isinstance(payload, dict):
-                    payload = {}
-                payload["_meta"] = {
-                    "asof": today.isoformat(),
-                    "title": cached.title,
-                    "source": cached.source,
-                    "url": cached.url,
-                    "hour_slot": hour_slot,
-                }
-                return payload
+                return self._payload_from_cached(cached, today=today, hour_slot=hour_slot)
+
+            # LLM заведомо не ответит (разомкнут предохранитель): не скрапим и не ждём таймаут
+            if self.llm_retry_after() is not None:
+                return self._serve_without_llm(
+                    category=category,
+                    url=url,
+                    audience=audience,
+                    title=title,
+                    category_prefix=category_prefix,
+                    now=now,
+                    hour_slot=hour_slot,
+                )
+
+            # stale-while-revalidate: отдаём прошлый слот сразу, новый собираем в фоне
+            if slot_time is None:
+                stale = self._get_stale(category_prefix=category_prefix, url=url, now=now, hour_slot=hour_slot)
+                if stale is not None:
+                    self._schedule_refresh(build_kwargs)
+                    return stale
+
+        return self._build_coalesced(build_kwargs, timings)
+
+    def _build_coalesced(self, build_kwargs: dict, timings: Dict[str, float]) -> dict:
+        # single-flight: в процессе один builder на ключ, между воркерами — advisory lock в Postgres
+        stage = time.perf_counter()
+        flight_key = self._flight_key(build_kwargs)
+        payload, shared = _BASE_FLIGHT.do(
+            flight_key,
+            lambda: self._build_base_locked(**build_kwargs, timings=timings),
+        )
+        if shared:
+            timings["wait_ms"] = _elapsed_ms(stage)
+            metrics.incr("news_feed.single_flight.shared")
+        return copy.deepcopy(payload)
+
+    @staticmethod
+    def _flight_key(build_kwargs: dict) -> str:
+        return f"{build_kwargs['today'].isoformat()}|{build_kwargs['cache_category']}|{build_kwargs['url']}"
+
+    def _get_stale(self, *, category_prefix: str, url: str, now: datetime, hour_slot: str) -> Optional[dict]:
+        max_age_min = settings.NEWS_MAX_STALENESS_MIN
+        if max_age_min <= 0:
+            return None
+
+        try:
+            row = self.cache_repo.get_latest(
+                category_prefix=category_prefix,
+                url=url,
+                since=(now - timedelta(minutes=max_age_min)).date(),
+                before_slot=hour_slot,
+            )
+        except Exception as e:
+            logger.warning("Не удалось прочитать прошлый слот для %s: %s", url, e)
+            return None
+        if not row:
+            return None
+
+        stale_slot = row.category.rsplit("::slot=", 1)[-1]
+        try:
+            stale_start = datetime.strptime(stale_slot, "%Y%m%d%H").replace(tzinfo=timezone.utc)
+        except ValueError:
+            return None
+
+        if (now - stale_start).total_seconds() / 60 > max_age_min:
+            metrics.incr("news_feed.swr.too_stale")
+            return None
+
+        metrics.incr("news_feed.swr.served_stale")
+        payload = self._payload_from_cached(row, today=row.cache_date, hour_slot=stale_slot)
+        payload["_meta"]["stale"] = True
+        return payload
+
+    def _serve_without_llm(
+        self,
+        *,
+        category: str,
+        url: str,
+        audience: str,
+        title: Optional[str],
+        category_prefix: str,
+        now: datetime,
+        hour_slot: str,
+    ) -> dict:
+        """
+        Прошлый слот, если он не старше NEWS_MAX_STALENESS_MIN, иначе заглушка.
+        Заглушка не кэшируется: как только LLM вернётся, слот соберётся нормально.
+        """
+        stale = self._get_stale(category_prefix=category_prefix, url=url, now=now, hour_slot=hour_slot)
+        if stale is not None:
+            metrics.incr("news_feed.llm_down.stale")
+            return stale
+
+        metrics.incr("news_feed.llm_down.fallback")
+        source_name = urlparse(url).netloc or url
+        title = title or self._default_title(category)
+        payload = self._build_fallback_payload(
+            title=title,
+            source=source_name,
+            url=url,
+            audience=audience,
+            reason="Сервис аналитики временно недоступен",
+        )
+        payload["_meta"] = {
+            "asof": now.date().isoformat(),
+            "title": title,
+            "source": source_name,
+            "url": url,
+            "hour_slot": hour_slot,
+        }
+        return payload
+
+    @staticmethod
+    def _default_title(category: str) -> str:
+        return "Рынок РФ — макрообзор" if category == CATEGORY_MACRO else "Рынок РФ — обзор акций"
+
+    def _schedule_refresh(self, build_kwargs: dict) -> None:
+        key = self._flight_key(build_kwargs)
+        with _REFRESHING_LOCK:
+            if key in _REFRESHING:
+                return
+            _REFRESHING.add(key)
+
+        def _refresh() -> None:
+            try:
+                self._build_coalesced(build_kwargs, {})
+                metrics.incr("news_feed.swr.refreshed")
+            except Exception as e:
+                logger.warning("Фоновое обновление %s не удалось: %s", build_kwargs["url"], e)
+            finally:
+                with _REFRESHING_LOCK:
+                    _REFRESHING.discard(key)
+
+        _REFRESH_EXECUTOR.submit(_refresh)
 
+    def _build_base_locked(
+        self,
+        *,
+        market: str,
+        category: str,
+        url: str,
+        user: Optional[User],
+        audience: str,
+        force: bool,
+        today: date,
+        hour_slot: str,
+        cache_category: str,
+        timings: Dict[str, float],
+        title: Optional[str] = None,
+    ) -> dict:
+        stage = time.perf_counter()
+        with self.cache_repo.build_lock(cache_date=today, category=cache_category, url=url):
+            timings["lock_ms"] = _elapsed_ms(stage)
+            if not force:
+                # пока ждали лок, запись мог собрать другой воркер
+                cached = self.cache_repo.get(cache_date=today, category=cache_category, url=url)
+                if cached:
+                    metrics.incr("news_feed.single_flight.built_elsewhere")
+                    return self._payload_from_cached(cached, today=today, hour_slot=hour_slot)
+
+            metrics.incr("news_feed.single_flight.builds")
+            return self._build_base(
+                market=market,
+                category=category,
+                url=url,
+                user=user,
+                audience=audience,
+                today=today,
+                hour_slot=hour_slot,
+                cache_category=cache_category,
+                timings=timings,
+                title=title,
+            )
+
+    @staticmethod
+    def _payload_from_cached(cached: CachedSummaryRow, *, today: date, hour_slot: str) -> dict:
+        # payload из L1 общий для всех запросов воркера — работаем только с копией
+        payload = copy.deepcopy(cached.payload) if cached.payload is not None else _safe_json_loads(cached.payload_json)
+        if not isinstance(payload, dict):
+            payload = {}
+        payload["_meta"] = {
+            "asof": today.isoformat(),
+            "title": cached.title,
+            "source": cached.source,
+            "url": cached.url,
+            "hour_slot": hour_slot,
+        }
+        return payload
+
+    def _build_base(
+        self,
+        *,
+        market: str,
+        category: str,
+        url: str,
+        user: Optional[User],
+        audience: str,
+        today: date,
+        hour_slot: str,
+        cache_category: str,
+        timings: Dict[str, float],
+        title: Optional[str] = None,
+    ) -> dict:
         parsed = urlparse(url)
         source_name = parsed.netloc or url
-        title = "Рынок РФ — макрообзор" if category == CATEGORY_MACRO else "Рынок РФ — обзор акций"
-
-        raw_text = self.scraper.fetch_article_text(url)
-        raw_text = _clean_and_truncate(raw_text or "", max_chars=15000)
+        # title передаёт краулер для отдельных статей; индексные страницы получают обзорный заголовок
+        is_article = bool(title)
+        if not title:
+            title = self._default_title(category)
+        # False — заглушка из-за разомкнутого предохранителя LLM: на час её не сохраняем
+        cacheable = True
+
+        stage = time.perf_counter()
+        raw_text = self.scraper.fetch_article_text(url, max_chars=ARTICLE_MAX_CHARS)
+        raw_text = _clean_and_truncate(raw_text or "", max_chars=ARTICLE_MAX_CHARS)
+        timings["scrape_ms"] = _elapsed_ms(stage)
 
         if not raw_text:
             payload = self._build_fallback_payload(
@@ -230,10 +502,18 @@ class GetNewsFeed:
                 reason="Источник временно недоступен",
             )
         else:
+            stage = time.perf_counter()
+            content_hash = self._content_hash(category=category, raw_text=raw_text, user=user, audience=audience)
+            reused = self._get_reusable_summary(content_hash)
             try:
-                prompt = self._make_base_prompt(category=category, raw_text=raw_text, user=user, audience=audience)
-                llm_out = self.llm.chat(prompt)
-                payload = _safe_json_loads(llm_out)
+                if reused is not None:
+                    payload = reused
+                else:
+                    prompt = self._make_base_prompt(category=category, raw_text=raw_text, user=user, audience=audience)
+                    payload = self._generate_summary(prompt, raw_text=raw_text, audience=audience)
+                    # неполную карточку (дозапрос не удался) держим только в кэше дня, а не в news_summaries
+                    if isinstance(payload, dict) and set(REQUIRED_FIELDS) <= set(payload):
+                        self._store_reusable_summary(content_hash, category=category, payload=payload)
                 if not isinstance(payload, dict):
                     payload = self._build_fallback_payload(
                         title=title,
@@ -244,6 +524,7 @@ class GetNewsFeed:
                     )
             except Exception as e:
                 logger.warning("LLM недоступен для %s: %s", url, e)
+                cacheable = not isinstance(e, LLMUnavailableError)
                 payload = self._build_fallback_payload(
                     title=title,
                     source=source_name,
@@ -251,31 +532,38 @@ class GetNewsFeed:
                     audience=audience,
                     reason="Сервис аналитики временно недоступен",
                 )
+            timings["llm_ms"] = _elapsed_ms(stage)
 
+        stage = time.perf_counter()
         payload_json = json.dumps(payload, ensure_ascii=False)
-        self.cache_repo.upsert(
-            cache_date=today,
-            market=market,
-            category=cache_category,
-            url=url,
-            source=source_name,
-            title=title,
-            payload_json=payload_json,
-        )
-
-        if audience == "public":
-            self.news_repo.upsert_by_url(
+        if not cacheable:
+            metrics.incr("news_feed.llm_down.fallback")
+        else:
+            self.cache_repo.upsert(
+                cache_date=today,
+                market=market,
+                category=cache_category,
                 url=url,
-                title=title,
-                slug=slugify(title),
                 source=source_name,
+                title=title,
                 payload_json=payload_json,
-                asof=today,
-                market=market,
-                category=category,
-                is_public=True,
             )
 
+            # карточку-заглушку для статьи не публикуем: краулер повторит её в следующий прогон
+            if audience == "public" and not (is_article and payload.get("_fallback")):
+                self.news_repo.upsert_by_url(
+                    url=url,
+                    title=title,
+                    slug=slugify(title),
+                    source=source_name,
+                    payload_json=payload_json,
+                    asof=today,
+                    market=market,
+                    category=category,
+                    is_public=True,
+                )
+        timings["store_ms"] = _elapsed_ms(stage)
+
         payload["_meta"] = {
             "asof": today.isoformat(),
             "title": title,
@@ -286,6 +574,104 @@ class GetNewsFeed:
 
         return payload
 
+    def _generate_summary(self, prompt: str, *, raw_text: str, audience: str) -> Optional[dict]:
+        """
+        JSON по схеме; из почти-валидного ответа берём целые поля, а недостающие
+        дозапрашиваем коротким промптом вместо повторной генерации всей карточки.
+        None — ответ не спасти (уйдёт в заглушку).
+        """
+        user_context = {"priority": self._llm_priority(audience)}
+        fields, missing = parse_summary(self.llm.chat_json(prompt, SUMMARY_SCHEMA, user_context=user_context))
+        if not missing:
+            metrics.incr("news_feed.summary_json.ok")
+            return fields
+        if not fields:
+            metrics.incr("news_feed.summary_json.failed")
+            return None
+
+        metrics.incr("news_feed.summary_json.partial")
+        repair_prompt = make_repair_prompt(missing, fields, raw_text[:REPAIR_MAX_CHARS])
+        try:
+            repaired, _ = parse_summary(
+                self.llm.chat_json(repair_prompt, summary_schema(tuple(missing)), user_context=user_context)
+            )
+            fields.update({k: v for k, v in repaired.items() if k in missing})
+        except Exception as e:
+            logger.warning("Дозапрос полей %s не удался: %s", missing, e)
+
+        if "summary" not in fields and "facts" not in fields:
+            metrics.incr("news_feed.summary_json.failed")
+            return None
+        complete = set(missing) <= set(fields)
+        metrics.incr("news_feed.summary_json.repaired" if complete else "news_feed.summary_json.incomplete")
+        return fields
+
+    def llm_retry_after(self) -> Optional[float]:
+        """
+        None — LLM принимает запросы, иначе через сколько секунд пробовать снова.
+        """
+        return self.llm.retry_after()
+
+    @staticmethod
+    def _llm_priority(audience: str) -> str:
+        # персональную ленту ждёт пользователь, публичная витрина собирается заранее в фоне
+        return LLM_PRIORITY_PERSONAL_FEED if audience == "personal" else LLM_PRIORITY_PUBLIC_PRECOMPUTE
+
+    def summarize_article(
+        self,
+        *,
+        market: str,
+        category: str,
+        url: str,
+        title: str,
+        slot_time: Optional[datetime] = None,
+    ) -> dict:
+        """
+        Суммаризация отдельной статьи, найденной краулером: своя публичная строка News
+        с заголовком статьи. Повторный вызов в том же слоте отдаёт кэш.
+        """
+        return self._get_or_build_base(
+            market,
+            category,
+            url,
+            None,
+            audience="public",
+            slot_time=slot_time,
+            title=title,
+        )
+
+    def _content_hash(self, *, category: str, raw_text: str, user: Optional[User], audience: str) -> str:
+        # персональный промпт зависит от кластера профиля, поэтому он входит в ключ вместе с текстом
+        variant = self._persona_bucket(user) if audience == "personal" else audience
+        seed = f"{PROMPT_VERSION}|{category}|{variant}|{raw_text}"
+        return hashlib.sha256(seed.encode("utf-8")).hexdigest()
+
+    def _get_reusable_summary(self, content_hash: str) -> Optional[dict]:
+        if self.summary_repo is None:
+            return None
+        try:
+            payload_json = self.summary_repo.get(content_hash)
+        except Exception as e:
+            logger.warning("Хранилище суммаризаций недоступно: %s", e)
+            return None
+        payload = _safe_json_loads(payload_json) if payload_json else None
+        outcome = "hits" if isinstance(payload, dict) else "misses"
+        metrics.incr(f"news_summary_reuse.{outcome}")
+        return payload if isinstance(payload, dict) else None
+
+    def _store_reusable_summary(self, content_hash: str, *, category: str, payload: dict) -> None:
+        if self.summary_repo is None:
+            return
+        try:
+            self.summary_repo.put(
+                content_hash=content_hash,
+                prompt_version=PROMPT_VERSION,
+                category=category,
+                payload_json=json.dumps(payload, ensure_ascii=False),
+            )
+        except Exception as e:
+            logger.warning("Не удалось сохранить суммаризацию %s: %s", content_hash[:12], e)
+
     def _apply_user_overlay(self, user: User, payload: Optional[dict]) -> dict:
         if not isinstance(payload, dict):
             payload = {}
@@ -307,21 +693,39 @@ class GetNewsFeed:
 
         return payload
 
-    def execute(self, user: User, force: bool = False, audience: str = "personal") -> List[NewsBlock]:
+    def execute(
+        self,
+        user: User,
+        force: bool = False,
+        audience: str = "personal",
+        slot_time: Optional[datetime] = None,
+    ) -> List[NewsBlock]:
         blocks: List[NewsBlock] = []
         sources = self._pick_sources(user=user, audience=audience, max_blocks=3)
         if not sources:
             return []
 
-        for market, category, url in sources:
-            payload = self._get_or_build_base(
+        started = time.perf_counter()
+        timings: List[Dict[str, float]] = [{} for _ in sources]
+        futures = [
+            _FEED_EXECUTOR.submit(
+                self._get_or_build_base,
                 market=market,
                 category=category,
                 url=url,
                 user=user,
                 audience=audience,
                 force=force,
+                slot_time=slot_time,
+                timings=timings[i],
             )
+            for i, (market, category, url) in enumerate(sources)
+        ]
+        # результаты собираем строго в порядке _pick_sources
+        payloads = [f.result() for f in futures]
+        self._record_timings(audience=audience, sources=sources, timings=timings, total_ms=_elapsed_ms(started))
+
+        for (market, category, url), payload in zip(sources, payloads):
             if not isinstance(payload, dict):
                 payload = {}
             if audience == "personal":
@@ -386,6 +790,27 @@ class GetNewsFeed:
 
         return blocks
 
+    def _record_timings(
+        self,
+        *,
+        audience: str,
+        sources: list[tuple[str, str, str]],
+        timings: List[Dict[str, float]],
+        total_ms: float,
+    ) -> None:
+        self.last_timings = {"total_ms": total_ms, "sources": []}
+        for (_, category, url), stages in zip(sources, timings):
+            for stage, value in stages.items():
+                metrics.observe_ms(f"news_feed.{audience}.{stage}", value)
+            self.last_timings["sources"].append({"category": category, "url": url, **stages})
+        metrics.observe_ms(f"news_feed.{audience}.total_ms", total_ms)
+
+        breakdown = "; ".join(
+            f"{item['url']}: " + ", ".join(f"{k}={v:.0f}" for k, v in item.items() if k.endswith("_ms"))
+            for item in self.last_timings["sources"]
+        )
+        logger.info("[NewsFeed] aud=%s total=%.0fms | %s", audience, total_ms, breakdown)
+
     @staticmethod
     def _build_fallback_payload(
         *,
@@ -422,14 +847,34 @@ class GetNewsFeed:
         return int(digest[:8], 16) % size
 
     @staticmethod
-    def _user_persona_key(user: Optional[User]) -> str:
+    def _persona_bucket_parts(user: Optional[User]) -> tuple[str, str, str]:
+        """
+        Нормализует профиль в (горизонт, риск, группа секторов) — ограниченный набор кластеров.
+        """
+        if user is None:
+            return "any", "any", "any"
+
+        horizon = user.investment_horizon if user.investment_horizon in ALLOWED_HORIZONS else "any"
+        risk = user.risk_level if user.risk_level in ALLOWED_RISK else "any"
+
+        group_counts: dict[str, int] = {}
+        for sector in user.sectors or []:
+            group = SECTOR_GROUPS.get(sector)
+            if group:
+                group_counts[group] = group_counts.get(group, 0) + 1
+
+        if not group_counts:
+            sector_group = "any"
+        else:
+            top = max(group_counts.values())
+            leaders = [g for g, c in group_counts.items() if c == top]
+            sector_group = leaders[0] if len(leaders) == 1 else "mixed"
+
+        return horizon, risk, sector_group
+
+    @classmethod
+    def _persona_bucket(cls, user: Optional[User]) -> str:
         if user is None:
             return "public"
-        parts = [
-            str(user.id or 0),
-            user.investment_horizon or "",
-            user.risk_level or "",
-            ",".join(sorted(user.tickers or [])),
-            ",".join(sorted(user.sectors or [])),
-        ]
-        return "|".join(parts)
+        horizon, risk, sector_group = cls._persona_bucket_parts(user)
+        return f"h={horizon},r={risk},s={sector_group}"
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+IMPACT_VALUES = ("positive", "neutral", "negative")
+CONFIDENCE_VALUES = ("low", "medium", "high")
+
+_STR_FIELDS = ("summary", "conclusion")
+_LIST_FIELDS = ("facts", "explanation", "risks")
+
+# Без этих полей карточка неполная: их дозапрашиваем; explanation в карточку не попадает
+REQUIRED_FIELDS = ("summary", "facts", "conclusion", "risks", "indicator")
+
+_FIELD_SCHEMAS: Dict[str, dict] = {
+    "summary": {"type": "string"},
+    "facts": {"type": "array", "items": {"type": "string"}},
+    "conclusion": {"type": "string"},
+    "explanation": {"type": "array", "items": {"type": "string"}},
+    "risks": {"type": "array", "items": {"type": "string"}},
+    "indicator": {
+        "type": "object",
+        "properties": {
+            "impact": {"type": "string", "enum": list(IMPACT_VALUES)},
+            "confidence": {"type": "string", "enum": list(CONFIDENCE_VALUES)},
+            "rationale": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["impact", "confidence", "rationale"],
+    },
+}
+
+_FIELD_HINTS = {
+    "summary": "2-3 предложения: о чем статья (без выводов и рисков)",
+    "facts": "3-6 пунктов: только факты/цифры/события",
+    "conclusion": "1-2 предложения: что это значит для инвестора/рынка РФ (не совет)",
+    "explanation": "2-4 пункта: механизмы влияния",
+    "risks": "2-4 пункта: риски и неопределенности",
+    "indicator": 'impact из ["positive","neutral","negative"], confidence из ["low","medium","high"], rationale',
+}
+
+_KEY_RE = re.compile(r'"(%s)"\s*:\s*' % "|".join(_FIELD_SCHEMAS))
+
+
+def summary_schema(fields: Tuple[str, ...] = tuple(_FIELD_SCHEMAS)) -> dict:
+    """
+    JSON Schema для format= в Ollama: модель физически не может выйти за структуру.
+    """
+    return {
+        "type": "object",
+        "properties": {name: _FIELD_SCHEMAS[name] for name in fields},
+        "required": [name for name in fields if name in REQUIRED_FIELDS],
+    }
+
+
+SUMMARY_SCHEMA = summary_schema()
+
+
+def _clean_list(value: Any) -> Optional[List[str]]:
+    if not isinstance(value, list):
+        return None
+    items = [str(x).strip() for x in value if isinstance(x, (str, int, float)) and str(x).strip()]
+    return items or None
+
+
+def _clean_field(name: str, value: Any) -> Any:
+    """
+    Нормализованное значение поля или None, если оно невалидно.
+    """
+    if name in _STR_FIELDS:
+        return value.strip() if isinstance(value, str) and value.strip() else None
+    if name in _LIST_FIELDS:
+        return _clean_list(value)
+    if name == "indicator" and isinstance(value, dict):
+        impact = str(value.get("impact") or "").strip().lower()
+        confidence = str(value.get("confidence") or "").strip().lower()
+        if impact in IMPACT_VALUES and confidence in CONFIDENCE_VALUES:
+            return {"impact": impact, "confidence": confidence, "rationale": _clean_list(value.get("rationale")) or []}
+    return None
+
+
+def _salvage(text: str) -> Dict[str, Any]:
+    """
+    Почти-JSON (обрезан по num_predict, мусор вокруг, ```-обёртка): разбираем значения
+    по каждому известному ключу отдельно, целыми остаются те, что закрылись.
+    """
+    decoder = json.JSONDecoder()
+    found: Dict[str, Any] = {}
+    for match in _KEY_RE.finditer(text):
+        name = match.group(1)
+        if name in found:
+            continue
+        try:
+            value, _ = decoder.raw_decode(text, match.end())
+        except ValueError:
+            continue
+        found[name] = value
+    return found
+
+
+def parse_summary(text: Optional[str]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    -> (валидные поля, недостающие обязательные поля).
+    """
+    text = (text or "").strip()
+    try:
+        raw = json.loads(text)
+    except ValueError:
+        raw = None
+    if not isinstance(raw, dict):
+        raw = _salvage(text)
+
+    fields: Dict[str, Any] = {}
+    for name in _FIELD_SCHEMAS:
+        value = _clean_field(name, raw.get(name))
+        if value is not None:
+            fields[name] = value
+    missing = [name for name in REQUIRED_FIELDS if name not in fields]
+    return fields, missing
+
+
+def make_repair_prompt(missing: List[str], fields: Dict[str, Any], raw_text: str) -> str:
+    """
+    Короткий промпт только на недостающие поля: уже разобранное передаём как контекст.
+    """
+    wanted = "\n".join(f'- "{name}": {_FIELD_HINTS[name]}' for name in missing)
+    known = json.dumps({k: v for k, v in fields.items() if k in ("summary", "facts")}, ensure_ascii=False)
+    return (
+        "Ты — аналитик российского фондового рынка. Дополни разбор статьи.\n"
+        f"Верни СТРОГО JSON только с полями:\n{wanted}\n\n"
+        f"Уже есть: {known}\n\n"
+        f"Текст статьи:\n{raw_text}"
+    )
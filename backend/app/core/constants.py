@@ -27,6 +27,29 @@ ALLOWED_SECTORS: Set[str] = {
     "financials_other",
 }
 
+# Укрупнённые группы секторов для кластеризации персональных профилей (persona buckets).
+SECTOR_GROUPS: Dict[str, str] = {
+    "banks": "financials",
+    "financials_other": "financials",
+    "real_estate": "financials",
+    "oil_gas": "commodities",
+    "metals_mining": "commodities",
+    "it": "tech_consumer",
+    "telecom": "tech_consumer",
+    "consumer": "tech_consumer",
+    "utilities": "infrastructure",
+    "transport": "infrastructure",
+    "industrials": "infrastructure",
+}
+
+SECTOR_GROUP_LABELS: Dict[str, str] = {
+    "financials": "банки и финансовый сектор",
+    "commodities": "нефтегаз и металлурги",
+    "tech_consumer": "IT, телеком и потребительский сектор",
+    "infrastructure": "инфраструктура, транспорт и промышленность",
+    "mixed": "диверсифицированный портфель",
+}
+
 TICKER_RE = re.compile(r"^[A-Z0-9\.]{2,12}$")
 
 NEWS_SOURCES: Dict[str, Dict[str, List[str]]] = {
@@ -45,6 +68,18 @@ NEWS_SOURCES: Dict[str, Dict[str, List[str]]] = {
     }
 }
 
+# Классы приоритета вызовов LLM, от самого срочного к фоновому (user_context["priority"])
+LLM_PRIORITY_CHAT = "chat"
+LLM_PRIORITY_PERSONAL_FEED = "personal_feed"
+LLM_PRIORITY_PUBLIC_PRECOMPUTE = "public_precompute"
+LLM_PRIORITY_BACKGROUND = "background"
+LLM_PRIORITIES: List[str] = [
+    LLM_PRIORITY_CHAT,
+    LLM_PRIORITY_PERSONAL_FEED,
+    LLM_PRIORITY_PUBLIC_PRECOMPUTE,
+    LLM_PRIORITY_BACKGROUND,
+]
+
 # Базовый набор ликвидных бумаг (используем как sample-представление состава IMOEX для MVP).
 IMOEX_SAMPLE_TICKERS: List[str] = [
     "SBER",
@@ -1,3 +1,5 @@
+from typing import Dict
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -24,6 +26,80 @@ class Settings(BaseSettings):
     OLLAMA_URL: str
     OLLAMA_MODEL: str
     OLLAMA_MAX_CONCURRENCY: int = Field(default=1, ge=1, le=8)
+    # Несколько бэкендов через запятую (иначе используется OLLAMA_URL); OLLAMA_MAX_CONCURRENCY — на каждый
+    OLLAMA_URLS: str = ""
+    OLLAMA_FAIL_THRESHOLD: int = Field(default=3, ge=1)
+    OLLAMA_EJECT_SEC: float = Field(default=30, gt=0)
+    OLLAMA_HEALTH_INTERVAL_SEC: float = Field(default=10, gt=0)
+    # Предзагрузка модели при старте и keep_alive: в торговые часы MOEX (будни, МСК) модель держим дольше
+    OLLAMA_WARMUP_ENABLED: bool = True
+    OLLAMA_TRADING_HOURS_MSK: str = "06:50-23:50"
+    OLLAMA_KEEP_ALIVE_TRADING: str = "2h"
+    OLLAMA_KEEP_ALIVE_OFF_HOURS: str = "10m"
+    # Чат продолжает сохранённый контекст Ollama, пока он не длиннее этого числа токенов (0 — всегда вся история)
+    OLLAMA_CONTEXT_REUSE_MAX_TOKENS: int = Field(default=3000, ge=0)
+    # Окно контекста модели (options.num_ctx); промпт чата собирается под него с запасом на ответ
+    OLLAMA_NUM_CTX: int = Field(default=4096, ge=512, le=131072)
+    CHAT_RESPONSE_RESERVE_TOKENS: int = Field(default=768, ge=64)
+    # Свёртка длинных чатов: когда несвёрнутая переписка длиннее порога, всё, кроме последних
+    # CHAT_RECENT_MESSAGES, в фоне сворачивается в краткое содержание не длиннее CHAT_SUMMARY_MAX_CHARS
+    CHAT_COMPACT_ENABLED: bool = True
+    CHAT_COMPACT_THRESHOLD_CHARS: int = Field(default=6000, ge=1000)
+    CHAT_RECENT_MESSAGES: int = Field(default=6, ge=2, le=50)
+    CHAT_SUMMARY_MAX_CHARS: int = Field(default=1500, ge=200, le=6000)
+    # Ответы через /chat/jobs генерируют воркеры: в API (CHAT_JOB_WORKER_ENABLED) или отдельным процессом
+    # python -m app.infrastructure.scheduler.chat_jobs; HTTP-потоки на время инференса не заняты
+    CHAT_JOB_WORKER_ENABLED: bool = True
+    CHAT_JOB_WORKERS: int = Field(default=2, ge=1, le=32)
+    CHAT_JOB_POLL_SEC: float = Field(default=1.0, gt=0)
+    CHAT_JOB_STUCK_SEC: int = Field(default=600, ge=30)
+    CHAT_JOB_MAX_ATTEMPTS: int = Field(default=2, ge=1, le=10)
+    CHAT_JOB_WAIT_MAX_SEC: int = Field(default=25, ge=0, le=120)
+    # Лимиты слотов и дедлайн ожидания в очереди по классам LLM_PRIORITIES (JSON в env),
+    # класс без лимита может занять все OLLAMA_MAX_CONCURRENCY слотов
+    LLM_CLASS_LIMITS: Dict[str, int] = {"public_precompute": 1, "background": 1}
+    LLM_QUEUE_DEADLINE_SEC: Dict[str, float] = {"personal_feed": 60}
+    # Предохранитель LLM: доля ошибок за окно (при минимуме вызовов) размыкает цепь на COOLDOWN_SEC
+    LLM_BREAKER_FAILURE_RATE: float = Field(default=0.5, gt=0, le=1)
+    LLM_BREAKER_MIN_CALLS: int = Field(default=4, ge=1)
+    LLM_BREAKER_WINDOW_SEC: float = Field(default=60, gt=0)
+    LLM_BREAKER_COOLDOWN_SEC: float = Field(default=30, gt=0)
+
+    OLLAMA_TIMEOUT_SEC: float = Field(default=120, gt=0)
+
+    HTTP_POOL_CONNECTIONS: int = Field(default=10, ge=1, le=100)
+    HTTP_POOL_MAXSIZE: int = Field(default=10, ge=1, le=100)
+    HTTP_RETRIES: int = Field(default=2, ge=0, le=10)
+    HTTP_BACKOFF_SEC: float = Field(default=0.5, ge=0)
+    HTTP_CONNECT_TIMEOUT_SEC: float = Field(default=3.0, gt=0)
+    SCRAPER_TIMEOUT_SEC: float = Field(default=10, gt=0)
+    # auto | lxml | bs4
+    SCRAPER_HTML_EXTRACTOR: str = "auto"
+    # Жёсткий лимит на тело страницы и размер куска при потоковом чтении
+    SCRAPER_MAX_BYTES: int = Field(default=2_000_000, ge=64_000)
+    SCRAPER_CHUNK_BYTES: int = Field(default=16_384, ge=1024)
+
+    # Краулер статей с индексных страниц NEWS_SOURCES (работает в фоне вместе с precompute)
+    CRAWLER_ENABLED: bool = True
+    CRAWLER_MAX_ARTICLES_PER_RUN: int = Field(default=10, ge=0, le=200)
+    CRAWLER_MAX_LINKS_PER_INDEX: int = Field(default=40, ge=1, le=500)
+    CRAWLER_MAX_ATTEMPTS: int = Field(default=3, ge=1, le=10)
+    CRAWLER_PENDING_TTL_HOURS: int = Field(default=24, ge=1)
+    CRAWLER_SEEN_CACHE_SIZE: int = Field(default=200_000, ge=1000)
+    MOEX_TIMEOUT_SEC: float = Field(default=8, gt=0)
+
+    NEWS_PRECOMPUTE_ENABLED: bool = True
+    NEWS_PRECOMPUTE_LEAD_SEC: int = Field(default=300, ge=0, le=3000)
+    NEWS_FEED_MAX_WORKERS: int = Field(default=6, ge=1, le=32)
+    NEWS_MAX_STALENESS_MIN: int = Field(default=180, ge=0, le=24 * 60)
+    NEWS_L1_CACHE_SIZE: int = Field(default=512, ge=0, le=100_000)
+    NEWS_L1_CACHE_TTL_SEC: int = Field(default=60, ge=1, le=3600)
+    # Кэш user_id -> роли/права на воркер; сбрасывается через LISTEN/NOTIFY при смене ролей (0 — без кэша)
+    AUTH_PRINCIPAL_CACHE_SIZE: int = Field(default=10_000, ge=0, le=1_000_000)
+    AUTH_PRINCIPAL_CACHE_TTL_SEC: int = Field(default=300, ge=1, le=24 * 3600)
+    AUTH_RBAC_LISTEN_ENABLED: bool = True
+    # Роли, битовая маска прав и версия ролей прямо в access-токене: require_permissions без запроса к БД
+    AUTH_TOKEN_CLAIMS_ENABLED: bool = False
 
     ADMIN_EMAIL: str
     FRONTEND_BASE_URL: str = "http://localhost:3000"
@@ -9,3 +9,5 @@ class ChatMessage:
     role: str  # 'user' | 'FinPulse'
     content: str
     timestamp: datetime
+    chat_id: int | None = None
+    token_count: int | None = None
@@ -0,0 +1,18 @@
+from dataclasses import dataclass, field
+
+from app.domain.entities.user import User
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Аутентифицированный пользователь запроса вместе с ролями и правами.
+    """
+
+    user: User
+    roles: frozenset[str] = field(default_factory=frozenset)
+    permissions: frozenset[str] = field(default_factory=frozenset)
+    role_version: int = 0
+
+    def has_permissions(self, required: set[str]) -> bool:
+        return required.issubset(self.permissions)
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Tuple, Type
+
+from app.application.interfaces.llm import LLMUnavailableError
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """
+    Цепь разомкнута: вызов отклонён сразу, без обращения к зависимости.
+    """
+
+
+class CircuitBreaker:
+    """
+    Предохранитель по доле ошибок (in-process).
+
+    - closed: вызовы идут; если за window_sec было не меньше min_calls вызовов
+      и доля ошибок >= failure_rate — цепь размыкается
+    - open: вызовы отклоняются CircuitOpenError, пока не пройдёт cooldown_sec
+    - half_open: пропускается один пробный вызов; успех замыкает цепь, ошибка — снова open
+
+    Исключения из ignored (например, переполнение своей очереди) ошибкой зависимости не считаются;
+    is_failure уточняет остальные: False — ошибка вызывающего (например, HTTP 4xx), а не зависимости.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        min_calls: int = 4,
+        window_sec: float = 60.0,
+        cooldown_sec: float = 30.0,
+        ignored: Tuple[Type[BaseException], ...] = (),
+        is_failure: Optional[Callable[[Exception], bool]] = None,
+    ) -> None:
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_sec = window_sec
+        self.cooldown_sec = cooldown_sec
+        self.ignored = ignored
+        self.is_failure = is_failure
+
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._calls: Deque[Tuple[float, bool]] = deque()
+        self.opened = 0
+        self.rejected = 0
+
+    def _trim(self, now: float) -> None:
+        while self._calls and now - self._calls[0][0] > self.window_sec:
+            self._calls.popleft()
+
+    def _retry_after_locked(self, now: float) -> Optional[float]:
+        if self._state == STATE_CLOSED:
+            return None
+        if self._state == STATE_OPEN:
+            left = self._opened_at + self.cooldown_sec - now
+            if left > 0:
+                return left
+            self._state = STATE_HALF_OPEN
+        # half_open: пока идёт пробный вызов, остальные ждут его результата
+        return 1.0 if self._probe_in_flight else None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._retry_after_locked(time.monotonic())
+            return self._state
+
+    def retry_after(self) -> Optional[float]:
+        """
+        None — вызов сейчас будет пропущен, иначе через сколько секунд пробовать снова.
+        """
+        with self._lock:
+            return self._retry_after_locked(time.monotonic())
+
+    def _acquire(self) -> bool:
+        """
+        True — это пробный вызов half_open.
+        """
+        with self._lock:
+            wait = self._retry_after_locked(time.monotonic())
+            if wait is not None:
+                self.rejected += 1
+                raise CircuitOpenError(f"{self.name} circuit is open", retry_after=wait)
+            if self._state == STATE_HALF_OPEN:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def _record(self, probe: bool, ok: bool) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if probe:
+                self._probe_in_flight = False
+                if ok:
+                    self._state = STATE_CLOSED
+                    self._calls.clear()
+                else:
+                    self._open(now)
+                return
+            if self._state != STATE_CLOSED:
+                return
+
+            self._calls.append((now, ok))
+            self._trim(now)
+            failures = sum(1 for _, success in self._calls if not success)
+            if len(self._calls) >= self.min_calls and failures / len(self._calls) >= self.failure_rate:
+                self._open(now)
+
+    def _open(self, now: float) -> None:
+        self._state = STATE_OPEN
+        self._opened_at = now
+        self._calls.clear()
+        self.opened += 1
+
+    def _release(self, probe: bool) -> None:
+        if probe:
+            with self._lock:
+                self._probe_in_flight = False
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """
+        Вызов под предохранителем. Закрытие генератора (GeneratorExit), ignored и исключения,
+        для которых is_failure вернул False, — ни успех, ни ошибка.
+        """
+        probe = self._acquire()
+        try:
+            yield
+        except self.ignored:
+            self._release(probe)
+            raise
+        except Exception as e:
+            if self.is_failure is not None and not self.is_failure(e):
+                self._release(probe)
+            else:
+                self._record(probe, ok=False)
+            raise
+        except BaseException:
+            self._release(probe)
+            raise
+        else:
+            self._record(probe, ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            retry_after = self._retry_after_locked(now)
+            self._trim(now)
+            failures = sum(1 for _, ok in self._calls if not ok)
+            return {
+                "state": self._state,
+                "retry_after_sec": round(retry_after, 1) if retry_after is not None else None,
+                "window_calls": len(self._calls),
+                "window_failures": failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
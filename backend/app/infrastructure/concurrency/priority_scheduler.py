@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+from app.application.interfaces.llm import LLMUnavailableError
+
+
+class QueueDeadlineExceeded(LLMUnavailableError):
+    """
+    Запрос простоял в очереди дольше своего дедлайна и был снят без выполнения.
+    Для вызывающего это временная недоступность LLM: заглушку по такой ошибке не кэшируют.
+    """
+
+
+class PriorityScheduler:
+    """
+    Очередь на ограниченное число слотов с классами приоритета (in-process).
+
+    - слот получает самый приоритетный ожидающий, чей класс не упёрся в свой лимит;
+      внутри класса — FIFO
+    - class_limits ограничивают, сколько слотов одновременно может занять класс
+    - deadline_sec: если слот не достался за это время — QueueDeadlineExceeded
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        priorities: List[str],
+        class_limits: Optional[Mapping[str, int]] = None,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.priorities = list(priorities)
+        self._rank = {name: i for i, name in enumerate(self.priorities)}
+        self.class_limits = {name: max_concurrency for name in self.priorities}
+        self.class_limits.update({k: max(1, min(v, max_concurrency)) for k, v in (class_limits or {}).items()})
+
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._waiting: list[tuple[int, int, str]] = []
+        self._in_flight = {name: 0 for name in self.priorities}
+        self._waiting_count = {name: 0 for name in self.priorities}
+        self._granted = {name: 0 for name in self.priorities}
+        self._dropped = {name: 0 for name in self.priorities}
+        self._wait_ms_total = {name: 0.0 for name in self.priorities}
+
+    def _normalize(self, priority: Optional[str]) -> str:
+        # неизвестный/не указанный класс — самый низкий
+        return priority if priority in self._rank else self.priorities[-1]
+
+    def _next_eligible(self) -> Optional[int]:
+        """
+        seq первого в порядке приоритета ожидающего, которого можно запустить прямо сейчас.
+        """
+        if sum(self._in_flight.values()) >= self.max_concurrency:
+            return None
+        for _, seq, priority in sorted(self._waiting):
+            if self._in_flight[priority] < self.class_limits[priority]:
+                return seq
+        return None
+
+    @contextmanager
+    def slot(self, priority: Optional[str] = None, deadline_sec: Optional[float] = None) -> Iterator[float]:
+        """
+        Занимает слот на время блока, отдаёт время ожидания в очереди (мс).
+        """
+        priority = self._normalize(priority)
+        wait_ms = self._acquire(priority, deadline_sec)
+        try:
+            yield wait_ms
+        finally:
+            with self._cond:
+                self._in_flight[priority] -= 1
+                self._cond.notify_all()
+
+    def _acquire(self, priority: str, deadline_sec: Optional[float]) -> float:
+        started = time.monotonic()
+        deadline = started + deadline_sec if deadline_sec is not None else None
+
+        with self._cond:
+            seq = next(self._seq)
+            self._waiting.append((self._rank[priority], seq, priority))
+            self._waiting_count[priority] += 1
+            try:
+                while self._next_eligible() != seq:
+                    timeout = None if deadline is None else deadline - time.monotonic()
+                    if timeout is not None and timeout <= 0:
+                        self._dropped[priority] += 1
+                        raise QueueDeadlineExceeded(
+                            f"LLM queue deadline exceeded for '{priority}' after {deadline_sec:.1f}s"
+                        )
+                    self._cond.wait(timeout)
+
+                self._in_flight[priority] += 1
+                self._granted[priority] += 1
+            finally:
+                self._waiting = [item for item in self._waiting if item[1] != seq]
+                self._waiting_count[priority] -= 1
+                # следующий в очереди мог ждать, пока уйдём мы
+                self._cond.notify_all()
+
+            wait_ms = (time.monotonic() - started) * 1000
+            self._wait_ms_total[priority] += wait_ms
+            return wait_ms
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "classes": {
+                    name: {
+                        "limit": self.class_limits[name],
+                        "in_flight": self._in_flight[name],
+                        "waiting": self._waiting_count[name],
+                        "granted": self._granted[name],
+                        "dropped": self._dropped[name],
+                        "avg_wait_ms": (
+                            round(self._wait_ms_total[name] / self._granted[name], 2) if self._granted[name] else 0.0
+                        ),
+                    }
+                    for name in self.priorities
+                },
+            }
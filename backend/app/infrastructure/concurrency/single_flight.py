@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Generic, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Склеивает одновременные вызовы с одинаковым ключом внутри процесса:
+    первый вызов (leader) выполняет fn, остальные ждут его результат (или исключение).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self.leaders = 0
+        self.shared = 0
+
+    def do(self, key: str, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """
+        Возвращает (результат, shared). shared=True — результат получен от чужого вызова.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.shared += 1
+                leader = False
+            else:
+                future = Future()
+                self._inflight[key] = future
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"leaders": self.leaders, "shared": self.shared, "inflight": len(self._inflight)}
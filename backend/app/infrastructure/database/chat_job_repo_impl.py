@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import and_, exists, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased, sessionmaker
+
+from app.core.settings import settings
+from app.domain.entities.chat_message import ChatMessage
+from app.infrastructure.database.base import SessionLocal
+from app.infrastructure.database.models import ChatJobModel, ChatMessageModel
+from app.infrastructure.metrics import metrics
+
+STATUS_QUEUED = "queued"
+STATUS_PROCESSING = "processing"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+# Пространство ключей pg_try_advisory_xact_lock(ns, chat_id) для claim ("CHAT")
+_CHAT_LOCK_NS = 0x43484154
+
+
+@dataclass
+class ChatJob:
+    id: int
+    user_id: int
+    chat_id: int
+    status: str
+    answer: Optional[str] = None
+    error: Optional[str] = None
+    # вопрос пользователя; заполняется только в claim
+    question: Optional[ChatMessage] = None
+
+
+class ChatJobRepoSQL:
+    def __init__(self, session_factory: sessionmaker = SessionLocal):
+        self._session_factory = session_factory
+
+    @staticmethod
+    def _to_job(row: ChatJobModel, question: Optional[ChatMessage] = None) -> ChatJob:
+        return ChatJob(
+            id=row.id,
+            user_id=row.user_id,
+            chat_id=row.chat_id,
+            status=row.status,
+            answer=row.answer,
+            error=row.error,
+            question=question,
+        )
+
+    def create(self, user_id: int, chat_id: int, message_id: int) -> ChatJob:
+        with self._session_factory() as session:
+            row = ChatJobModel(user_id=user_id, chat_id=chat_id, message_id=message_id, status=STATUS_QUEUED)
+            session.add(row)
+            session.commit()
+            session.refresh(row)
+            return self._to_job(row)
+
+    def get(self, user_id: int, job_id: int) -> Optional[ChatJob]:
+        with self._session_factory() as session:
+            row = (
+                session.query(ChatJobModel)
+                .filter(ChatJobModel.id == job_id, ChatJobModel.user_id == user_id)
+                .one_or_none()
+            )
+            return self._to_job(row) if row else None
+
+    def claim(self, limit: int = 1) -> List[ChatJob]:
+        """
+        Забирает до limit самых старых queued-задач (SKIP LOCKED — воркеры не делят одну задачу),
+        не больше одной на чат: ответы в одном чате пишутся по очереди.
+        Пока claim не закоммичен, соседний воркер ещё не видит processing-задачу чата, поэтому чат
+        дополнительно берётся под advisory-лок транзакции; окончательно "одна processing на чат"
+        держит частичный уникальный индекс chat_jobs_one_processing_per_chat.
+        Зависшие processing (воркер упал) возвращаются в очередь, пока не кончатся попытки.
+        """
+        if limit <= 0:
+            return []
+        stuck_before = datetime.now(timezone.utc) - timedelta(seconds=settings.CHAT_JOB_STUCK_SEC)
+        with self._session_factory() as session:
+            stuck = session.query(ChatJobModel).filter(
+                ChatJobModel.status == STATUS_PROCESSING,
+                ChatJobModel.updated_at < stuck_before,
+            )
+            stuck.filter(ChatJobModel.attempts >= settings.CHAT_JOB_MAX_ATTEMPTS).update(
+                {"status": STATUS_FAILED, "error": "TIMEOUT"}, synchronize_session=False
+            )
+            stuck.update({"status": STATUS_QUEUED}, synchronize_session=False)
+            session.commit()
+
+            busy = aliased(ChatJobModel)
+            rows = (
+                session.query(ChatJobModel, ChatMessageModel)
+                .join(ChatMessageModel, ChatMessageModel.id == ChatJobModel.message_id)
+                .filter(
+                    ChatJobModel.status == STATUS_QUEUED,
+                    ~exists().where(and_(busy.chat_id == ChatJobModel.chat_id, busy.status == STATUS_PROCESSING)),
+                    func.pg_try_advisory_xact_lock(_CHAT_LOCK_NS, ChatJobModel.chat_id),
+                )
+                .order_by(ChatJobModel.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True, of=ChatJobModel)
+                .all()
+            )
+            jobs = []
+            for job, msg in rows:
+                if any(j.chat_id == job.chat_id for j in jobs):
+                    continue
+                job.status = STATUS_PROCESSING
+                job.attempts = (job.attempts or 0) + 1
+                job.updated_at = func.now()
+                question = ChatMessage(
+                    id=msg.id,
+                    user_id=msg.user_id,
+                    chat_id=msg.chat_id,
+                    role=msg.role,
+                    content=msg.content,
+                    timestamp=msg.timestamp,
+                    token_count=msg.token_count,
+                )
+                jobs.append(self._to_job(job, question))
+            try:
+                session.commit()
+            except IntegrityError:
+                # соседний воркер закоммитил processing по этому чату раньше нас
+                session.rollback()
+                metrics.incr("chat.jobs.claim_conflict")
+                return []
+        return jobs
+
+    def finish(self, job_id: int, answer: Optional[str] = None, error: Optional[str] = None) -> None:
+        with self._session_factory() as session:
+            session.query(ChatJobModel).filter(ChatJobModel.id == job_id).update(
+                {
+                    "status": STATUS_FAILED if error else STATUS_DONE,
+                    "answer": answer,
+                    "error": error,
+                    "updated_at": func.now(),
+                },
+                synchronize_session=False,
+            )
+            session.commit()
+
+    def release(self, job_id: int) -> None:
+        """
+        Вернуть задачу в очередь без траты попытки (LLM временно недоступен).
+        """
+        with self._session_factory() as session:
+            session.query(ChatJobModel).filter(ChatJobModel.id == job_id).update(
+                {
+                    "status": STATUS_QUEUED,
+                    "attempts": ChatJobModel.attempts - 1,
+                    "updated_at": func.now(),
+                },
+                synchronize_session=False,
+            )
+            session.commit()
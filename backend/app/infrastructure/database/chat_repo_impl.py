@@ -1,6 +1,9 @@
+import json
+from dataclasses import dataclass
 from datetime import datetime
 from typing import List, Optional
 
+from sqlalchemy import func
 from sqlalchemy.orm import sessionmaker
 
 from app.domain.entities.chat_message import ChatMessage
@@ -8,6 +11,19 @@ from app.infrastructure.database.base import SessionLocal
 from app.infrastructure.database.models import ChatMessageModel, ChatSessionModel
 
 
+@dataclass
+class LLMContextState:
+    context: List[int]
+    model: str
+    upto_message_id: int
+
+
+@dataclass
+class ChatSummary:
+    text: str
+    upto_message_id: int
+
+
 class ChatRepositorySQL:
     def __init__(self, session_factory: sessionmaker = SessionLocal):
         self._session_factory = session_factory
@@ -31,6 +47,18 @@ class ChatRepositorySQL:
         session.flush()  # получить chat.id без commit
         return chat.id
 
+    @staticmethod
+    def _to_entity(row: ChatMessageModel) -> ChatMessage:
+        return ChatMessage(
+            id=row.id,
+            user_id=row.user_id,
+            chat_id=row.chat_id,
+            role=row.role,
+            content=row.content,
+            timestamp=row.timestamp,
+            token_count=row.token_count,
+        )
+
     def add_message(self, message: ChatMessage, chat_id: Optional[int] = None) -> ChatMessage:
         with self._session_factory() as session:
             # если chat_id не передали — пишем в default чат пользователя
@@ -43,6 +71,7 @@ class ChatRepositorySQL:
                 chat_id=effective_chat_id,
                 role=message.role,
                 content=message.content,
+                token_count=message.token_count,
                 timestamp=message.timestamp or datetime.utcnow(),
             )
             session.add(db_msg)
@@ -81,14 +110,118 @@ class ChatRepositorySQL:
 
             rows = list(reversed(rows))
 
-            return [
-                ChatMessage(
-                    id=row.id,
-                    user_id=row.user_id,
-                    chat_id=row.chat_id,
-                    role=row.role,
-                    content=row.content,
-                    timestamp=row.timestamp,
+            return [self._to_entity(row) for row in rows]
+
+    def get_recent_within_budget(
+        self,
+        user_id: int,
+        chat_id: int,
+        budget_tokens: int,
+        after_id: Optional[int] = None,
+        max_rows: int = 50,
+    ) -> List[ChatMessage]:
+        """
+        Последние сообщения чата, которые вместе укладываются в budget_tokens (в хронологическом порядке).
+        Нарастающая сумма token_count считается оконной функцией: лишние строки отсекает Postgres.
+        У старых строк без token_count берём длину/2 — с запасом для кириллицы.
+        """
+        tokens = func.coalesce(ChatMessageModel.token_count, func.char_length(ChatMessageModel.content) // 2 + 1)
+        with self._session_factory() as session:
+            q = session.query(
+                ChatMessageModel.id.label("id"),
+                func.sum(tokens).over(order_by=ChatMessageModel.id.desc()).label("running"),
+            ).filter(ChatMessageModel.user_id == user_id, ChatMessageModel.chat_id == chat_id)
+            if after_id is not None:
+                q = q.filter(ChatMessageModel.id > after_id)
+            recent = q.order_by(ChatMessageModel.id.desc()).limit(max_rows).subquery()
+
+            rows = (
+                session.query(ChatMessageModel)
+                .join(recent, recent.c.id == ChatMessageModel.id)
+                .filter(recent.c.running <= budget_tokens)
+                .order_by(ChatMessageModel.id.asc())
+                .all()
+            )
+            return [self._to_entity(row) for row in rows]
+
+    def get_llm_context(self, chat_id: int) -> Optional[LLMContextState]:
+        with self._session_factory() as session:
+            row = (
+                session.query(
+                    ChatSessionModel.llm_context,
+                    ChatSessionModel.llm_context_model,
+                    ChatSessionModel.llm_context_message_id,
                 )
-                for row in rows
-            ]
+                .filter(ChatSessionModel.id == chat_id)
+                .first()
+            )
+            if not row or not row.llm_context or row.llm_context_message_id is None:
+                return None
+            return LLMContextState(
+                context=json.loads(row.llm_context),
+                model=row.llm_context_model or "",
+                upto_message_id=row.llm_context_message_id,
+            )
+
+    def save_llm_context(
+        self,
+        chat_id: int,
+        context: Optional[List[int]],
+        model: Optional[str],
+        upto_message_id: Optional[int],
+    ) -> None:
+        """
+        context=None сбрасывает сохранённое состояние.
+        """
+        with self._session_factory() as session:
+            session.query(ChatSessionModel).filter(ChatSessionModel.id == chat_id).update(
+                {
+                    ChatSessionModel.llm_context: json.dumps(context) if context else None,
+                    ChatSessionModel.llm_context_model: model if context else None,
+                    ChatSessionModel.llm_context_message_id: upto_message_id if context else None,
+                },
+                synchronize_session=False,
+            )
+            session.commit()
+
+    def get_summary(self, chat_id: int) -> Optional[ChatSummary]:
+        with self._session_factory() as session:
+            row = (
+                session.query(ChatSessionModel.summary, ChatSessionModel.summary_upto_message_id)
+                .filter(ChatSessionModel.id == chat_id)
+                .first()
+            )
+            if not row or not row.summary or row.summary_upto_message_id is None:
+                return None
+            return ChatSummary(text=row.summary, upto_message_id=row.summary_upto_message_id)
+
+    def save_summary(self, chat_id: int, text: str, upto_message_id: int, expected_upto: Optional[int]) -> bool:
+        """
+        Обновляет, только если summary_upto_message_id всё ещё expected_upto (иначе чат уже свернул другой воркер).
+        """
+        with self._session_factory() as session:
+            q = session.query(ChatSessionModel).filter(ChatSessionModel.id == chat_id)
+            if expected_upto is None:
+                q = q.filter(ChatSessionModel.summary_upto_message_id.is_(None))
+            else:
+                q = q.filter(ChatSessionModel.summary_upto_message_id == expected_upto)
+            updated = q.update(
+                {ChatSessionModel.summary: text, ChatSessionModel.summary_upto_message_id: upto_message_id},
+                synchronize_session=False,
+            )
+            session.commit()
+            return bool(updated)
+
+    def get_messages_after(self, user_id: int, chat_id: int, after_id: Optional[int], limit: int) -> List[ChatMessage]:
+        """
+        Первые limit сообщений чата с id > after_id (в хронологическом порядке).
+        """
+        with self._session_factory() as session:
+            q = session.query(ChatMessageModel).filter(
+                ChatMessageModel.user_id == user_id,
+                ChatMessageModel.chat_id == chat_id,
+            )
+            if after_id is not None:
+                q = q.filter(ChatMessageModel.id > after_id)
+            rows = q.order_by(ChatMessageModel.id.asc()).limit(limit).all()
+            return [self._to_entity(row) for row in rows]
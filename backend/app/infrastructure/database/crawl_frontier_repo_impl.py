@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.settings import settings
+from app.infrastructure.database.base import SessionLocal
+from app.infrastructure.database.models import CrawlFrontierModel
+from app.infrastructure.metrics import metrics
+
+STATUS_PENDING = "pending"
+STATUS_PROCESSING = "processing"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_EXPIRED = "expired"
+
+
+@dataclass
+class FrontierItem:
+    url: str
+    source_url: str
+    market: str
+    category: str
+    title: Optional[str] = None
+    attempts: int = 0
+
+
+class _SeenSet:
+    """
+    In-process множество уже известных фронтиру URL (sha1-дайджесты, 20 байт на URL).
+    Отсекает повторы до похода в Postgres; при переполнении просто сбрасывается.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._digests: set[bytes] = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _digest(url: str) -> bytes:
+        return hashlib.sha1(url.encode("utf-8")).digest()
+
+    def split(self, urls: List[str]) -> List[str]:
+        with self._lock:
+            unknown = [u for u in urls if self._digest(u) not in self._digests]
+            self.hits += len(urls) - len(unknown)
+            self.misses += len(unknown)
+            return unknown
+
+    def add(self, urls: List[str]) -> None:
+        with self._lock:
+            if len(self._digests) + len(urls) > self.maxsize:
+                self._digests.clear()
+            self._digests.update(self._digest(u) for u in urls)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._digests.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._digests), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+_SEEN = _SeenSet(settings.CRAWLER_SEEN_CACHE_SIZE)
+metrics.register_collector("crawl_frontier.seen", _SEEN.stats)
+
+
+class CrawlFrontierRepoSQL:
+    def __init__(self, session_factory: sessionmaker = SessionLocal):
+        self._session_factory = session_factory
+
+    def filter_unseen(self, urls: List[str]) -> List[str]:
+        """
+        Оставляет только URL, которых фронтир ещё не видел (порядок сохраняется).
+        """
+        urls = list(dict.fromkeys(urls))
+        unknown = _SEEN.split(urls)
+        if not unknown:
+            return []
+
+        with self._session_factory() as session:
+            known = {
+                url
+                for (url,) in session.query(CrawlFrontierModel.url).filter(CrawlFrontierModel.url.in_(unknown)).all()
+            }
+        _SEEN.add(list(known))
+        return [u for u in unknown if u not in known]
+
+    def enqueue(self, items: List[FrontierItem]) -> int:
+        if not items:
+            return 0
+        with self._session_factory() as session:
+            stmt = (
+                insert(CrawlFrontierModel)
+                .values(
+                    [
+                        {
+                            "url": i.url,
+                            "source_url": i.source_url,
+                            "market": i.market,
+                            "category": i.category,
+                            "title": (i.title or "")[:512] or None,
+                        }
+                        for i in items
+                    ]
+                )
+                .on_conflict_do_nothing(index_elements=["url"])
+                .returning(CrawlFrontierModel.id)
+            )
+            inserted = len(session.execute(stmt).all())
+            session.commit()
+        _SEEN.add([i.url for i in items])
+        return inserted
+
+    def claim_pending(self, limit: int) -> List[FrontierItem]:
+        """
+        Забирает до limit самых свежих pending-ссылок (SKIP LOCKED — воркеры не делят одну статью).
+        Зависшие processing возвращаются в очередь, слишком старые pending — в expired.
+        """
+        if limit <= 0:
+            return []
+        now = datetime.now(timezone.utc)
+        with self._session_factory() as session:
+            session.query(CrawlFrontierModel).filter(
+                CrawlFrontierModel.status == STATUS_PROCESSING,
+                CrawlFrontierModel.updated_at < now - timedelta(minutes=30),
+            ).update({"status": STATUS_PENDING}, synchronize_session=False)
+            session.query(CrawlFrontierModel).filter(
+                CrawlFrontierModel.status == STATUS_PENDING,
+                CrawlFrontierModel.discovered_at < now - timedelta(hours=settings.CRAWLER_PENDING_TTL_HOURS),
+            ).update({"status": STATUS_EXPIRED}, synchronize_session=False)
+
+            rows = (
+                session.query(CrawlFrontierModel)
+                .filter(CrawlFrontierModel.status == STATUS_PENDING)
+                .order_by(CrawlFrontierModel.id.desc())
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            for row in rows:
+                row.status = STATUS_PROCESSING
+                row.attempts = (row.attempts or 0) + 1
+                row.updated_at = func.now()
+            items = [
+                FrontierItem(
+                    url=row.url,
+                    source_url=row.source_url,
+                    market=row.market,
+                    category=row.category,
+                    title=row.title,
+                    attempts=row.attempts,
+                )
+                for row in rows
+            ]
+            session.commit()
+        return items
+
+    def mark(self, url: str, status: str) -> None:
+        with self._session_factory() as session:
+            session.query(CrawlFrontierModel).filter(CrawlFrontierModel.url == url).update(
+                {"status": status, "updated_at": func.now()}, synchronize_session=False
+            )
+            session.commit()
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Optional
+
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class PgLeaderLock:
+    """
+    Лидерство среди процессов через сессионный pg_try_advisory_lock.
+    Лок живёт на отдельном соединении вне пула: пока соединение открыто, лидер один;
+    умер процесс или оборвалось соединение — Postgres снимает лок сам, его берёт следующий.
+    """
+
+    def __init__(self, engine: Engine, key: int) -> None:
+        self.engine = engine
+        self.key = key
+        self._raw: Optional[Any] = None
+
+    def acquire(self) -> bool:
+        if self._raw is not None:
+            return self.is_held()
+        try:
+            raw = self.engine.raw_connection()
+        except Exception as e:
+            logger.warning("[Leader] нет соединения для лока %s: %s", self.key, e)
+            return False
+        raw.detach()
+        try:
+            conn = raw.driver_connection
+            conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_try_advisory_lock(%s)", (self.key,))
+                acquired = bool(cur.fetchone()[0])
+        except Exception as e:
+            logger.warning("[Leader] pg_try_advisory_lock(%s) не выполнен: %s", self.key, e)
+            acquired = False
+        if acquired:
+            self._raw = raw
+        else:
+            raw.close()
+        return acquired
+
+    def is_held(self) -> bool:
+        """Жив ли лок: проверяем соединение, на котором он взят."""
+        if self._raw is None:
+            return False
+        try:
+            with self._raw.driver_connection.cursor() as cur:
+                cur.execute("SELECT 1")
+            return True
+        except Exception as e:
+            logger.warning("[Leader] соединение с локом %s потеряно: %s", self.key, e)
+            self._close()
+            return False
+
+    def release(self) -> None:
+        if self._raw is None:
+            return
+        try:
+            with self._raw.driver_connection.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (self.key,))
+        except Exception as e:
+            logger.warning("[Leader] pg_advisory_unlock(%s) не выполнен: %s", self.key, e)
+        self._close()
+
+    def _close(self) -> None:
+        raw, self._raw = self._raw, None
+        try:
+            raw.close()
+        except Exception:
+            pass
@@ -11,7 +11,8 @@ from sqlalchemy import (
     Text,
     UniqueConstraint,
     func,
-    Index
+    Index,
+    text,
 )
 
 from app.core.constants import MARKET_RU
@@ -38,6 +39,9 @@ class UserModel(Base):
     refresh_token = Column(String, nullable=True)
     refresh_token_expires_at = Column(DateTime, nullable=True)
 
+    # Растёт при каждой смене ролей: access-токены со старым rv перепроверяются по БД
+    role_version = Column(Integer, nullable=False, server_default="0")
+
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
 
 
@@ -51,6 +55,8 @@ class ChatMessageModel(Base):
 
     role = Column(String(20), nullable=False)
     content = Column(Text, nullable=False)
+    # Токены сообщения в промпте (оценка при записи или счётчик модели); NULL у старых строк
+    token_count = Column(Integer, nullable=True)
     timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     __table_args__ = (CheckConstraint("role IN ('user', 'FinPulse')", name="chat_messages_role_check"),)
@@ -66,9 +72,51 @@ class ChatSessionModel(Base):
     topic = Column(String(120), nullable=True)
     is_default = Column(Boolean, nullable=False, server_default="false")
 
+    # Контекст Ollama после последнего ответа (JSON-массив токенов): следующий ход отправляется
+    # без истории, если модель та же и после llm_context_message_id сообщений не добавлялось
+    llm_context = Column(Text, nullable=True)
+    llm_context_model = Column(String(120), nullable=True)
+    llm_context_message_id = Column(Integer, nullable=True)
+
+    # Свёрнутая в краткое содержание часть переписки: сообщения с id <= summary_upto_message_id
+    summary = Column(Text, nullable=True)
+    summary_upto_message_id = Column(Integer, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+
+
+class ChatJobModel(Base):
+    """
+    Очередь ответов чата: вопрос уже сохранён (message_id), воркер генерирует ответ.
+    status: queued -> processing -> done | failed.
+    """
+
+    __tablename__ = "chat_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    chat_id = Column(Integer, ForeignKey("chat_sessions.id", ondelete="CASCADE"), nullable=False, index=True)
+    message_id = Column(Integer, ForeignKey("chat_messages.id", ondelete="CASCADE"), nullable=False)
+
+    status = Column(String(16), nullable=False, server_default="queued", index=True)
+    attempts = Column(Integer, nullable=False, server_default="0")
+    answer = Column(Text, nullable=True)
+    error = Column(String(64), nullable=True)
+
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
 
+    __table_args__ = (
+        # по чату генерируется не больше одного ответа одновременно
+        Index(
+            "chat_jobs_one_processing_per_chat",
+            "chat_id",
+            unique=True,
+            postgresql_where=text("status = 'processing'"),
+        ),
+    )
+
 
 class NewsCacheModel(Base):
     __tablename__ = "news_cache"
@@ -90,6 +138,67 @@ class NewsCacheModel(Base):
     __table_args__ = (UniqueConstraint("cache_date", "category", "url", name="uq_news_cache_day_cat_url"),)
 
 
+class NewsSummaryModel(Base):
+    """
+    Контентно-адресуемое хранилище суммаризаций: ключ — хэш очищенного текста + версия промпта.
+    """
+
+    __tablename__ = "news_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    content_hash = Column(String(64), nullable=False, unique=True, index=True)
+    prompt_version = Column(String(32), nullable=False)
+    category = Column(String, nullable=False)
+
+    payload_json = Column(Text, nullable=False)
+    hits = Column(Integer, nullable=False, server_default="0")
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class ScrapeValidatorModel(Base):
+    """
+    HTTP-валидаторы и последний извлечённый текст по URL источника (для условных запросов скрапера).
+    """
+
+    __tablename__ = "scrape_validators"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    url = Column(Text, nullable=False, unique=True)
+    etag = Column(String(512), nullable=True)
+    last_modified = Column(String(128), nullable=True)
+    body_hash = Column(String(64), nullable=True)
+    text = Column(Text, nullable=True)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class CrawlFrontierModel(Base):
+    """
+    Фронтир краулера: ссылки на статьи, найденные на индексных страницах NEWS_SOURCES.
+    status: pending -> processing -> done | failed | expired.
+    """
+
+    __tablename__ = "crawl_frontier"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    url = Column(Text, nullable=False, unique=True)
+    source_url = Column(Text, nullable=False)
+    market = Column(String(64), nullable=False)
+    category = Column(String(64), nullable=False)
+    title = Column(String(512), nullable=True)
+
+    status = Column(String(16), nullable=False, server_default="pending", index=True)
+    attempts = Column(Integer, nullable=False, server_default="0")
+
+    discovered_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
 class RoleModel(Base):
     __tablename__ = "roles"
 
@@ -1,13 +1,25 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import date
-from typing import Optional
+import hashlib
+import json
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Iterator, Optional
 
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import sessionmaker
 
+from app.core.settings import settings
+from app.infrastructure.cache.ttl_cache import TTLCache
 from app.infrastructure.database.base import SessionLocal
 from app.infrastructure.database.models import NewsCacheModel
+from app.infrastructure.metrics import metrics
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -19,15 +31,123 @@ class CachedSummaryRow:
     source: str
     title: str
     payload_json: str
+    updated_at: Optional[datetime] = None
+    # декодированный payload_json; заполняется при попадании строки в L1-кэш, наружу отдавать только копию
+    payload: Optional[dict] = field(default=None, repr=False, compare=False)
+
+
+def _with_decoded_payload(row: CachedSummaryRow) -> CachedSummaryRow:
+    try:
+        decoded = json.loads(row.payload_json)
+        row.payload = decoded if isinstance(decoded, dict) else None
+    except Exception:
+        row.payload = None
+    return row
+
+
+# L1 перед news_cache: ключ как у уникального индекса (cache_date, category, url)
+_ROW_CACHE: TTLCache[CachedSummaryRow] = TTLCache(
+    maxsize=settings.NEWS_L1_CACHE_SIZE,
+    ttl_sec=settings.NEWS_L1_CACHE_TTL_SEC,
+)
+metrics.register_collector("l1.news_cache", _ROW_CACHE.stats)
+
+
+def _advisory_key(*parts: object) -> int:
+    digest = hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
 
 
 class NewsCacheRepoSQL:
     def __init__(self, session_factory: sessionmaker = SessionLocal):
         self._session_factory = session_factory
 
+    @contextmanager
+    def build_lock(self, cache_date: date, category: str, url: str, timeout_sec: float = 180) -> Iterator[bool]:
+        """
+        Межпроцессный лок на сборку одной записи кэша (сессионный pg_try_advisory_lock).
+        Соединение в AUTOCOMMIT: пока идёт сборка (скрапинг + LLM), транзакция не висит открытой;
+        лок снимается pg_advisory_unlock сразу после сборки, соединение возвращается в пул.
+        Отдаёт True, если лок взят; False — если не дождались за timeout_sec (сборка идёт без лока).
+        """
+        key = _advisory_key(cache_date.isoformat(), category, url)
+        with self._session_factory() as session:
+            conn = session.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+            acquired = False
+            try:
+                acquired = self._wait_advisory_lock(conn, key, timeout_sec)
+                if not acquired:
+                    logger.warning("Advisory lock не дождались за %ss для %s (%s)", timeout_sec, url, category)
+            except DBAPIError as e:
+                logger.warning("Advisory lock не получен для %s (%s): %s", url, category, e)
+            if not acquired:
+                metrics.incr("news_cache.build_lock.unlocked")
+
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    try:
+                        conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+                    except DBAPIError as e:
+                        # сессионный лок не должен вернуться в пул вместе с соединением
+                        logger.warning("Advisory lock не снят для %s (%s): %s", url, category, e)
+                        conn.invalidate()
+
+    @staticmethod
+    def _wait_advisory_lock(conn, key: int, timeout_sec: float) -> bool:
+        deadline = time.monotonic() + timeout_sec
+        delay = 0.05
+        while True:
+            if conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}).scalar():
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 1.0)
+
     def get(self, cache_date: date, category: str, url: str) -> Optional[CachedSummaryRow]:
+        key = (cache_date, category, url)
+        cached = _ROW_CACHE.get(key)
+        if cached is not None:
+            return cached
+
         with self._session_factory() as session:
             row = session.query(NewsCacheModel).filter_by(cache_date=cache_date, category=category, url=url).first()
+            if not row:
+                return None
+            result = _with_decoded_payload(
+                CachedSummaryRow(
+                    cache_date=row.cache_date,
+                    market=row.market,
+                    category=row.category,
+                    url=row.url,
+                    source=row.source,
+                    title=row.title,
+                    payload_json=row.payload_json,
+                    updated_at=row.updated_at,
+                )
+            )
+            _ROW_CACHE.set(key, result)
+            return result
+
+    def get_latest(self, category_prefix: str, url: str, since: date, before_slot: str) -> Optional[CachedSummaryRow]:
+        """
+        Самая свежая запись по url для слотов "<category_prefix>::slot=..." в диапазоне [since, before_slot).
+        """
+        with self._session_factory() as session:
+            row = (
+                session.query(NewsCacheModel)
+                .filter(
+                    NewsCacheModel.url == url,
+                    NewsCacheModel.cache_date >= since,
+                    NewsCacheModel.category.startswith(f"{category_prefix}::slot=", autoescape=True),
+                    NewsCacheModel.category < f"{category_prefix}::slot={before_slot}",
+                )
+                .order_by(NewsCacheModel.category.desc())
+                .first()
+            )
             if not row:
                 return None
             return CachedSummaryRow(
@@ -38,6 +158,7 @@ class NewsCacheRepoSQL:
                 source=row.source,
                 title=row.title,
                 payload_json=row.payload_json,
+                updated_at=row.updated_at,
             )
 
     def upsert(
@@ -73,12 +194,17 @@ class NewsCacheRepoSQL:
             session.commit()
             session.refresh(row)
 
-            return CachedSummaryRow(
-                cache_date=row.cache_date,
-                market=row.market,
-                category=row.category,
-                url=row.url,
-                source=row.source,
-                title=row.title,
-                payload_json=row.payload_json,
+            result = _with_decoded_payload(
+                CachedSummaryRow(
+                    cache_date=row.cache_date,
+                    market=row.market,
+                    category=row.category,
+                    url=row.url,
+                    source=row.source,
+                    title=row.title,
+                    payload_json=row.payload_json,
+                    updated_at=row.updated_at,
+                )
             )
+            _ROW_CACHE.set((cache_date, category, url), result)
+            return result
@@ -7,6 +7,19 @@ from app.presentation.schemas.summary import NewsBlockOut, NewsIndicatorOut
 from app.infrastructure.database.models import News 
 from app.infrastructure.utils import slugify 
 from app.infrastructure.database.base import SessionLocal
+from app.core.settings import settings
+from app.infrastructure.cache.ttl_cache import TTLCache
+from app.infrastructure.metrics import metrics
+
+# L1 на воркер: строки news (списки/по id/по slug) и готовые NewsBlockOut.
+_ROWS_CACHE: TTLCache = TTLCache(maxsize=settings.NEWS_L1_CACHE_SIZE, ttl_sec=settings.NEWS_L1_CACHE_TTL_SEC)
+_BLOCKS_CACHE: TTLCache[NewsBlockOut] = TTLCache(
+    maxsize=settings.NEWS_L1_CACHE_SIZE,
+    ttl_sec=settings.NEWS_L1_CACHE_TTL_SEC,
+)
+metrics.register_collector("l1.news_rows", _ROWS_CACHE.stats)
+metrics.register_collector("l1.news_blocks", _BLOCKS_CACHE.stats)
+
 
 @dataclass
 class NewsRow:
@@ -26,25 +39,51 @@ class NewsRepositorySQL:
         self._session_factory = session_factory
 
     def list_public(self, limit: int = 50) -> List[News]:
+        key = ("list_public", limit)
+        cached = _ROWS_CACHE.get(key)
+        if cached is not None:
+            return list(cached)
+
         with self._session_factory() as session:
-            return (
+            rows = (
                 session.query(News)
                 .filter(News.is_public == True)
                 .order_by(News.id.desc())
                 .limit(limit)
                 .all()
             )
+        _ROWS_CACHE.set(key, rows)
+        return list(rows)
 
     def get_public_by_id(self, news_id: int) -> Optional[News]:
+        key = ("id", news_id)
+        cached = _ROWS_CACHE.get(key)
+        if cached is not None:
+            return cached
+
         with self._session_factory() as session:
-            return (
+            row = (
                 session.query(News)
                 .filter(News.id == news_id)
                 .filter(News.is_public == True)
                 .one_or_none()
             )
+        if row is not None:
+            _ROWS_CACHE.set(key, row)
+        return row
 
     def to_news_block_out(self, b: News) -> NewsBlockOut:
+        # блок из L1 общий для всех запросов воркера — наружу отдаём копию
+        key = (b.id, b.updated_at)
+        cached = _BLOCKS_CACHE.get(key)
+        if cached is not None:
+            return cached.model_copy(deep=True)
+
+        block = self._build_news_block_out(b)
+        _BLOCKS_CACHE.set(key, block)
+        return block.model_copy(deep=True)
+
+    def _build_news_block_out(self, b: News) -> NewsBlockOut:
         payload = self._safe_json_loads(b.payload_json)
         summary = str(payload.get("summary") or "").strip()
         bullets = payload.get("facts") or payload.get("bullets") or []
@@ -127,6 +166,8 @@ class NewsRepositorySQL:
             session.commit()
             session.refresh(row)
 
+        self._invalidate_l1(row_id=row.id, url=url)
+
         return NewsRow(
             id=row.id,
             title=row.title,
@@ -141,14 +182,30 @@ class NewsRepositorySQL:
         )
 
     def get_public_by_slug(self, slug: str) -> Optional[News]:
+        key = ("slug", slug)
+        cached = _ROWS_CACHE.get(key)
+        if cached is not None:
+            return cached
+
         with self._session_factory() as session:
-            return (
+            row = (
                 session.query(News)
                 .filter(News.slug == slug)
                 .filter(News.is_public == True)
                 .order_by(News.id.desc())
                 .first()
             )
+        if row is not None:
+            _ROWS_CACHE.set(key, row)
+        return row
+
+    @staticmethod
+    def _invalidate_l1(row_id: int, url: str) -> None:
+        # списки пересобираем целиком, точечные записи — по id/url изменённой строки
+        _ROWS_CACHE.invalidate_where(
+            lambda key, value: key[0] in ("list_public", "slug") or getattr(value, "id", None) == row_id
+        )
+        _BLOCKS_CACHE.invalidate_where(lambda key, value: key[0] == row_id or value.url == url)
 
     @staticmethod
     def _safe_json_loads(s: str) -> dict:
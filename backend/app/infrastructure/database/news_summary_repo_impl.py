@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.database.base import SessionLocal
+from app.infrastructure.database.models import NewsSummaryModel
+
+
+class NewsSummaryRepoSQL:
+    def __init__(self, session_factory: sessionmaker = SessionLocal):
+        self._session_factory = session_factory
+
+    def get(self, content_hash: str) -> Optional[str]:
+        """
+        Возвращает payload_json по хэшу контента и отмечает повторное использование.
+        """
+        with self._session_factory() as session:
+            row = session.query(NewsSummaryModel).filter_by(content_hash=content_hash).first()
+            if not row:
+                return None
+            row.hits = (row.hits or 0) + 1
+            row.last_used_at = func.now()
+            session.commit()
+            return row.payload_json
+
+    def put(self, content_hash: str, prompt_version: str, category: str, payload_json: str) -> None:
+        with self._session_factory() as session:
+            stmt = (
+                insert(NewsSummaryModel)
+                .values(
+                    content_hash=content_hash,
+                    prompt_version=prompt_version,
+                    category=category,
+                    payload_json=payload_json,
+                )
+                .on_conflict_do_nothing(index_elements=["content_hash"])
+            )
+            session.execute(stmt)
+            session.commit()
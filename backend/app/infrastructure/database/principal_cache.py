@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import logging
+import math
+import select
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.settings import settings
+from app.domain.entities.principal import Principal
+from app.infrastructure.cache.ttl_cache import TTLCache
+from app.infrastructure.database.base import engine
+from app.infrastructure.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Канал Postgres, в который пишутся id пользователей со сменившимися ролями ("*" — все сразу).
+# Payload: "<user_id>" или "<user_id>:<role_version>", если сменилась версия ролей.
+CHANNEL = "finpulse_rbac"
+ALL = "*"
+
+# Версия ролей удалённого пользователя: ни один его токен не пройдёт без БД
+ROLE_VERSION_DELETED = 2**31 - 1
+
+# L1 на воркер: user_id -> Principal. Смена ролей сбрасывает запись во всех воркерах через NOTIFY,
+# TTL лишь страхует от потерянного уведомления.
+_PRINCIPALS: TTLCache[Principal] = TTLCache(
+    maxsize=settings.AUTH_PRINCIPAL_CACHE_SIZE,
+    ttl_sec=settings.AUTH_PRINCIPAL_CACHE_TTL_SEC,
+)
+metrics.register_collector("l1.principals", _PRINCIPALS.stats)
+
+# Поколения инвалидаций: user_id -> счётчик и общий счётчик для сброса всего кэша.
+# Загрузка из БД запоминает поколение до запроса и не кладёт результат, если за это время был сброс.
+_GENERATIONS: Dict[int, int] = {}
+_GENERATION_ALL = 0
+_GENERATIONS_LOCK = threading.Lock()
+
+# user_id -> последняя известная воркеру role_version (только растёт; запись о пользователе — пара int)
+_ROLE_VERSIONS: Dict[int, int] = {}
+_ROLE_VERSIONS_LOCK = threading.Lock()
+
+
+# Токены, выпущенные раньше этого момента (unix time), не проверяются по claims: пока LISTEN не работал,
+# уведомления о смене ролей могли потеряться. inf — LISTEN сейчас не установлен.
+_CLAIMS_NOT_BEFORE = 0.0
+
+
+def claims_not_before() -> float:
+    return _CLAIMS_NOT_BEFORE
+
+
+def _set_claims_not_before(ts: float) -> None:
+    global _CLAIMS_NOT_BEFORE
+    _CLAIMS_NOT_BEFORE = ts
+
+
+def get_cached_principal(user_id: int) -> Optional[Principal]:
+    return _PRINCIPALS.get(user_id)
+
+
+def principal_generation(user_id: int) -> Tuple[int, int]:
+    """
+    Снимок поколения перед чтением из БД; передаётся в cache_principal.
+    """
+    with _GENERATIONS_LOCK:
+        return _GENERATION_ALL, _GENERATIONS.get(user_id, 0)
+
+
+def cache_principal(principal: Principal, generation: Optional[Tuple[int, int]] = None) -> None:
+    """
+    generation — снимок principal_generation до запроса: если пользователя с тех пор сбросили,
+    прочитанное могло устареть, и в кэш оно не попадает.
+    """
+    user_id = principal.user.id
+    note_role_version(user_id, principal.role_version)
+    with _GENERATIONS_LOCK:
+        if generation is not None and generation != (_GENERATION_ALL, _GENERATIONS.get(user_id, 0)):
+            metrics.incr("l1.principals.stale_load")
+            return
+        _PRINCIPALS.set(user_id, principal)
+
+
+def note_role_version(user_id: int, role_version: int) -> None:
+    with _ROLE_VERSIONS_LOCK:
+        if role_version > _ROLE_VERSIONS.get(user_id, -1):
+            _ROLE_VERSIONS[user_id] = role_version
+
+
+def known_role_version(user_id: int) -> Optional[int]:
+    """
+    None — воркер не видел изменений ролей пользователя с момента старта.
+    """
+    return _ROLE_VERSIONS.get(user_id)
+
+
+def invalidate_principal(user_id: Optional[int] = None) -> None:
+    """
+    Сброс в своём воркере; None — весь кэш.
+    """
+    global _GENERATION_ALL
+    with _GENERATIONS_LOCK:
+        if user_id is None:
+            _GENERATION_ALL += 1
+            _PRINCIPALS.clear()
+        else:
+            _GENERATIONS[user_id] = _GENERATIONS.get(user_id, 0) + 1
+            _PRINCIPALS.invalidate(user_id)
+
+
+def notify_principal_changed(
+    session: Session,
+    user_id: Optional[int] = None,
+    role_version: Optional[int] = None,
+) -> None:
+    """
+    NOTIFY в транзакции изменения: Postgres доставит его слушателям только после commit.
+    """
+    payload = ALL if user_id is None else str(user_id)
+    if user_id is not None and role_version is not None:
+        payload = f"{user_id}:{role_version}"
+    session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload})
+
+
+class PrincipalCacheListener:
+    """
+    Фоновый LISTEN на CHANNEL: сбрасывает кэш принципалов этого процесса.
+    После обрыва соединения кэш чистится целиком — уведомления за это время потеряны,
+    а claims токенов, выпущенных до нового LISTEN, больше не принимаются.
+    """
+
+    def __init__(self, engine: Engine, reconnect_sec: float = 5.0, poll_sec: float = 1.0) -> None:
+        self.engine = engine
+        self.reconnect_sec = reconnect_sec
+        self.poll_sec = poll_sec
+        self.received = 0
+        self.malformed = 0
+        self.reconnects = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if not settings.AUTH_RBAC_LISTEN_ENABLED or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        _set_claims_not_before(math.inf)
+        self._thread = threading.Thread(target=self._run, name="rbac-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+    def handle(self, payload: str) -> None:
+        self.received += 1
+        if payload == ALL:
+            invalidate_principal()
+            return
+        user_id, _, role_version = payload.partition(":")
+        try:
+            uid = int(user_id)
+            version = int(role_version) if role_version else None
+        except ValueError:
+            # чужой NOTIFY в канале не должен ронять LISTEN (после переподключения сбросился бы весь кэш)
+            self.malformed += 1
+            logger.warning("[RBAC] Непонятное уведомление %s: %r", CHANNEL, payload)
+            return
+        if version is not None:
+            note_role_version(uid, version)
+        invalidate_principal(uid)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"received": self.received, "malformed": self.malformed, "reconnects": self.reconnects}
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                self.reconnects += 1
+                logger.warning("[RBAC] LISTEN %s прерван: %s", CHANNEL, e)
+            _set_claims_not_before(math.inf)
+            invalidate_principal()
+            self._stop.wait(self.reconnect_sec)
+
+    def _listen(self) -> None:
+        # отдельное соединение вне пула: оно занято LISTEN всё время жизни процесса
+        raw = self.engine.raw_connection()
+        raw.detach()
+        conn = raw.driver_connection
+        try:
+            conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {CHANNEL}")
+            # дальше смены ролей приходят уведомлениями; более ранние токены проверяются по БД
+            _set_claims_not_before(time.time())
+            while not self._stop.is_set():
+                if select.select([conn], [], [], self.poll_sec) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    self.handle(conn.notifies.pop(0).payload)
+        finally:
+            raw.close()
+
+
+_LISTENER: Optional[PrincipalCacheListener] = None
+
+
+def get_principal_cache_listener() -> PrincipalCacheListener:
+    global _LISTENER
+    if _LISTENER is None:
+        _LISTENER = PrincipalCacheListener(engine)
+        metrics.register_collector("rbac_listener", _LISTENER.stats)
+    return _LISTENER
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.database.base import SessionLocal
+from app.infrastructure.database.models import ScrapeValidatorModel
+
+
+@dataclass
+class ScrapeValidatorRow:
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body_hash: Optional[str]
+    text: Optional[str]
+
+
+class ScrapeValidatorRepoSQL:
+    def __init__(self, session_factory: sessionmaker = SessionLocal):
+        self._session_factory = session_factory
+
+    def get(self, url: str) -> Optional[ScrapeValidatorRow]:
+        with self._session_factory() as session:
+            row = session.query(ScrapeValidatorModel).filter_by(url=url).first()
+            if not row:
+                return None
+            return ScrapeValidatorRow(
+                url=row.url,
+                etag=row.etag,
+                last_modified=row.last_modified,
+                body_hash=row.body_hash,
+                text=row.text,
+            )
+
+    def upsert(
+        self,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        body_hash: Optional[str],
+        text: Optional[str],
+    ) -> None:
+        with self._session_factory() as session:
+            row = session.query(ScrapeValidatorModel).filter_by(url=url).first()
+            if row is None:
+                row = ScrapeValidatorModel(url=url)
+                session.add(row)
+
+            row.etag = etag
+            row.last_modified = last_modified
+            row.body_hash = body_hash
+            row.text = text
+            session.commit()
@@ -2,6 +2,7 @@ from sqlalchemy import text
 
 from app.infrastructure.database.base import SessionLocal, engine
 from app.infrastructure.database.models import PermissionModel, RoleModel, RolePermissionModel, UserModel, UserRoleModel
+from app.infrastructure.database.principal_cache import notify_principal_changed
 
 PERMISSIONS = [
     "news:list",
@@ -13,6 +14,7 @@ PERMISSIONS = [
     "profile:update_own",
     "admin_users:assign_role",
     "admin_users:list",
+    "metrics:read",
 ]
 
 ROLE_PERMS = {
@@ -43,6 +45,7 @@ ROLE_PERMS = {
         "profile:update_own",
         "admin_users:assign_role",
         "admin_users:list",
+        "metrics:read",
     ],
 }
 
@@ -59,8 +62,65 @@ def ensure_user_subscription_column():
         )
 
 
+def ensure_chat_session_columns():
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+            ALTER TABLE chat_sessions
+            ADD COLUMN IF NOT EXISTS llm_context TEXT,
+            ADD COLUMN IF NOT EXISTS llm_context_model VARCHAR(120),
+            ADD COLUMN IF NOT EXISTS llm_context_message_id INTEGER,
+            ADD COLUMN IF NOT EXISTS summary TEXT,
+            ADD COLUMN IF NOT EXISTS summary_upto_message_id INTEGER
+        """
+            )
+        )
+
+
+def ensure_chat_message_token_count_column():
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+            ALTER TABLE chat_messages
+            ADD COLUMN IF NOT EXISTS token_count INTEGER
+        """
+            )
+        )
+
+
+def ensure_user_role_version_column():
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+            ALTER TABLE users
+            ADD COLUMN IF NOT EXISTS role_version INTEGER NOT NULL DEFAULT 0
+        """
+            )
+        )
+
+
+def ensure_chat_job_indexes():
+    # chat_jobs могла появиться раньше индекса: create_all не добавляет индексы в существующие таблицы
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+            CREATE UNIQUE INDEX IF NOT EXISTS chat_jobs_one_processing_per_chat
+            ON chat_jobs (chat_id) WHERE status = 'processing'
+        """
+            )
+        )
+
+
 def seed_rbac(admin_email: str | None = None):
     ensure_user_subscription_column()
+    ensure_user_role_version_column()
+    ensure_chat_session_columns()
+    ensure_chat_message_token_count_column()
+    ensure_chat_job_indexes()
 
     with SessionLocal() as session:
         roles_by_name = {r.name: r for r in session.query(RoleModel).all()}
@@ -105,7 +165,12 @@ def seed_rbac(admin_email: str | None = None):
             admin_user = session.query(UserModel).filter(UserModel.email == admin_email).first()
             if admin_user:
                 admin_role = roles_by_name["admin"]
-                session.query(UserRoleModel).filter(UserRoleModel.user_id == admin_user.id).delete()
-                session.add(UserRoleModel(user_id=admin_user.id, role_id=admin_role.id))
+                current = {r.role_id for r in session.query(UserRoleModel).filter_by(user_id=admin_user.id).all()}
+                if current != {admin_role.id}:
+                    session.query(UserRoleModel).filter(UserRoleModel.user_id == admin_user.id).delete()
+                    session.add(UserRoleModel(user_id=admin_user.id, role_id=admin_role.id))
+                    admin_user.role_version = UserModel.role_version + 1
 
+        # права ролей могли поменяться у всех: кэши принципалов других воркеров сбрасываются целиком
+        notify_principal_changed(session)
         session.commit()
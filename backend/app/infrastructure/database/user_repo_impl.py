@@ -1,13 +1,23 @@
 from datetime import datetime
 from typing import Any, Optional
 
-from sqlalchemy import distinct, func, or_
+from sqlalchemy import distinct, func, or_, update
 from sqlalchemy.orm import sessionmaker
 
 from app.application.interfaces.user import IUserRepository
+from app.domain.entities.principal import Principal
 from app.domain.entities.user import User
 from app.infrastructure.database.base import SessionLocal
 from app.infrastructure.database.models import PermissionModel, RoleModel, RolePermissionModel, UserModel, UserRoleModel
+from app.infrastructure.database.principal_cache import (
+    ROLE_VERSION_DELETED,
+    cache_principal,
+    get_cached_principal,
+    invalidate_principal,
+    note_role_version,
+    notify_principal_changed,
+    principal_generation,
+)
 
 
 class UserRepositorySQL(IUserRepository):
@@ -62,8 +72,11 @@ class UserRepositorySQL(IUserRepository):
                 return False
 
             session.delete(db_user)
+            notify_principal_changed(session, id, role_version=ROLE_VERSION_DELETED)
             session.commit()
-            return True
+        note_role_version(id, ROLE_VERSION_DELETED)
+        invalidate_principal(id)
+        return True
 
     def update(self, user: User) -> User:
         with self._session_factory() as session:
@@ -82,9 +95,11 @@ class UserRepositorySQL(IUserRepository):
             db_user.tickers = user.tickers
             db_user.sectors = user.sectors
 
+            notify_principal_changed(session, user.id)
             session.commit()
             session.refresh(db_user)
-            return user
+        invalidate_principal(user.id)
+        return user
 
     def update_refresh_token(
         self,
@@ -140,6 +155,45 @@ class UserRepositorySQL(IUserRepository):
             )
             return {r[0] for r in rows}
 
+    def get_principal(self, user_id: int) -> Optional[Principal]:
+        """
+        Пользователь, его роли и права за один запрос (вместо get_by_id + get_roles + get_permissions).
+        Результат кэшируется на воркер до смены ролей/профиля.
+        """
+        cached = get_cached_principal(user_id)
+        if cached is not None:
+            return cached
+        # смена ролей, пришедшая во время запроса, не должна быть перезаписана старым результатом
+        generation = principal_generation(user_id)
+
+        with self._session_factory() as session:
+            row = (
+                session.query(
+                    UserModel,
+                    func.array_remove(func.array_agg(func.distinct(RoleModel.name)), None).label("roles"),
+                    func.array_remove(func.array_agg(func.distinct(PermissionModel.key)), None).label("permissions"),
+                )
+                .outerjoin(UserRoleModel, UserRoleModel.user_id == UserModel.id)
+                .outerjoin(RoleModel, RoleModel.id == UserRoleModel.role_id)
+                .outerjoin(RolePermissionModel, RolePermissionModel.role_id == UserRoleModel.role_id)
+                .outerjoin(PermissionModel, PermissionModel.id == RolePermissionModel.permission_id)
+                .filter(UserModel.id == user_id)
+                .group_by(UserModel.id)
+                .first()
+            )
+            if row is None:
+                return None
+
+            db_user, roles, permissions = row
+            principal = Principal(
+                user=self._to_domain(db_user),
+                roles=frozenset(roles or ()),
+                permissions=frozenset(permissions or ()),
+                role_version=db_user.role_version or 0,
+            )
+        cache_principal(principal, generation)
+        return principal
+
     def set_roles(self, user_id: int, role_names: list[str]) -> set[str]:
         role_names = list(dict.fromkeys(role_names))
         with self._session_factory() as session:
@@ -156,8 +210,17 @@ class UserRepositorySQL(IUserRepository):
             for r in roles:
                 session.add(UserRoleModel(user_id=user_id, role_id=r.id))
 
+            role_version = session.execute(
+                update(UserModel)
+                .where(UserModel.id == user_id)
+                .values(role_version=UserModel.role_version + 1)
+                .returning(UserModel.role_version)
+            ).scalar_one()
+            notify_principal_changed(session, user_id, role_version=role_version)
             session.commit()
-            return {r.name for r in roles}
+        note_role_version(user_id, role_version)
+        invalidate_principal(user_id)
+        return {r.name for r in roles}
 
     def list_admin_users(
         self,
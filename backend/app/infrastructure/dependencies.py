@@ -1,13 +1,20 @@
+from functools import lru_cache
+
 from fastapi import Depends
 
 from app.application.interfaces.user import IUserRepository
+from app.application.use_cases.chat.chat_jobs import ChatJobs
 from app.application.use_cases.chat.chat_with_llm import ChatWithLLM
+from app.application.use_cases.chat.compact_chat import CompactChatHistory
 from app.application.use_cases.summarize_article import GetNewsFeed
 from app.infrastructure.database.base import SessionLocal
+from app.infrastructure.database.chat_job_repo_impl import ChatJobRepoSQL
 from app.infrastructure.database.chat_repo_impl import ChatRepositorySQL
 from app.infrastructure.database.chat_session_repo_impl import ChatSessionRepositorySQL
 from app.infrastructure.database.file_repo_impl import FileRepositorySQL
 from app.infrastructure.database.news_cache_repo_impl import NewsCacheRepoSQL
+from app.infrastructure.database.news_summary_repo_impl import NewsSummaryRepoSQL
+from app.infrastructure.database.scrape_validator_repo_impl import ScrapeValidatorRepoSQL
 from app.infrastructure.database.user_repo_impl import UserRepositorySQL
 from app.infrastructure.llm.ollama_llm_service import OllamaLLMService
 from app.infrastructure.llm.scraper_service import ScraperService
@@ -24,14 +31,21 @@ def get_user_repo() -> IUserRepository:
     return UserRepositorySQL(SessionLocal)
 
 
+# Сервисы с HTTP-клиентами живут всё время приложения: пулы соединений и rate-limit MOEX общие.
+@lru_cache(maxsize=None)
 def get_scraper() -> ScraperService:
-    return ScraperService()
+    return ScraperService(validator_repo=ScrapeValidatorRepoSQL())
 
 
 def get_news_cache_repo() -> NewsCacheRepoSQL:
     return NewsCacheRepoSQL()
 
 
+def get_news_summary_repo() -> NewsSummaryRepoSQL:
+    return NewsSummaryRepoSQL()
+
+
+@lru_cache(maxsize=None)
 def get_llm_service() -> OllamaLLMService:
     return OllamaLLMService()
 
@@ -48,7 +62,11 @@ def get_chat_use_case(
     llm: OllamaLLMService = Depends(get_llm_service),
     repo: ChatRepositorySQL = Depends(get_chat_repo),
 ) -> ChatWithLLM:
-    return ChatWithLLM(llm=llm, chat_repo=repo)
+    return ChatWithLLM(llm=llm, chat_repo=repo, compactor=CompactChatHistory(llm=llm, chat_repo=repo))
+
+
+def get_chat_jobs_use_case(chat: ChatWithLLM = Depends(get_chat_use_case)) -> ChatJobs:
+    return ChatJobs(chat=chat, job_repo=ChatJobRepoSQL())
 
 
 def get_file_repo() -> FileRepositorySQL:
@@ -59,6 +77,7 @@ def get_news_repo() -> NewsRepositorySQL:
     return NewsRepositorySQL()
 
 
+@lru_cache(maxsize=None)
 def get_moex_service() -> MoexService:
     return MoexService()
 
@@ -68,8 +87,15 @@ def get_news_feed_use_case(
     llm=Depends(get_llm_service),
     cache_repo: NewsCacheRepoSQL = Depends(get_news_cache_repo),
     news_repo: NewsRepositorySQL = Depends(get_news_repo),
+    summary_repo: NewsSummaryRepoSQL = Depends(get_news_summary_repo),
 ) -> GetNewsFeed:
-    return GetNewsFeed(scraper=scraper, llm=llm, cache_repo=cache_repo, news_repo=news_repo)
+    return GetNewsFeed(
+        scraper=scraper,
+        llm=llm,
+        cache_repo=cache_repo,
+        news_repo=news_repo,
+        summary_repo=summary_repo,
+    )
 
 
 def get_public_news_feed_use_case(
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.core.settings import settings
+from app.infrastructure.metrics import metrics
+
+_SESSIONS: Dict[str, requests.Session] = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+def _build_session(pool_maxsize: int) -> requests.Session:
+    # Ретраи только для идемпотентных запросов: повторять POST в Ollama дорого и бессмысленно.
+    retry = Retry(
+        total=settings.HTTP_RETRIES,
+        connect=settings.HTTP_RETRIES,
+        read=settings.HTTP_RETRIES,
+        backoff_factor=settings.HTTP_BACKOFF_SEC,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=settings.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_http_session(name: str, pool_maxsize: int | None = None) -> requests.Session:
+    """
+    Общий на процесс requests.Session по имени клиента ("scraper", "moex", "ollama"):
+    keep-alive и пул соединений на каждый хост, общие ретраи с backoff.
+    """
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(name)
+        if session is None:
+            session = _build_session(pool_maxsize or settings.HTTP_POOL_MAXSIZE)
+            _SESSIONS[name] = session
+        return session
+
+
+def http_timeout(read_sec: float) -> tuple[float, float]:
+    return settings.HTTP_CONNECT_TIMEOUT_SEC, read_sec
+
+
+def close_http_sessions() -> None:
+    with _SESSIONS_LOCK:
+        for session in _SESSIONS.values():
+            session.close()
+        _SESSIONS.clear()
+
+
+def http_pool_stats() -> Dict[str, Any]:
+    """
+    По каждому клиенту и хосту: сколько запросов прошло и сколько TCP/TLS-соединений открыто.
+    reused = requests - connections.
+    """
+    with _SESSIONS_LOCK:
+        sessions = dict(_SESSIONS)
+
+    out: Dict[str, Any] = {}
+    for name, session in sessions.items():
+        hosts: Dict[str, Dict[str, int]] = {}
+        seen = set()
+        for adapter in session.adapters.values():
+            if id(adapter) in seen or not isinstance(adapter, HTTPAdapter):
+                continue
+            seen.add(id(adapter))
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                host = f"{pool.scheme}://{pool.host}:{pool.port}"
+                hosts[host] = {
+                    "requests": pool.num_requests,
+                    "connections": pool.num_connections,
+                    "reused": max(0, pool.num_requests - pool.num_connections),
+                }
+        out[name] = hosts
+    return out
+
+
+metrics.register_collector("http_pools", http_pool_stats)
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import logging
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Мусорные теги: выбрасываем вместе с содержимым, но не с хвостовым текстом после них.
+# template в дереве lxml — обычный текст, а bs4 его не отдаёт: выбрасываем явно, чтобы движки совпадали.
+JUNK_TAGS = ("script", "style", "noscript", "template", "header", "footer", "form", "nav", "aside")
+
+
+def _normalize(text: str) -> Optional[str]:
+    cleaned = " ".join(text.split())
+    return cleaned or None
+
+
+class IncrementalExtraction(ABC):
+    """
+    Потоковое извлечение: HTML подаётся кусками, feed() возвращает True,
+    когда текста уже достаточно и дальше страницу можно не читать.
+    """
+
+    @abstractmethod
+    def feed(self, chunk: str) -> bool: ...
+
+    @abstractmethod
+    def close(self) -> Optional[str]: ...
+
+
+class HtmlExtractor(ABC):
+    """
+    Извлекает текст статьи из HTML: без мусорных тегов, первый <article> если он есть,
+    иначе весь документ; текстовые узлы склеиваются через пробел.
+    """
+
+    name: str = "base"
+
+    @abstractmethod
+    def extract(self, html: str) -> Optional[str]: ...
+
+    @abstractmethod
+    def links(self, html: str) -> List[Tuple[str, str]]:
+        """
+        (href, текст ссылки) по всем <a href> вне мусорных тегов, в порядке документа.
+        """
+
+    def start_incremental(self, max_chars: Optional[int] = None) -> Optional[IncrementalExtraction]:
+        """
+        None — движок умеет разбирать только страницу целиком.
+        """
+        return None
+
+
+class Bs4HtmlExtractor(HtmlExtractor):
+    name = "bs4"
+
+    def extract(self, html: str) -> Optional[str]:
+        soup = BeautifulSoup(html, "html.parser")
+
+        # Удаляем мусорные теги
+        for tag in soup(list(JUNK_TAGS)):
+            tag.extract()
+
+        # Если есть тег <article> — используем его
+        article = soup.find("article")
+        if article:
+            text = article.get_text(separator=" ", strip=True)
+        else:
+            text = soup.get_text(separator=" ", strip=True)
+
+        return _normalize(text)
+
+    def links(self, html: str) -> List[Tuple[str, str]]:
+        soup = BeautifulSoup(html, "html.parser")
+        for tag in soup(list(JUNK_TAGS)):
+            tag.extract()
+        return [(a["href"], _normalize(a.get_text(separator=" ")) or "") for a in soup.find_all("a", href=True)]
+
+
+class LxmlHtmlExtractor(HtmlExtractor):
+    """
+    Тот же алгоритм на libxml2: дерево строится в C, без промежуточных объектов BeautifulSoup.
+    """
+
+    name = "lxml"
+
+    def __init__(self) -> None:
+        from lxml import etree
+        from lxml import html as lxml_html
+
+        self._etree = etree
+        self._html = lxml_html
+
+    def _parse(self, html: str):
+        if not html or not html.strip():
+            return None
+        try:
+            root = self._html.document_fromstring(html)
+        except ValueError:
+            # str с XML-декларацией кодировки lxml принимает только байтами
+            root = self._html.document_fromstring(html.encode("utf-8"))
+        except self._etree.ParserError:
+            return None
+
+        # хвост после мусорного тега — отдельный текстовый узел (как в bs4), а не продолжение предыдущего
+        for el in root.iter(*JUNK_TAGS):
+            if el.tail:
+                el.tail = " " + el.tail
+        self._etree.strip_elements(root, *JUNK_TAGS, with_tail=False)
+        return root
+
+    def extract(self, html: str) -> Optional[str]:
+        root = self._parse(html)
+        if root is None:
+            return None
+
+        article = next(root.iter("article"), None)
+        node = article if article is not None else root
+        return _normalize(" ".join(node.itertext()))
+
+    def links(self, html: str) -> List[Tuple[str, str]]:
+        root = self._parse(html)
+        if root is None:
+            return []
+        return [(a.get("href"), _normalize(" ".join(a.itertext())) or "") for a in root.iter("a") if a.get("href")]
+
+    def start_incremental(self, max_chars: Optional[int] = None) -> IncrementalExtraction:
+        return _LxmlIncremental(self._etree, max_chars)
+
+
+class _TextCollector:
+    """
+    SAX-target для lxml.HTMLParser: тот же алгоритм, что и extract(), но без дерева.
+
+    Данные между событиями — один текстовый узел (lxml может резать его на части),
+    узлы склеиваются через пробел. Первый <article> вне мусорных тегов — итоговый текст;
+    как только он закрыт или в нём набрано больше max_chars символов, результат уже не изменится.
+    """
+
+    def __init__(self, max_chars: Optional[int]) -> None:
+        self.max_chars = max_chars
+        self._buf: List[str] = []
+        self._junk_depth = 0
+        self._article_depth = 0
+        self.article_seen = False
+        self.article_closed = False
+        self.doc_parts: List[str] = []
+        self.article_parts: List[str] = []
+        self._doc_len = 0
+        self._article_len = 0
+
+    @property
+    def done(self) -> bool:
+        if self.article_closed:
+            return True
+        return self.max_chars is not None and self._article_depth > 0 and self._article_len > self.max_chars
+
+    def _has_room(self, length: int) -> bool:
+        return self.max_chars is None or length <= self.max_chars
+
+    def _flush(self) -> None:
+        if not self._buf:
+            return
+        text = " ".join("".join(self._buf).split())
+        self._buf.clear()
+        if not text:
+            return
+        # Длины считаем как у " ".join(parts): текст длиннее max_chars дальше не копим
+        if self._article_depth > 0 and not self.article_closed and self._has_room(self._article_len):
+            self._article_len += len(text) + (1 if self.article_parts else 0)
+            self.article_parts.append(text)
+        if not self.article_seen and self._has_room(self._doc_len):
+            self._doc_len += len(text) + (1 if self.doc_parts else 0)
+            self.doc_parts.append(text)
+
+    def start(self, tag, attrib) -> None:
+        self._flush()
+        if tag in JUNK_TAGS:
+            self._junk_depth += 1
+        elif tag == "article" and self._junk_depth == 0:
+            if self._article_depth > 0:
+                self._article_depth += 1
+            elif not self.article_seen:
+                self.article_seen = True
+                self._article_depth = 1
+
+    def end(self, tag) -> None:
+        self._flush()
+        if tag in JUNK_TAGS:
+            self._junk_depth = max(0, self._junk_depth - 1)
+        elif tag == "article" and self._junk_depth == 0 and self._article_depth > 0:
+            self._article_depth -= 1
+            if self._article_depth == 0:
+                self.article_closed = True
+
+    def data(self, data) -> None:
+        if self._junk_depth == 0:
+            self._buf.append(data)
+
+    def comment(self, text) -> None:
+        self._flush()
+
+    def pi(self, target, data=None) -> None:
+        self._flush()
+
+    def close(self) -> Optional[str]:
+        self._flush()
+        parts = self.article_parts if self.article_seen else self.doc_parts
+        return " ".join(parts) or None
+
+
+class _LxmlIncremental(IncrementalExtraction):
+    def __init__(self, etree, max_chars: Optional[int]) -> None:
+        self._etree = etree
+        self._collector = _TextCollector(max_chars)
+        self._parser = etree.HTMLParser(target=self._collector)
+        self._fed = False
+
+    def feed(self, chunk: str) -> bool:
+        if chunk:
+            self._fed = True
+            self._parser.feed(chunk)
+        return self._collector.done
+
+    def close(self) -> Optional[str]:
+        if self._fed:
+            try:
+                self._parser.close()
+            except self._etree.LxmlError:
+                pass
+        return self._collector.close()
+
+
+def get_html_extractor(name: Optional[str] = None) -> HtmlExtractor:
+    """
+    "lxml" / "bs4" / "auto" (lxml, если установлен, иначе BeautifulSoup).
+    """
+    name = (name or settings.SCRAPER_HTML_EXTRACTOR).lower()
+    if name in ("auto", "lxml"):
+        try:
+            return LxmlHtmlExtractor()
+        except ImportError:
+            if name == "lxml":
+                logger.warning("[Scraper] lxml не установлен, используем BeautifulSoup")
+    return Bs4HtmlExtractor()
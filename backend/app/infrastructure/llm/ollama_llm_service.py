@@ -1,38 +1,253 @@
-import threading
+import json
+import socket
+from contextlib import contextmanager
+from typing import Iterator
 
 import requests
 
-from app.application.interfaces.llm import ILLMService
+from app.application.interfaces.llm import ILLMService, LLMTurn, StreamCancel
+from app.core.constants import LLM_PRIORITIES
 from app.core.settings import settings
+from app.infrastructure.concurrency.circuit_breaker import CircuitBreaker
+from app.infrastructure.concurrency.priority_scheduler import PriorityScheduler, QueueDeadlineExceeded
+from app.infrastructure.http.client import http_timeout
+from app.infrastructure.llm.ollama_pool import OllamaBackendPool, OllamaHTTPError, ollama_backend_urls
+from app.infrastructure.llm.ollama_warmup import OllamaWarmup, ollama_keep_alive, ollama_options, record_load_timings
+from app.infrastructure.llm.token_estimator import TokenEstimator
+from app.infrastructure.metrics import metrics
 
 _OLLAMA_MAX_CONCURRENCY = int(getattr(settings, "OLLAMA_MAX_CONCURRENCY", 1))
-_OLLAMA_SEMAPHORE = threading.BoundedSemaphore(_OLLAMA_MAX_CONCURRENCY)
+_POOL = OllamaBackendPool(
+    ollama_backend_urls(),
+    max_in_flight=_OLLAMA_MAX_CONCURRENCY,
+    fail_threshold=settings.OLLAMA_FAIL_THRESHOLD,
+    eject_sec=settings.OLLAMA_EJECT_SEC,
+    health_interval_sec=settings.OLLAMA_HEALTH_INTERVAL_SEC,
+)
+metrics.register_collector("ollama_backends", _POOL.stats)
+_WARMUP = OllamaWarmup(_POOL)
+_TOKENS = TokenEstimator()
+metrics.register_collector("llm_tokens", _TOKENS.stats)
+
+# Вместо FIFO-семафора: чат не стоит в очереди за фоновыми суммаризациями.
+# Слотов столько, сколько суммарно держат все бэкенды.
+_LLM_SCHEDULER = PriorityScheduler(
+    max_concurrency=_POOL.capacity,
+    priorities=LLM_PRIORITIES,
+    class_limits=settings.LLM_CLASS_LIMITS,
+)
+metrics.register_collector("llm_scheduler", _LLM_SCHEDULER.stats)
+
+
+def _is_ollama_failure(e: Exception) -> bool:
+    # 4xx — ошибка запроса (неверный format, нет модели): из-за неё не отключаем LLM всем
+    return not (isinstance(e, OllamaHTTPError) and e.status_code < 500)
+
+
+# Ollama лежит — не ждём таймаут на каждом запросе, а сразу отказываем до конца cooldown.
+# Снятие из своей очереди по дедлайну и ответы 4xx — не ошибки Ollama.
+_LLM_BREAKER = CircuitBreaker(
+    "ollama",
+    failure_rate=settings.LLM_BREAKER_FAILURE_RATE,
+    min_calls=settings.LLM_BREAKER_MIN_CALLS,
+    window_sec=settings.LLM_BREAKER_WINDOW_SEC,
+    cooldown_sec=settings.LLM_BREAKER_COOLDOWN_SEC,
+    ignored=(QueueDeadlineExceeded,),
+    is_failure=_is_ollama_failure,
+)
+metrics.register_collector("llm_breaker", _LLM_BREAKER.stats)
+
+
+def get_ollama_pool() -> OllamaBackendPool:
+    return _POOL
+
+
+def get_llm_breaker() -> CircuitBreaker:
+    return _LLM_BREAKER
+
+
+def get_ollama_warmup() -> OllamaWarmup:
+    return _WARMUP
+
+
+def _abort_response(r: requests.Response) -> None:
+    # close() из чужого потока не будит блокирующий recv, а shutdown сокета — будит (чтение получит EOF)
+    sock = getattr(getattr(getattr(r, "raw", None), "connection", None), "sock", None)
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+@contextmanager
+def _llm_slot(user_context: dict | None) -> Iterator[None]:
+    """
+    Слот в очереди Ollama по классу user_context["priority"] (по умолчанию — фоновый).
+    user_context["deadline_sec"] переопределяет LLM_QUEUE_DEADLINE_SEC для класса.
+    """
+    ctx = user_context or {}
+    priority = ctx.get("priority") or LLM_PRIORITIES[-1]
+    deadline = ctx.get("deadline_sec", settings.LLM_QUEUE_DEADLINE_SEC.get(priority))
+    try:
+        with _LLM_SCHEDULER.slot(priority, deadline_sec=deadline) as wait_ms:
+            metrics.observe_ms(f"llm.queue_wait.{priority}", wait_ms)
+            yield
+    except QueueDeadlineExceeded:
+        metrics.incr(f"llm.queue_dropped.{priority}")
+        raise
 
 
 class OllamaLLMService(ILLMService):
-    def __init__(self):
+    def __init__(self, pool: OllamaBackendPool | None = None, breaker: CircuitBreaker | None = None):
         self.model = settings.OLLAMA_MODEL
-        base = settings.OLLAMA_URL.rstrip("/")
-        self.url = base if base.endswith("/api/generate") else f"{base}/api/generate"
+        self.pool = pool or _POOL
+        self.breaker = breaker or _LLM_BREAKER
+        self.session = self.pool.session
+
+    def retry_after(self) -> float | None:
+        return self.breaker.retry_after()
+
+    @property
+    def model_name(self) -> str:
+        return self.model
+
+    def count_tokens(self, text: str) -> int:
+        return _TOKENS.estimate(text)
+
+    def _payload(self, prompt: str, *, stream: bool = False, **extra) -> dict:
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": ollama_keep_alive(),
+            "options": ollama_options(),
+            **extra,
+        }
 
     def chat(self, prompt: str, user_context: dict | None = None) -> str:
-        payload = {"model": self.model, "prompt": prompt, "stream": False}
+        return self._complete(self._payload(prompt), user_context).get("response", "") or ""
+
+    def chat_turn(
+        self,
+        prompt: str,
+        context: list[int] | None = None,
+        user_context: dict | None = None,
+    ) -> LLMTurn:
+        """
+        context из прошлого ответа: Ollama продолжает с того же состояния, не разбирая историю заново.
+        """
+        payload = self._payload(prompt)
+        if context:
+            payload["context"] = context
+        body = self._complete(payload, user_context)
+
+        new_context = body.get("context")
+        completion_tokens = body.get("eval_count")
+        prompt_tokens = None
+        if new_context and completion_tokens is not None:
+            # context = токены (шаблон + промпт + ответ): точнее prompt_eval_count, который не считает кэш
+            prompt_tokens = len(new_context) - len(context or []) - completion_tokens
+            if not context:
+                _TOKENS.calibrate(prompt, prompt_tokens)
+        return LLMTurn(
+            text=body.get("response", "") or "",
+            context=new_context,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+        )
 
-        acquired = _OLLAMA_SEMAPHORE.acquire()
-        if not acquired:
-            raise RuntimeError("Ollama busy: too many concurrent requests")
+    def chat_json(self, prompt: str, schema: dict, user_context: dict | None = None) -> str:
+        """
+        format=<JSON Schema>: Ollama ограничивает генерацию грамматикой схемы.
+        """
+        return self._complete(self._payload(prompt, format=schema), user_context).get("response", "") or ""
 
-        try:
-            r = requests.post(self.url, json=payload, timeout=120)
+    def _complete(self, payload: dict, user_context: dict | None) -> dict:
+        with self.breaker.guard(), _llm_slot(user_context):
+            # соединение не установилось — пробуем следующий бэкенд (запрос до модели не дошёл)
+            attempts = min(2, len(self.pool.backends))
+            failed: set[str] = set()
+            for attempt in range(attempts):
+                try:
+                    return self._generate(payload, failed)
+                except requests.exceptions.ConnectionError as e:
+                    if attempt + 1 < attempts:
+                        continue
+                    raise RuntimeError(f"Ollama unreachable: {e}") from e
+                except requests.exceptions.Timeout as e:
+                    raise RuntimeError(f"Ollama unreachable: {e}") from e
+        return {}
+
+    def _generate(self, payload: dict, failed: set[str]) -> dict:
+        with self.pool.lease(exclude=failed) as backend:
+            failed.add(backend.base_url)
+            r = self.session.post(
+                backend.generate_url,
+                json=payload,
+                timeout=http_timeout(settings.OLLAMA_TIMEOUT_SEC),
+            )
 
             if r.status_code >= 400:
-                msg = r.text[:500]
-                raise RuntimeError(f"Ollama HTTP {r.status_code}: {msg}")
+                raise OllamaHTTPError(r.status_code, r.text[:500])
+
+            body = r.json()
+            record_load_timings(body)
+            return body
+
+    def stream_chat(
+        self,
+        prompt: str,
+        user_context: dict | None = None,
+        cancel: StreamCancel | None = None,
+    ) -> Iterator[str]:
+        """
+        stream=True: Ollama отдаёт NDJSON по токенам. Если генератор закрыли раньше "done"
+        (клиент ушёл), закрываем соединение — Ollama прекращает генерацию.
+        cancel.cancel() из другого потока рвёт соединение под ждущим чтением: генератор
+        завершается сам, без ошибки, и отпускает слот и бэкенд в своём потоке.
+        """
+        if cancel is not None and cancel.cancelled:
+            return
+        payload = self._payload(prompt, stream=True)
 
-            return r.json().get("response", "") or ""
+        with self.breaker.guard(), _llm_slot(user_context), self.pool.lease() as backend:
+            # отмена могла прийти, пока ждали слот
+            if cancel is not None and cancel.cancelled:
+                return
+            try:
+                r = self.session.post(
+                    backend.generate_url,
+                    json=payload,
+                    stream=True,
+                    timeout=http_timeout(settings.OLLAMA_TIMEOUT_SEC),
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                raise RuntimeError(f"Ollama unreachable: {e}") from e
 
-        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
-            raise RuntimeError(f"Ollama unreachable: {e}") from e
+            if cancel is not None:
+                cancel.on_cancel(lambda: _abort_response(r))
+            try:
+                if r.status_code >= 400:
+                    raise OllamaHTTPError(r.status_code, r.text[:500])
 
-        finally:
-            _OLLAMA_SEMAPHORE.release()
+                for line in r.iter_lines():
+                    if cancel is not None and cancel.cancelled:
+                        break
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise RuntimeError(f"Ollama error: {chunk['error']}")
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        record_load_timings(chunk)
+                        break
+            except requests.exceptions.RequestException as e:
+                if cancel is not None and cancel.cancelled:
+                    return
+                raise RuntimeError(f"Ollama stream interrupted: {e}") from e
+            finally:
+                r.close()
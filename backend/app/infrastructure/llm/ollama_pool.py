@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Collection, Dict, Iterator, List, Optional
+
+import requests
+
+from app.core.settings import settings
+from app.infrastructure.http.client import get_http_session, http_timeout
+
+logger = logging.getLogger(__name__)
+
+
+class NoHealthyBackendError(RuntimeError):
+    """
+    Все бэкенды Ollama выведены из ротации.
+    """
+
+
+class OllamaHTTPError(RuntimeError):
+    """
+    Ollama ответил статусом >= 400. 4xx — ошибка запроса (нет модели, неверный payload), а не бэкенда.
+    """
+
+    def __init__(self, status_code: int, body: str) -> None:
+        super().__init__(f"Ollama HTTP {status_code}: {body}")
+        self.status_code = status_code
+
+
+class OllamaBackend:
+    def __init__(self, base_url: str, max_in_flight: int) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.healthy = True
+        self.ejected_until = 0.0
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.ejections = 0
+        self.started_at = time.monotonic()
+
+    @property
+    def generate_url(self) -> str:
+        return f"{self.base_url}/api/generate"
+
+    def available(self, now: float) -> bool:
+        # выведенный бэкенд возвращается сам, когда истекло время изоляции (дальше решит первый запрос)
+        return self.healthy or now >= self.ejected_until
+
+    def stats(self) -> Dict[str, Any]:
+        uptime_min = max((time.monotonic() - self.started_at) / 60, 1e-9)
+        ok = self.requests - self.errors
+        return {
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "ejections": self.ejections,
+            "avg_ms": round(self.total_ms / ok, 2) if ok else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "requests_per_min": round(self.requests / uptime_min, 2),
+        }
+
+
+class OllamaBackendPool:
+    """
+    Набор бэкендов Ollama с балансировкой по наименьшему числу запросов в работе.
+    - fail_threshold ошибок подряд -> бэкенд выводится из ротации на eject_sec
+    - фоновая проверка /api/tags выводит упавшие и возвращает поднявшиеся
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        max_in_flight: int = 1,
+        fail_threshold: int = 3,
+        eject_sec: float = 30.0,
+        health_interval_sec: float = 10.0,
+        session: Optional[requests.Session] = None,
+    ) -> None:
+        if not urls:
+            raise ValueError("OllamaBackendPool needs at least one URL")
+        self.backends = [OllamaBackend(url, max_in_flight) for url in urls]
+        self.fail_threshold = fail_threshold
+        self.eject_sec = eject_sec
+        self.health_interval_sec = health_interval_sec
+        self.session = session or get_http_session("ollama", pool_maxsize=max(max_in_flight, 2))
+        self._lock = threading.Lock()
+        self._rr = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def capacity(self) -> int:
+        return sum(b.max_in_flight for b in self.backends)
+
+    def _pick(self, exclude: Collection[str] = ()) -> OllamaBackend:
+        now = time.monotonic()
+        candidates = [b for b in self.backends if b.available(now) and b.base_url not in exclude]
+        if not candidates and exclude:
+            candidates = [b for b in self.backends if b.available(now)]
+        if not candidates:
+            raise NoHealthyBackendError("No healthy Ollama backends")
+        # сначала те, у кого есть свободный слот; при равенстве — по кругу
+        self._rr += 1
+        n = len(self.backends)
+        return min(
+            candidates,
+            key=lambda b: (
+                b.in_flight >= b.max_in_flight,
+                b.in_flight,
+                (self.backends.index(b) - self._rr) % n,
+            ),
+        )
+
+    @contextmanager
+    def lease(self, exclude: Collection[str] = ()) -> Iterator[OllamaBackend]:
+        """
+        Выбирает бэкенд на время запроса (exclude — base_url, которые уже не ответили).
+        Исключение внутри блока считается ошибкой бэкенда, кроме OllamaHTTPError с 4xx;
+        закрытие генератора (GeneratorExit) — тоже нет.
+        """
+        with self._lock:
+            backend = self._pick(exclude)
+            backend.in_flight += 1
+            backend.requests += 1
+        started = time.perf_counter()
+        try:
+            yield backend
+        except OllamaHTTPError as e:
+            if e.status_code >= 500:
+                self._report_failure(backend)
+            raise
+        except Exception:
+            self._report_failure(backend)
+            raise
+        else:
+            self._report_success(backend, (time.perf_counter() - started) * 1000)
+        finally:
+            with self._lock:
+                backend.in_flight -= 1
+
+    def _report_success(self, backend: OllamaBackend, elapsed_ms: float) -> None:
+        with self._lock:
+            backend.total_ms += elapsed_ms
+            backend.max_ms = max(backend.max_ms, elapsed_ms)
+            backend.consecutive_failures = 0
+            if not backend.healthy:
+                logger.info("[OllamaPool] %s снова в ротации", backend.base_url)
+            backend.healthy = True
+
+    def _report_failure(self, backend: OllamaBackend) -> None:
+        with self._lock:
+            backend.errors += 1
+            backend.consecutive_failures += 1
+            if backend.consecutive_failures >= self.fail_threshold or not backend.healthy:
+                self._eject(backend)
+
+    def _eject(self, backend: OllamaBackend) -> None:
+        if backend.healthy:
+            backend.ejections += 1
+            logger.warning("[OllamaPool] %s выведен из ротации на %.0fs", backend.base_url, self.eject_sec)
+        backend.healthy = False
+        backend.ejected_until = time.monotonic() + self.eject_sec
+
+    def probe_once(self) -> None:
+        for backend in self.backends:
+            try:
+                r = self.session.get(f"{backend.base_url}/api/tags", timeout=http_timeout(3))
+                ok = r.status_code < 500
+            except requests.exceptions.RequestException:
+                ok = False
+            with self._lock:
+                if ok:
+                    if not backend.healthy:
+                        logger.info("[OllamaPool] %s прошёл health-check, возвращаем", backend.base_url)
+                    backend.healthy = True
+                    backend.consecutive_failures = 0
+                else:
+                    self._eject(backend)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ollama-health", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.health_interval_sec):
+            self.probe_once()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {b.base_url: b.stats() for b in self.backends}
+
+
+def ollama_backend_urls() -> List[str]:
+    """
+    OLLAMA_URLS (через запятую) или единственный OLLAMA_URL; хвост /api/generate отрезается.
+    """
+    raw = [u.strip() for u in (settings.OLLAMA_URLS or "").split(",") if u.strip()] or [settings.OLLAMA_URL]
+    urls = []
+    for url in raw:
+        url = url.rstrip("/")
+        if url.endswith("/api/generate"):
+            url = url[: -len("/api/generate")]
+        urls.append(url)
+    return urls
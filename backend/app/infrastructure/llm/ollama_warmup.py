@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import datetime
+from datetime import time as dtime
+from datetime import timedelta, timezone
+from typing import Optional, Tuple
+
+import requests
+
+from app.core.settings import settings
+from app.infrastructure.http.client import http_timeout
+from app.infrastructure.llm.ollama_pool import OllamaBackend, OllamaBackendPool
+from app.infrastructure.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Москва без перехода на летнее время: фиксированный UTC+3 вместо tzdata
+MSK = timezone(timedelta(hours=3))
+
+# Загрузка уже загруженной модели занимает миллисекунды; дольше — модель поднималась с диска
+COLD_LOAD_MS = 500.0
+
+
+def _parse_hours(raw: str) -> Tuple[dtime, dtime]:
+    start, _, end = raw.partition("-")
+    return dtime.fromisoformat(start.strip()), dtime.fromisoformat(end.strip())
+
+
+def is_trading_hours(now: Optional[datetime] = None) -> bool:
+    """
+    Будни MOEX в окне OLLAMA_TRADING_HOURS_MSK ("HH:MM-HH:MM" по Москве).
+    """
+    now = (now or datetime.now(timezone.utc)).astimezone(MSK)
+    if now.weekday() >= 5:
+        return False
+    start, end = _parse_hours(settings.OLLAMA_TRADING_HOURS_MSK)
+    return start <= now.time() < end
+
+
+def ollama_keep_alive(now: Optional[datetime] = None) -> str:
+    """
+    Сколько Ollama держит модель в памяти после запроса: в торговые часы дольше,
+    ночью и в выходные — коротко, чтобы не занимать память без трафика.
+    """
+    if is_trading_hours(now):
+        return settings.OLLAMA_KEEP_ALIVE_TRADING
+    return settings.OLLAMA_KEEP_ALIVE_OFF_HOURS
+
+
+def ollama_options() -> dict:
+    """
+    Параметры модели для всех запросов, включая прогрев: другой num_ctx заставил бы Ollama перезагрузить модель.
+    """
+    return {"num_ctx": settings.OLLAMA_NUM_CTX}
+
+
+def record_load_timings(body: dict) -> None:
+    """
+    load_duration / total_duration из ответа Ollama (нс): холодная загрузка модели
+    учитывается отдельно от времени самой генерации.
+    """
+    load_ms = (body.get("load_duration") or 0) / 1e6
+    total_ms = (body.get("total_duration") or 0) / 1e6
+    if load_ms >= COLD_LOAD_MS:
+        metrics.incr("llm.cold_load")
+        metrics.observe_ms("llm.cold_load", load_ms)
+    if total_ms:
+        metrics.observe_ms("llm.inference", max(0.0, total_ms - load_ms))
+
+
+class OllamaWarmup:
+    """
+    Предзагрузка OLLAMA_MODEL на каждом бэкенде пула (пустой prompt: Ollama только загружает модель).
+    Фоновый поток греет модель при старте и повторно — к началу торговых часов,
+    когда её могли выгрузить за ночь.
+    """
+
+    def __init__(self, pool: OllamaBackendPool, check_interval_sec: float = 60.0) -> None:
+        self.pool = pool
+        self.check_interval_sec = check_interval_sec
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def warm_backend(self, backend: OllamaBackend) -> bool:
+        payload = {
+            "model": settings.OLLAMA_MODEL,
+            "prompt": "",
+            "stream": False,
+            "keep_alive": ollama_keep_alive(),
+            "options": ollama_options(),
+        }
+        try:
+            with metrics.timer("llm.warmup"):
+                r = self.pool.session.post(
+                    backend.generate_url,
+                    json=payload,
+                    timeout=http_timeout(settings.OLLAMA_TIMEOUT_SEC),
+                )
+            if r.status_code >= 400:
+                raise RuntimeError(f"Ollama HTTP {r.status_code}: {r.text[:200]}")
+            record_load_timings(r.json())
+        except (requests.exceptions.RequestException, RuntimeError, ValueError) as e:
+            metrics.incr("llm.warmup_failed")
+            logger.warning("[OllamaWarmup] %s: не удалось загрузить %s: %s", backend.base_url, payload["model"], e)
+            return False
+        logger.info("[OllamaWarmup] %s: модель %s загружена", backend.base_url, payload["model"])
+        return True
+
+    def warm_all(self) -> int:
+        return sum(self.warm_backend(b) for b in self.pool.backends if b.healthy)
+
+    def start(self) -> None:
+        if not settings.OLLAMA_WARMUP_ENABLED or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ollama-warmup", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+    def _run(self) -> None:
+        self.warm_all()
+        trading = is_trading_hours()
+        while not self._stop.wait(self.check_interval_sec):
+            now_trading = is_trading_hours()
+            if now_trading and not trading:
+                self.warm_all()
+            trading = now_trading
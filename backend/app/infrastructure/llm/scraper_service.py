@@ -1,42 +1,267 @@
+import codecs
+import hashlib
 import logging
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import urldefrag, urljoin, urlparse
 
 import requests
-from bs4 import BeautifulSoup
+
+from app.core.settings import settings
+from app.infrastructure.database.scrape_validator_repo_impl import ScrapeValidatorRepoSQL, ScrapeValidatorRow
+from app.infrastructure.http.client import get_http_session, http_timeout
+from app.infrastructure.llm.html_extractors import HtmlExtractor, get_html_extractor
+from app.infrastructure.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+
+
+@dataclass
+class ArticleLink:
+    url: str
+    title: str
+
+
+# Заголовок статьи — это не "Далее", "2" или "Все новости"
+_MIN_LINK_TITLE_CHARS = 20
+_NON_ARTICLE_MARKERS = ("/tags/", "/tag/", "/search", "/rubrics/", "/authors/", "/login", "/subscribe", "page=")
+
+
+def _host(netloc: str) -> str:
+    netloc = netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+def select_article_links(raw_links: List[Tuple[str, str]], index_url: str, limit: int) -> List[ArticleLink]:
+    """
+    Отбирает ссылки на статьи того же сайта: абсолютный URL без #fragment, текст похож на заголовок,
+    в пути/параметрах есть цифры (дата или id), это не сама индексная страница и не служебный раздел.
+    """
+    index = urlparse(index_url)
+    picked: dict[str, ArticleLink] = {}
+    for href, title in raw_links:
+        url, _ = urldefrag(urljoin(index_url, href.strip()))
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or _host(parsed.netloc) != _host(index.netloc):
+            continue
+        if parsed.path.rstrip("/") == index.path.rstrip("/") and not parsed.query:
+            continue
+        tail = f"{parsed.path}?{parsed.query}".lower()
+        if len(title) < _MIN_LINK_TITLE_CHARS or not any(ch.isdigit() for ch in tail):
+            continue
+        if any(marker in tail for marker in _NON_ARTICLE_MARKERS):
+            continue
+        picked.setdefault(url, ArticleLink(url=url, title=title))
+        if len(picked) >= limit:
+            break
+    return list(picked.values())
+
+
+@dataclass
+class FetchResult:
+    text: Optional[str]
+    # True — страница не менялась с прошлой загрузки (304 или тот же body), текст взят из хранилища
+    unchanged: bool = False
+    status_code: Optional[int] = None
+
 
 class ScraperService:
     """
     Сервис для получения и очистки текста статьи по URL.
     """
 
-    def fetch_article_text(self, url: str) -> str | None:
+    def __init__(
+        self,
+        validator_repo: Optional[ScrapeValidatorRepoSQL] = None,
+        session: Optional[requests.Session] = None,
+        extractor: Optional[HtmlExtractor] = None,
+    ):
+        self.validator_repo = validator_repo
+        self.session = session or get_http_session("scraper")
+        self.extractor = extractor or get_html_extractor()
+
+    def fetch_article_text(self, url: str, max_chars: Optional[int] = None) -> str | None:
         """
         Загружает страницу по URL и возвращает очищенный текст статьи.
         При ошибке возвращает None (НЕ выбрасывает исключение).
         """
+        return self.fetch_article(url, max_chars=max_chars).text
+
+    def fetch_article(self, url: str, max_chars: Optional[int] = None) -> FetchResult:
+        """
+        Условная загрузка: отправляет If-None-Match / If-Modified-Since по сохранённым валидаторам.
+        На 304 или совпадающем body возвращает ранее извлечённый текст без парсинга.
+
+        Тело читается потоково, не больше SCRAPER_MAX_BYTES. С max_chars чтение обрывается,
+        как только текста статьи набрано больше max_chars: первые max_chars символов
+        и признак "текст длиннее" совпадают с разбором страницы целиком.
+        """
+        return self._fetch(url, validator_key=url, max_chars=max_chars, extract=self._extract_text)
+
+    def fetch_article_links(self, index_url: str, limit: int = 40) -> Tuple[Optional[List[ArticleLink]], bool]:
+        """
+        Ссылки на статьи с индексной страницы раздела -> (links, unchanged).
+        Валидаторы хранятся под ключом "<url>#links": если индекс не менялся, unchanged=True
+        и страница не разбирается. При ошибке загрузки links=None.
+        """
+
+        def _extract(html: str) -> Optional[str]:
+            links = select_article_links(self.extractor.links(html), index_url, limit)
+            return "\n".join(f"{link.url}\t{link.title}" for link in links) or None
+
+        result = self._fetch(index_url, validator_key=f"{index_url}#links", max_chars=None, extract=_extract)
+        if result.text is None:
+            return (None if result.status_code is None else []), result.unchanged
+        links = []
+        for line in result.text.splitlines():
+            url, _, title = line.partition("\t")
+            links.append(ArticleLink(url=url, title=title))
+        return links, result.unchanged
+
+    def _fetch(
+        self,
+        url: str,
+        *,
+        validator_key: str,
+        max_chars: Optional[int],
+        extract: Callable[[str], Optional[str]],
+    ) -> FetchResult:
+        stored = self._load_validators(validator_key)
+
+        headers = {"User-Agent": "Mozilla/5.0"}
+        if stored and stored.text:
+            if stored.etag:
+                headers["If-None-Match"] = stored.etag
+            if stored.last_modified:
+                headers["If-Modified-Since"] = stored.last_modified
+
         try:
-            response = requests.get(url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
-            response.raise_for_status()
+            response = self.session.get(
+                url,
+                timeout=http_timeout(settings.SCRAPER_TIMEOUT_SEC),
+                headers=headers,
+                stream=True,
+            )
+            try:
+                if response.status_code == 304 and stored and stored.text:
+                    metrics.incr("scraper.not_modified")
+                    return FetchResult(text=stored.text, unchanged=True, status_code=304)
+                response.raise_for_status()
+                # Хэш считается по фактически прочитанным байтам: при обрыве — по префиксу,
+                # от которого текст и зависит.
+                body_hash, html, text = self._read_body(response, max_chars)
+            finally:
+                response.close()
 
         except Exception as e:
             logger.warning(f"[Scraper] Не удалось загрузить статью {url}: {e}")
-            return None  # <-- ключевое изменение
+            return FetchResult(text=None)  # <-- ключевое изменение
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+        if stored and stored.text and stored.body_hash == body_hash:
+            metrics.incr("scraper.same_body")
+            if (etag, last_modified) != (stored.etag, stored.last_modified):
+                self._save_validators(validator_key, etag, last_modified, body_hash, stored.text)
+            return FetchResult(text=stored.text, unchanged=True, status_code=response.status_code)
+
+        metrics.incr("scraper.parsed")
+        if html is not None:
+            text = extract(html)
+        self._save_validators(validator_key, etag, last_modified, body_hash, text)
+        return FetchResult(text=text, unchanged=False, status_code=response.status_code)
+
+    def _read_body(self, response, max_chars: Optional[int]) -> Tuple[str, Optional[str], Optional[str]]:
+        """
+        Читает тело кусками до SCRAPER_MAX_BYTES -> (body_hash, html, text).
+        С max_chars и потоковым движком текст извлекается по ходу чтения (html=None),
+        иначе возвращается html, а разбор откладывается до сверки body_hash.
+        """
+        body_hash = hashlib.sha256()
+        limit = settings.SCRAPER_MAX_BYTES
+        read = 0
+        decoder = None
+        incremental = self.extractor.start_incremental(max_chars) if max_chars is not None else None
+        chunks: list[str] = []
+
+        def _consume(html: str) -> bool:
+            if incremental is None:
+                chunks.append(html)
+                return False
+            return incremental.feed(html)
+
+        with metrics.timer("scraper.read"):
+            for chunk in response.iter_content(chunk_size=settings.SCRAPER_CHUNK_BYTES):
+                if not chunk:
+                    continue
+                chunk = chunk[: limit - read]
+                read += len(chunk)
+                body_hash.update(chunk)
+                if decoder is None:
+                    decoder = codecs.getincrementaldecoder(self._detect_encoding(response, chunk))(errors="replace")
+
+                if _consume(decoder.decode(chunk)):
+                    metrics.incr("scraper.early_stop")
+                    break
+                if read >= limit:
+                    metrics.incr("scraper.byte_cap")
+                    break
+            else:
+                if decoder is not None:
+                    _consume(decoder.decode(b"", final=True))
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        metrics.incr("scraper.bytes_read", read)
+        if incremental is None:
+            return body_hash.hexdigest(), "".join(chunks), None
+        return body_hash.hexdigest(), None, incremental.close()
 
-        # Удаляем мусорные теги
-        for tag in soup(["script", "style", "noscript", "header", "footer", "form", "nav", "aside"]):
-            tag.extract()
+    @staticmethod
+    def _detect_encoding(response, first_chunk: bytes) -> str:
+        # Как response.text: кодировка из заголовка, иначе из <meta charset> первого куска
+        encoding = response.encoding
+        if not encoding:
+            match = _META_CHARSET_RE.search(first_chunk[:4096])
+            encoding = match.group(1).decode("ascii") if match else "utf-8"
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            encoding = "utf-8"
+        return encoding
 
-        # Если есть тег <article> — используем его
-        article = soup.find("article")
-        if article:
-            text = article.get_text(separator=" ", strip=True)
-        else:
-            text = soup.get_text(separator=" ", strip=True)
+    def _extract_text(self, html: str) -> str | None:
+        with metrics.timer(f"scraper.extract.{self.extractor.name}"):
+            return self.extractor.extract(html)
 
-        cleaned = " ".join(text.split())
+    def _load_validators(self, url: str) -> Optional[ScrapeValidatorRow]:
+        if self.validator_repo is None:
+            return None
+        try:
+            return self.validator_repo.get(url)
+        except Exception as e:
+            logger.warning(f"[Scraper] Валидаторы для {url} недоступны: {e}")
+            return None
 
-        return cleaned or None
+    def _save_validators(
+        self,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        body_hash: str,
+        text: Optional[str],
+    ) -> None:
+        if self.validator_repo is None or not text:
+            return
+        try:
+            self.validator_repo.upsert(
+                url=url,
+                etag=etag,
+                last_modified=last_modified,
+                body_hash=body_hash,
+                text=text,
+            )
+        except Exception as e:
+            logger.warning(f"[Scraper] Не удалось сохранить валидаторы для {url}: {e}")
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import math
+import re
+import threading
+from typing import Any, Dict
+
+# У Ollama нет API токенизации: считаем по типам символов (BPE llama/qwen режет кириллицу
+# заметно мельче латиницы) и подстраиваем общий множитель по фактическим счётчикам модели.
+_CYRILLIC_RE = re.compile(r"[а-яё]", re.IGNORECASE)
+_CYRILLIC_CHARS_PER_TOKEN = 2.6
+_OTHER_CHARS_PER_TOKEN = 3.8
+
+
+class TokenEstimator:
+    """
+    Оценка числа токенов с калибровкой: calibrate(estimated, actual) по prompt-токенам,
+    которые вернула модель, сдвигает множитель (EMA, в пределах [min_factor, max_factor]).
+    """
+
+    def __init__(self, alpha: float = 0.1, min_factor: float = 0.5, max_factor: float = 2.5) -> None:
+        self.alpha = alpha
+        self.min_factor = min_factor
+        self.max_factor = max_factor
+        self.factor = 1.0
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def raw_estimate(text: str) -> float:
+        cyrillic = len(_CYRILLIC_RE.findall(text))
+        return cyrillic / _CYRILLIC_CHARS_PER_TOKEN + (len(text) - cyrillic) / _OTHER_CHARS_PER_TOKEN
+
+    def estimate(self, text: str) -> int:
+        if not text:
+            return 0
+        return max(1, math.ceil(self.raw_estimate(text) * self.factor))
+
+    def calibrate(self, text: str, actual_tokens: int) -> None:
+        raw = self.raw_estimate(text)
+        if raw < 50 or actual_tokens <= 0:
+            # на коротких строках доля служебных токенов шаблона слишком велика
+            return
+        ratio = min(self.max_factor, max(self.min_factor, actual_tokens / raw))
+        with self._lock:
+            self.factor += self.alpha * (ratio - self.factor)
+            self.samples += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"factor": round(self.factor, 3), "samples": self.samples}
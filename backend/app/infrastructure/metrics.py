@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator
+
+
+@dataclass
+class TimerStat:
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_ms: float = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        avg = self.total_ms / self.count if self.count else 0.0
+        return {
+            "count": self.count,
+            "avg_ms": round(avg, 2),
+            "max_ms": round(self.max_ms, 2),
+            "last_ms": round(self.last_ms, 2),
+        }
+
+
+class MetricsRegistry:
+    """
+    Простые in-process метрики (на воркер): счётчики, тайминги, gauge
+    и коллекторы, которые отдают статистику компонентов (кэши, пулы) по запросу.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._timers: Dict[str, TimerStat] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe_ms(self, name: str, value_ms: float) -> None:
+        with self._lock:
+            stat = self._timers.setdefault(name, TimerStat())
+            stat.count += 1
+            stat.total_ms += value_ms
+            stat.last_ms = value_ms
+            stat.max_ms = max(stat.max_ms, value_ms)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_ms(name, (time.perf_counter() - start) * 1000)
+
+    def register_collector(self, name: str, collector: Callable[[], Dict[str, Any]]) -> None:
+        with self._lock:
+            self._collectors[name] = collector
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            timers = {k: v.as_dict() for k, v in self._timers.items()}
+            collectors = dict(self._collectors)
+
+        components: Dict[str, Any] = {}
+        for name, collector in collectors.items():
+            try:
+                components[name] = collector()
+            except Exception as e:
+                components[name] = {"error": str(e)}
+
+        return {"counters": counters, "gauges": gauges, "timers": timers, "components": components}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timers.clear()
+
+
+metrics = MetricsRegistry()
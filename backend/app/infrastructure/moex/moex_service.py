@@ -8,12 +8,15 @@ from typing import Any, Dict, List
 import requests
 
 from app.core.constants import IMOEX_SAMPLE_TICKERS
+from app.core.settings import settings
+from app.infrastructure.http.client import get_http_session, http_timeout
 from app.presentation.schemas.moex import MoexQuoteOut, MoexQuotesResponse
 
 
 class MoexService:
-    def __init__(self, base_url: str = "https://iss.moex.com/iss"):
+    def __init__(self, base_url: str = "https://iss.moex.com/iss", session: requests.Session | None = None):
         self.base_url = base_url.rstrip("/")
+        self.session = session or get_http_session("moex")
         self._last_call_ts = 0.0
         self._rate_lock = threading.Lock()
 
@@ -52,7 +55,7 @@ class MoexService:
             f"&securities={sec_csv}"
         )
 
-        payload = self._get_json_with_retries(url=url, retries=2)
+        payload = self._get_json_with_retries(url=url)
         securities = self._rows_to_dict(payload.get("securities") or {})
         marketdata = self._rows_to_dict(payload.get("marketdata") or {})
 
@@ -78,19 +81,15 @@ class MoexService:
             )
         return out
 
-    def _get_json_with_retries(self, url: str, retries: int = 2) -> Dict[str, Any]:
-        last_error: Exception | None = None
-        for attempt in range(retries + 1):
-            try:
-                r = requests.get(url, timeout=8, headers={"User-Agent": "FinPulse/1.0"})
-                r.raise_for_status()
-                return r.json()
-            except Exception as e:
-                last_error = e
-                if attempt < retries:
-                    time.sleep(0.5 * (attempt + 1))
-        assert last_error is not None
-        raise last_error
+    def _get_json_with_retries(self, url: str) -> Dict[str, Any]:
+        # ретраи с backoff (сетевые ошибки, 429/5xx) делает общий адаптер сессии
+        r = self.session.get(
+            url,
+            timeout=http_timeout(settings.MOEX_TIMEOUT_SEC),
+            headers={"User-Agent": "FinPulse/1.0"},
+        )
+        r.raise_for_status()
+        return r.json()
 
     def _rate_limit_wait(self) -> None:
         # Простое ограничение частоты: не чаще 5 req/sec
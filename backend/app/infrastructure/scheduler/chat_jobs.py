@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import List, Optional
+
+from app.application.use_cases.chat.chat_jobs import ChatJobs
+from app.application.use_cases.chat.chat_with_llm import ChatWithLLM
+from app.application.use_cases.chat.compact_chat import CompactChatHistory
+from app.core.settings import settings
+from app.infrastructure.database.chat_job_repo_impl import ChatJobRepoSQL
+from app.infrastructure.database.chat_repo_impl import ChatRepositorySQL
+from app.infrastructure.llm.ollama_llm_service import OllamaLLMService, get_ollama_pool, get_ollama_warmup
+
+logger = logging.getLogger(__name__)
+
+
+class ChatJobWorker:
+    """
+    Потоки, разбирающие chat_jobs. Пустая очередь опрашивается раз в poll_sec;
+    wake() будит их сразу — API зовёт его после постановки задачи в своём процессе.
+    """
+
+    def __init__(self, use_case: ChatJobs, workers: int = 1, poll_sec: float = 1.0):
+        self.use_case = use_case
+        self.workers = workers
+        self.poll_sec = poll_sec
+        self._stop = threading.Event()
+        self._wake = threading.Condition()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        if any(t.is_alive() for t in self._threads):
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self.run_forever, name=f"chat-jobs-{i}", daemon=True) for i in range(self.workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self.wake()
+        for t in self._threads:
+            t.join(timeout=timeout)
+
+    def wake(self) -> None:
+        with self._wake:
+            self._wake.notify_all()
+
+    def run_forever(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.use_case.run_next():
+                    continue
+            except Exception as e:
+                logger.exception("[ChatJobs] Ошибка воркера: %s", e)
+            with self._wake:
+                self._wake.wait(self.poll_sec)
+
+
+def build_chat_job_use_case() -> ChatJobs:
+    llm, chat_repo = OllamaLLMService(), ChatRepositorySQL()
+    chat = ChatWithLLM(llm=llm, chat_repo=chat_repo, compactor=CompactChatHistory(llm=llm, chat_repo=chat_repo))
+    return ChatJobs(chat=chat, job_repo=ChatJobRepoSQL())
+
+
+_WORKER: Optional[ChatJobWorker] = None
+
+
+def get_chat_job_worker() -> ChatJobWorker:
+    global _WORKER
+    if _WORKER is None:
+        _WORKER = ChatJobWorker(
+            build_chat_job_use_case(), workers=settings.CHAT_JOB_WORKERS, poll_sec=settings.CHAT_JOB_POLL_SEC
+        )
+    return _WORKER
+
+
+def main() -> None:
+    # Отдельный воркер: python -m app.infrastructure.scheduler.chat_jobs
+    # (в API при этом ставим CHAT_JOB_WORKER_ENABLED=false).
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    get_ollama_pool().start()
+    get_ollama_warmup().start()
+    worker = get_chat_job_worker()
+    worker.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        worker.stop()
+
+
+if __name__ == "__main__":
+    main()
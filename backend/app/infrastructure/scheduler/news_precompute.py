@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.application.use_cases.public_news.public_news import CrawlNewArticles, PrecomputePublicNews
+from app.application.use_cases.summarize_article import GetNewsFeed
+from app.core.settings import settings
+from app.infrastructure.database.base import engine
+from app.infrastructure.database.crawl_frontier_repo_impl import CrawlFrontierRepoSQL
+from app.infrastructure.database.leader_lock import PgLeaderLock
+from app.infrastructure.database.news_cache_repo_impl import NewsCacheRepoSQL
+from app.infrastructure.database.news_repo_impl import NewsRepositorySQL
+from app.infrastructure.database.news_summary_repo_impl import NewsSummaryRepoSQL
+from app.infrastructure.database.scrape_validator_repo_impl import ScrapeValidatorRepoSQL
+from app.infrastructure.llm.ollama_llm_service import OllamaLLMService, get_ollama_pool, get_ollama_warmup
+from app.infrastructure.llm.scraper_service import ScraperService
+
+logger = logging.getLogger(__name__)
+
+# Ключ pg_try_advisory_lock лидера сборки витрины ("NEWS"): на все воркеры uvicorn — один планировщик
+_LEADER_LOCK_KEY = 0x4E455753
+
+
+def _slot_start(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+class PublicNewsPrecomputeScheduler:
+    """
+    Фоновая сборка публичной витрины по часовым слотам.
+    - при старте добирает текущий слот (уже закэшированные источники пропускаются)
+    - за lead_sec до смены часа собирает следующий слот
+    - с leader_lock работает только процесс, держащий лок; остальные раз в leader_retry_sec пробуют его взять
+    """
+
+    def __init__(
+        self,
+        use_case: PrecomputePublicNews,
+        lead_sec: int = 300,
+        leader_lock: Optional[PgLeaderLock] = None,
+        leader_retry_sec: float = 60.0,
+    ):
+        self.use_case = use_case
+        self.lead_sec = lead_sec
+        self.leader_lock = leader_lock
+        self.leader_retry_sec = leader_retry_sec
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="news-precompute", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+    def run_forever(self) -> None:
+        try:
+            while self._wait_leadership():
+                self._run_slots()
+        finally:
+            if self.leader_lock is not None:
+                self.leader_lock.release()
+
+    def _wait_leadership(self) -> bool:
+        while not self._stop.is_set():
+            if self.leader_lock is None or self.leader_lock.acquire():
+                return True
+            self._stop.wait(self.leader_retry_sec)
+        return False
+
+    def _run_slots(self) -> None:
+        if self.leader_lock is not None:
+            logger.info("[Precompute] процесс стал лидером, сборка витрины идёт здесь")
+        slot = _slot_start(datetime.now(timezone.utc))
+        while True:
+            if self.leader_lock is not None and not self.leader_lock.is_held():
+                logger.warning("[Precompute] лидерство потеряно, слот %s пропущен", slot.strftime("%Y%m%d%H"))
+                return
+            self.run_once(slot)
+            # если сборка затянулась дольше часа — не догоняем пропущенные слоты
+            slot = max(slot + timedelta(hours=1), _slot_start(datetime.now(timezone.utc)))
+            if self._stop.wait(self.seconds_until_run(slot, datetime.now(timezone.utc))):
+                return
+
+    def run_once(self, slot_time: datetime) -> None:
+        try:
+            count = self.use_case.execute(slot_time=slot_time)
+            logger.info("[Precompute] slot %s: собрано %d блоков", slot_time.strftime("%Y%m%d%H"), count)
+        except Exception as e:
+            logger.exception("[Precompute] Не удалось собрать слот %s: %s", slot_time.isoformat(), e)
+
+    def seconds_until_run(self, slot_time: datetime, now: datetime) -> float:
+        run_at = slot_time - timedelta(seconds=self.lead_sec)
+        return max(0.0, (run_at - now).total_seconds())
+
+
+def build_public_news_scheduler() -> PublicNewsPrecomputeScheduler:
+    scraper = ScraperService(validator_repo=ScrapeValidatorRepoSQL())
+    generator = GetNewsFeed(
+        scraper=scraper,
+        llm=OllamaLLMService(),
+        cache_repo=NewsCacheRepoSQL(),
+        news_repo=NewsRepositorySQL(),
+        summary_repo=NewsSummaryRepoSQL(),
+    )
+    crawler = CrawlNewArticles(
+        scraper=scraper,
+        generator=generator,
+        frontier=CrawlFrontierRepoSQL(),
+        max_articles=settings.CRAWLER_MAX_ARTICLES_PER_RUN,
+        max_links_per_index=settings.CRAWLER_MAX_LINKS_PER_INDEX,
+        max_attempts=settings.CRAWLER_MAX_ATTEMPTS,
+    )
+    return PublicNewsPrecomputeScheduler(
+        use_case=PrecomputePublicNews(generator, crawler=crawler),
+        lead_sec=settings.NEWS_PRECOMPUTE_LEAD_SEC,
+        leader_lock=PgLeaderLock(engine, _LEADER_LOCK_KEY),
+    )
+
+
+def main() -> None:
+    # Отдельный воркер: python -m app.infrastructure.scheduler.news_precompute
+    # (в API при этом можно поставить NEWS_PRECOMPUTE_ENABLED=false; без этого лидера всё равно выберет лок).
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    get_ollama_pool().start()
+    get_ollama_warmup().start()
+    build_public_news_scheduler().run_forever()
+
+
+if __name__ == "__main__":
+    main()
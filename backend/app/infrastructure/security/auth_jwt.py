@@ -1,30 +1,37 @@
 from datetime import UTC, datetime, timedelta
+from typing import Optional
 
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 
 from app.application.interfaces.user import IUserRepository
 from app.core.settings import settings
+from app.domain.entities.principal import Principal
+from app.domain.entities.user import User
 from app.infrastructure.dependencies import get_user_repo
+from app.infrastructure.security.token_claims import principal_claims
 
 bearer_scheme = HTTPBearer()
 
 
 def _create_token(data: dict, expires_delta: timedelta):
     to_encode = data.copy()
-    expire = datetime.now(UTC) + expires_delta
+    now = datetime.now(UTC)
     if "sub" in to_encode:
         to_encode["sub"] = str(to_encode["sub"])
-    to_encode.update({"exp": expire})
+    to_encode.update({"iat": now, "exp": now + expires_delta})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
-def create_access_token(user_id: int, email: str):
-    return _create_token(
-        {"sub": user_id, "email": email, "type": "access"},
-        timedelta(minutes=settings.ACCESS_EXPIRE_MINUTES),
-    )
+def create_access_token(user_id: int, email: str, principal: Optional[Principal] = None):
+    """
+    principal — добавить в токен роли, права и версию ролей (см. token_claims).
+    """
+    data = {"sub": user_id, "email": email, "type": "access"}
+    if principal is not None:
+        data.update(principal_claims(principal))
+    return _create_token(data, timedelta(minutes=settings.ACCESS_EXPIRE_MINUTES))
 
 
 def create_refresh_token(user_id: int, email: str):
@@ -43,10 +50,17 @@ def decode_token(token: str):
         raise HTTPException(status_code=401, detail=f"Invalid token: {e}")
 
 
-def get_current_user(
+def get_access_payload(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-    repo: IUserRepository = Depends(get_user_repo),
-):
+) -> dict:
+    """
+    Проверенный payload access-токена; разбирается один раз на запрос.
+    """
+    cached = getattr(request.state, "access_payload", None)
+    if cached is not None:
+        return cached
+
     payload = decode_token(credentials.credentials)
 
     if payload.get("type") != "access":
@@ -57,12 +71,34 @@ def get_current_user(
         raise HTTPException(status_code=401, detail="Invalid token payload")
 
     try:
-        user_id = int(sub)
+        int(sub)
     except (TypeError, ValueError):
         raise HTTPException(status_code=401, detail="Invalid sub in token")
 
-    user = repo.get_by_id(user_id)
-    if not user:
+    request.state.access_payload = payload
+    return payload
+
+
+def get_current_principal(
+    request: Request,
+    payload: dict = Depends(get_access_payload),
+    repo: IUserRepository = Depends(get_user_repo),
+) -> Principal:
+    """
+    Пользователь с ролями и правами — один запрос к БД на весь HTTP-запрос:
+    результат лежит в request.state и переиспользуется require_permissions и хендлерами.
+    """
+    cached = getattr(request.state, "principal", None)
+    if cached is not None:
+        return cached
+
+    principal = repo.get_principal(int(payload["sub"]))
+    if not principal:
         raise HTTPException(status_code=401, detail="User not found")
 
-    return user
+    request.state.principal = principal
+    return principal
+
+
+def get_current_user(principal: Principal = Depends(get_current_principal)) -> User:
+    return principal.user
@@ -1,20 +1,28 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 
 from app.application.interfaces.user import IUserRepository
 from app.infrastructure.dependencies import get_user_repo
-from app.infrastructure.security.auth_jwt import get_current_user
+from app.infrastructure.metrics import metrics
+from app.infrastructure.security.auth_jwt import get_access_payload, get_current_principal
+from app.infrastructure.security.token_claims import claimed_permissions
 
 
 def require_permissions(required: list[str]):
     required_set = set(required)
 
     def _dep(
-        current_user=Depends(get_current_user),
+        request: Request,
+        payload: dict = Depends(get_access_payload),
         repo: IUserRepository = Depends(get_user_repo),
-    ):
-        perms = repo.get_permissions(current_user.id)
-        if not required_set.issubset(perms):
+    ) -> None:
+        # права из токена только разрешают: отказ перепроверяем по БД — вдруг права выдали после выпуска токена
+        claimed = claimed_permissions(payload)
+        if claimed is not None and required_set.issubset(claimed):
+            metrics.incr("auth.claims.hit")
+            return
+
+        principal = get_current_principal(request, payload, repo)
+        if not principal.has_permissions(required_set):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-        return current_user
 
     return _dep
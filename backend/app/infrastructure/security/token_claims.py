@@ -0,0 +1,61 @@
+from typing import Iterable, Optional
+
+from app.core.settings import settings
+from app.domain.entities.principal import Principal
+from app.infrastructure.database.principal_cache import claims_not_before, get_cached_principal, known_role_version
+from app.infrastructure.database.seed_rbac import PERMISSIONS
+from app.infrastructure.metrics import metrics
+
+# Бит i — PERMISSIONS[i]: список только дописывается в конец, иначе выданные токены поменяют смысл
+
+
+def permission_bits(permissions: Iterable[str]) -> int:
+    index = {key: i for i, key in enumerate(PERMISSIONS)}
+    bits = 0
+    for key in permissions:
+        if key in index:
+            bits |= 1 << index[key]
+    return bits
+
+
+def permissions_from_bits(bits: int) -> frozenset[str]:
+    return frozenset(key for i, key in enumerate(PERMISSIONS) if bits >> i & 1)
+
+
+def principal_claims(principal: Principal) -> dict:
+    """
+    Роли, права и версия ролей для access-токена (AUTH_TOKEN_CLAIMS_ENABLED).
+    """
+    return {
+        "roles": sorted(principal.roles),
+        "perm": permission_bits(principal.permissions),
+        "rv": principal.role_version,
+    }
+
+
+def claimed_permissions(payload: dict) -> Optional[frozenset[str]]:
+    """
+    Права из токена, если им можно верить без БД; None — проверять по БД.
+    Токен устарел, если воркер знает более новую role_version пользователя (смена ролей прошла через NOTIFY
+    или пользователь уже загружен в кэш) либо выпущен до того, как воркер начал слушать NOTIFY;
+    иначе он действует до истечения — не дольше ACCESS_EXPIRE_MINUTES.
+    """
+    if not settings.AUTH_TOKEN_CLAIMS_ENABLED or "perm" not in payload or "rv" not in payload:
+        return None
+    try:
+        user_id, role_version, bits = int(payload["sub"]), int(payload["rv"]), int(payload["perm"])
+        issued_at = float(payload.get("iat", 0))
+    except (TypeError, ValueError):
+        return None
+
+    if issued_at < claims_not_before():
+        metrics.incr("auth.claims.before_listen")
+        return None
+    known = known_role_version(user_id)
+    cached = get_cached_principal(user_id)
+    if cached is not None:
+        known = max(known or 0, cached.role_version)
+    if known is not None and role_version < known:
+        metrics.incr("auth.claims.stale")
+        return None
+    return permissions_from_bits(bits)
@@ -43,6 +43,11 @@ def register_user(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+def _access_token(repo: IUserRepository, user_id: int, email: str) -> str:
+    principal = repo.get_principal(user_id) if settings.AUTH_TOKEN_CLAIMS_ENABLED else None
+    return create_access_token(user_id, email, principal=principal)
+
+
 @router.post("/login", response_model=TokenOut)
 def login_user(
     data: LoginIn,
@@ -57,7 +62,7 @@ def login_user(
             detail="Incorrect email or password",
         )
 
-    access_token = create_access_token(user.id, user.email)
+    access_token = _access_token(repo, user.id, user.email)
     refresh_token, refresh_expires_at = create_refresh_token(user.id, user.email)
 
     repo.update_refresh_token(
@@ -96,7 +101,7 @@ def refresh_tokens(
     if payload.get("type") != "refresh":
         raise HTTPException(status_code=401, detail="Invalid token type")
 
-    access_token = create_access_token(user.id, user.email)
+    access_token = _access_token(repo, user.id, user.email)
     new_refresh_token, new_expires_at = create_refresh_token(user.id, user.email)
 
     repo.update_refresh_token(
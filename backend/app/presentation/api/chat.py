@@ -1,47 +1,213 @@
-from typing import List, Optional
+import asyncio
+import json
+import math
+from typing import AsyncIterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+import anyio
+import anyio.to_thread
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
+from app.application.interfaces.llm import LLMUnavailableError, StreamCancel
+from app.application.use_cases.chat.chat_jobs import ChatJobs
 from app.application.use_cases.chat.chat_with_llm import ChatWithLLM
+from app.core.settings import settings
+from app.domain.entities.principal import Principal
 from app.domain.entities.user import User
+from app.infrastructure.database.chat_job_repo_impl import STATUS_DONE, STATUS_FAILED, ChatJob
 from app.infrastructure.database.chat_repo_impl import ChatRepositorySQL
 from app.infrastructure.database.chat_session_repo_impl import ChatSessionRepositorySQL
-from app.infrastructure.database.user_repo_impl import UserRepositorySQL
-from app.infrastructure.dependencies import get_chat_repo, get_chat_session_repo, get_chat_use_case, get_user_repo
-from app.infrastructure.security.auth_jwt import get_current_user
+from app.infrastructure.dependencies import (
+    get_chat_jobs_use_case,
+    get_chat_repo,
+    get_chat_session_repo,
+    get_chat_use_case,
+)
+from app.infrastructure.metrics import metrics
+from app.infrastructure.scheduler.chat_jobs import get_chat_job_worker
+from app.infrastructure.security.auth_jwt import get_current_principal, get_current_user
 from app.infrastructure.security.authz import require_permissions
-from app.presentation.schemas.chat import ChatCreateIn, ChatIn, ChatMessageOut, ChatOut, ChatSessionOut
+from app.presentation.schemas.chat import (
+    ChatCreateIn,
+    ChatIn,
+    ChatJobOut,
+    ChatMessageOut,
+    ChatOut,
+    ChatSessionOut,
+)
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
 
-def _can_multi(roles: set[str]) -> bool:
+def _can_multi(roles: frozenset[str]) -> bool:
     return "admin" in roles or "pro" in roles
 
 
+def _resolve_chat_id(
+    chat_id: Optional[int],
+    principal: Principal,
+    chat_session_repo: ChatSessionRepositorySQL,
+) -> int:
+    current_user = principal.user
+
+    if not _can_multi(principal.roles) or chat_id is None:
+        return chat_session_repo.get_or_create_default(current_user.id).id
+
+    chat_session_repo.ensure_owner(chat_id=chat_id, user_id=current_user.id)
+    return chat_id
+
+
+def _sse(data: dict, event: Optional[str] = None) -> str:
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _llm_unavailable(e: LLMUnavailableError) -> HTTPException:
+    metrics.incr("chat.llm_unavailable")
+    return HTTPException(
+        status_code=503,
+        detail="LLM_UNAVAILABLE",
+        headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+    )
+
+
+_STREAM_END = object()
+
+# Шаг опроса chat_jobs при ожидании результата в GET /chat/jobs/{id}?wait=
+_JOB_WAIT_STEP_SEC = 0.5
+
+
+def _job_out(job: ChatJob) -> ChatJobOut:
+    return ChatJobOut(job_id=job.id, chat_id=job.chat_id, status=job.status, answer=job.answer, error=job.error)
+
+
 @router.post("/send", response_model=ChatOut, dependencies=[Depends(require_permissions(["chat:use"]))])
 def send_message(
     body: ChatIn,
     current_user: User = Depends(get_current_user),
     use_case: ChatWithLLM = Depends(get_chat_use_case),
     chat_session_repo: ChatSessionRepositorySQL = Depends(get_chat_session_repo),
-    user_repo: UserRepositorySQL = Depends(get_user_repo),
+    principal: Principal = Depends(get_current_principal),
 ):
-    roles = user_repo.get_roles(current_user.id)
-
-    if not _can_multi(roles):
-        effective_chat_id = chat_session_repo.get_or_create_default(current_user.id).id
-    else:
-        if body.chat_id is None:
-            effective_chat_id = chat_session_repo.get_or_create_default(current_user.id).id
-        else:
-            chat_session_repo.ensure_owner(chat_id=body.chat_id, user_id=current_user.id)
-            effective_chat_id = body.chat_id
-
-    answer = use_case.execute(user_id=current_user.id, user_message=body.message, chat_id=effective_chat_id)
+    effective_chat_id = _resolve_chat_id(body.chat_id, principal, chat_session_repo)
+
+    try:
+        answer = use_case.execute(user_id=current_user.id, user_message=body.message, chat_id=effective_chat_id)
+    except LLMUnavailableError as e:
+        raise _llm_unavailable(e)
     return ChatOut(answer=answer, chat_id=effective_chat_id)
 
 
+@router.post(
+    "/jobs", response_model=ChatJobOut, status_code=202, dependencies=[Depends(require_permissions(["chat:use"]))]
+)
+def submit_chat_job(
+    body: ChatIn,
+    current_user: User = Depends(get_current_user),
+    jobs: ChatJobs = Depends(get_chat_jobs_use_case),
+    chat_session_repo: ChatSessionRepositorySQL = Depends(get_chat_session_repo),
+    principal: Principal = Depends(get_current_principal),
+):
+    """
+    Сохраняет вопрос и ставит генерацию ответа в очередь; ответ — GET /chat/jobs/{job_id}.
+    """
+    effective_chat_id = _resolve_chat_id(body.chat_id, principal, chat_session_repo)
+
+    try:
+        job = jobs.submit(user_id=current_user.id, user_message=body.message, chat_id=effective_chat_id)
+    except LLMUnavailableError as e:
+        raise _llm_unavailable(e)
+    if settings.CHAT_JOB_WORKER_ENABLED:
+        get_chat_job_worker().wake()
+    return _job_out(job)
+
+
+@router.get("/jobs/{job_id}", response_model=ChatJobOut, dependencies=[Depends(require_permissions(["chat:use"]))])
+async def get_chat_job(
+    job_id: int,
+    wait: float = Query(default=0, ge=0),
+    current_user: User = Depends(get_current_user),
+    jobs: ChatJobs = Depends(get_chat_jobs_use_case),
+):
+    """
+    Состояние задачи. wait > 0 — long-poll: ответ придёт, как только задача завершится
+    (не дольше CHAT_JOB_WAIT_MAX_SEC); между проверками поток не занят.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + min(wait, settings.CHAT_JOB_WAIT_MAX_SEC)
+    while True:
+        job = await run_in_threadpool(jobs.get, current_user.id, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="JOB_NOT_FOUND")
+        if job.status in (STATUS_DONE, STATUS_FAILED) or loop.time() >= deadline:
+            return _job_out(job)
+        await asyncio.sleep(_JOB_WAIT_STEP_SEC)
+
+
+@router.post("/stream", dependencies=[Depends(require_permissions(["chat:use"]))])
+async def stream_message(
+    body: ChatIn,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    use_case: ChatWithLLM = Depends(get_chat_use_case),
+    chat_session_repo: ChatSessionRepositorySQL = Depends(get_chat_session_repo),
+    principal: Principal = Depends(get_current_principal),
+):
+    """
+    Ответ модели как Server-Sent Events:
+    data: {"delta": "..."} на каждый кусок, в конце event: done с chat_id, при сбое event: error.
+    Если клиент отключился, генерация отменяется, ответ не сохраняется.
+    LLM недоступен заранее (разомкнут предохранитель) — сразу 503 с Retry-After, без потока.
+    """
+    try:
+        use_case.ensure_llm_available()
+    except LLMUnavailableError as e:
+        raise _llm_unavailable(e)
+
+    effective_chat_id = await run_in_threadpool(_resolve_chat_id, body.chat_id, principal, chat_session_repo)
+    cancel = StreamCancel()
+    chunks = use_case.stream(
+        user_id=current_user.id, user_message=body.message, chat_id=effective_chat_id, cancel=cancel
+    )
+
+    async def _events() -> AsyncIterator[str]:
+        # True, пока next(chunks) выполняется в потоке: такой генератор закрывать нельзя
+        in_flight = False
+        try:
+            while True:
+                if await request.is_disconnected():
+                    metrics.incr("chat.stream.cancelled")
+                    return
+                in_flight = True
+                try:
+                    # ожидание токена отменяемо: при разрыве соединения не ждём, пока поток дочитает
+                    chunk = await anyio.to_thread.run_sync(next, chunks, _STREAM_END, abandon_on_cancel=True)
+                except Exception:
+                    in_flight = False
+                    metrics.incr("chat.stream.errors")
+                    yield _sse({"detail": "LLM_UNAVAILABLE"}, event="error")
+                    return
+                in_flight = False
+                if chunk is _STREAM_END:
+                    break
+                yield _sse({"delta": chunk})
+            yield _sse({"chat_id": effective_chat_id}, event="done")
+        finally:
+            # в том числе при отмене задачи Starlette на разрыве соединения: без shield первый же await
+            # здесь снова получил бы отмену, и генератор LLM остался бы незакрытым
+            with anyio.CancelScope(shield=True):
+                cancel.cancel()
+                if not in_flight:
+                    await run_in_threadpool(chunks.close)
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get(
     "/history", response_model=List[ChatMessageOut], dependencies=[Depends(require_permissions(["chat:history_read"]))]
 )
@@ -51,18 +217,9 @@ def get_history(
     current_user: User = Depends(get_current_user),
     repo: ChatRepositorySQL = Depends(get_chat_repo),
     chat_session_repo: ChatSessionRepositorySQL = Depends(get_chat_session_repo),
-    user_repo: UserRepositorySQL = Depends(get_user_repo),
+    principal: Principal = Depends(get_current_principal),
 ):
-    roles = user_repo.get_roles(current_user.id)
-
-    if not _can_multi(roles):
-        effective_chat_id = chat_session_repo.get_or_create_default(current_user.id).id
-    else:
-        if chat_id is None:
-            effective_chat_id = chat_session_repo.get_or_create_default(current_user.id).id
-        else:
-            chat_session_repo.ensure_owner(chat_id=chat_id, user_id=current_user.id)
-            effective_chat_id = chat_id
+    effective_chat_id = _resolve_chat_id(chat_id, principal, chat_session_repo)
 
     messages = repo.get_last_messages(user_id=current_user.id, limit=limit, chat_id=effective_chat_id)
     return [ChatMessageOut(id=m.id, role=m.role, content=m.content, created_at=m.timestamp) for m in messages]
@@ -72,11 +229,9 @@ def get_history(
 def list_chats(
     current_user: User = Depends(get_current_user),
     chat_repo: ChatSessionRepositorySQL = Depends(get_chat_session_repo),
-    user_repo: UserRepositorySQL = Depends(get_user_repo),
+    principal: Principal = Depends(get_current_principal),
 ):
-    roles = user_repo.get_roles(current_user.id)
-
-    if not _can_multi(roles):
+    if not _can_multi(principal.roles):
         default = chat_repo.get_or_create_default(current_user.id)
         return [ChatSessionOut(id=default.id, title=default.title, topic=default.topic, is_default=True)]
 
@@ -93,10 +248,9 @@ def create_chat(
     body: ChatCreateIn,
     current_user: User = Depends(get_current_user),
     chat_repo: ChatSessionRepositorySQL = Depends(get_chat_session_repo),
-    user_repo: UserRepositorySQL = Depends(get_user_repo),
+    principal: Principal = Depends(get_current_principal),
 ):
-    roles = user_repo.get_roles(current_user.id)
-    if not _can_multi(roles):
+    if not _can_multi(principal.roles):
         raise HTTPException(status_code=403, detail="ONLY_PRO_OR_ADMIN_CAN_CREATE_CHATS")
 
     chat = chat_repo.create_chat(current_user.id, title=body.title, topic=body.topic)
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends
+
+from app.infrastructure.metrics import metrics
+from app.infrastructure.security.authz import require_permissions
+
+router = APIRouter(tags=["Health"])
+
+
+# счётчики и состояние пулов/кэшей — внутренняя информация, только для админов
+@router.get("/metrics", dependencies=[Depends(require_permissions(["metrics:read"]))])
+def get_metrics():
+    return metrics.snapshot()
@@ -1,4 +1,5 @@
 import logging
+from typing import Optional
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
@@ -7,14 +8,20 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from app.core.settings import settings
 from app.infrastructure.database.base import Base, engine
+from app.infrastructure.database.principal_cache import get_principal_cache_listener
 from app.infrastructure.database.seed_rbac import seed_rbac
+from app.infrastructure.http.client import close_http_sessions
+from app.infrastructure.llm.ollama_llm_service import get_llm_breaker, get_ollama_pool, get_ollama_warmup
 from app.infrastructure.middleware import ErrorHandlingMiddleware, LoggingMiddleware
+from app.infrastructure.scheduler.chat_jobs import get_chat_job_worker
+from app.infrastructure.scheduler.news_precompute import PublicNewsPrecomputeScheduler, build_public_news_scheduler
 from app.presentation.api.admin_users import router as admin_users_router
 from app.presentation.api.auth import router as auth_router
 from app.presentation.api.chat import router as chat_router
 from app.presentation.api.files import router as files_router
 from app.presentation.api.me import router as me_router
 from app.presentation.api.meta import router as options_router
+from app.presentation.api.metrics import router as metrics_router
 from app.presentation.api.profile import router as profile_router
 from app.presentation.api.public_moex import router as public_moex_router
 from app.presentation.api.seo import router as seo_router
@@ -28,11 +35,35 @@ logging.basicConfig(
 
 app = FastAPI(title="FinPulse API", version="1.0")
 
+# создаётся при старте, а не при импорте: импорт main (тесты, воркеры) не собирает use case ленты
+news_scheduler: Optional[PublicNewsPrecomputeScheduler] = None
+
 
 @app.on_event("startup")
 def startup():
+    global news_scheduler
     Base.metadata.create_all(bind=engine)
     seed_rbac(admin_email=getattr(settings, "ADMIN_EMAIL", None))
+    get_principal_cache_listener().start()
+    get_ollama_pool().start()
+    # модель грузится в фоне: старт API не ждёт Ollama
+    get_ollama_warmup().start()
+    if settings.NEWS_PRECOMPUTE_ENABLED:
+        news_scheduler = build_public_news_scheduler()
+        news_scheduler.start()
+    if settings.CHAT_JOB_WORKER_ENABLED:
+        get_chat_job_worker().start()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    if news_scheduler is not None:
+        news_scheduler.stop()
+    get_chat_job_worker().stop()
+    get_principal_cache_listener().stop()
+    get_ollama_warmup().stop()
+    get_ollama_pool().stop()
+    close_http_sessions()
 
 
 app.add_middleware(
@@ -58,6 +89,7 @@ app.include_router(files_router)
 app.include_router(public_news)
 app.include_router(public_moex_router)
 app.include_router(seo_router)
+app.include_router(metrics_router)
 
 
 @app.get("/")
@@ -72,9 +104,10 @@ def healthz():
 
 @app.get("/readyz", tags=["Health"])
 def readyz():
+    # LLM на готовность не влияет: без него лента отдаётся из кэша и заглушками
     try:
         with engine.connect() as conn:
             conn.execute(text("SELECT 1"))
-        return {"status": "ready"}
+        return {"status": "ready", "llm": get_llm_breaker().state}
     except SQLAlchemyError:
         raise HTTPException(status_code=503, detail="not_ready")
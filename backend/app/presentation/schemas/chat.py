@@ -14,6 +14,14 @@ class ChatOut(BaseModel):
     chat_id: int
 
 
+class ChatJobOut(BaseModel):
+    job_id: int
+    chat_id: int
+    status: str  # queued / processing / done / failed
+    answer: Optional[str] = None
+    error: Optional[str] = None
+
+
 class ChatMessageOut(BaseModel):
     id: int
     role: str  # "user" / "assistant"
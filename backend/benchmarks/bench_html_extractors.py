@@ -0,0 +1,98 @@
+"""
+Сравнение движков извлечения текста (BeautifulSoup vs lxml) на сохранённых страницах.
+
+    python -m benchmarks.bench_html_extractors [каталог_с_html] [--repeat N] [--max-chars N]
+
+По каждому движку: страниц/с, МБ/с, пиковая память на один разбор (tracemalloc)
+и совпадение извлечённого текста с эталоном bs4. С --max-chars добавляется потоковый
+разбор lxml с ранней остановкой (совпадение сравнивается по первым max_chars символам).
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from app.infrastructure.llm.html_extractors import Bs4HtmlExtractor, HtmlExtractor, LxmlHtmlExtractor
+
+DEFAULT_FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "html"
+
+
+def _load_pages(directory: Path) -> List[Tuple[str, str]]:
+    return [(p.name, p.read_text(encoding="utf-8", errors="replace")) for p in sorted(directory.glob("*.html"))]
+
+
+def _peak_kb(extract: Callable[[str], Optional[str]], html: str) -> float:
+    tracemalloc.start()
+    try:
+        extract(html)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def _streaming(extractor: HtmlExtractor, max_chars: int, chunk_chars: int = 16_384) -> Callable[[str], Optional[str]]:
+    def _extract(html: str) -> Optional[str]:
+        incremental = extractor.start_incremental(max_chars)
+        for start in range(0, len(html), chunk_chars):
+            if incremental.feed(html[start : start + chunk_chars]):
+                break
+        return incremental.close()
+
+    return _extract
+
+
+def run(directory: Path, repeat: int, max_chars: Optional[int] = None) -> None:
+    pages = _load_pages(directory)
+    if not pages:
+        raise SystemExit(f"В {directory} нет *.html")
+
+    total_bytes = sum(len(html.encode("utf-8")) for _, html in pages)
+    reference = Bs4HtmlExtractor()
+    expected = {name: reference.extract(html) for name, html in pages}
+
+    print(f"страниц: {len(pages)}, объём: {total_bytes / 1024:.1f} КБ, повторов: {repeat}")
+    print(f"{'движок':<8} {'стр/с':>10} {'МБ/с':>8} {'пик КБ':>9} {'совпало':>9}")
+
+    lxml = LxmlHtmlExtractor()
+    engines = [("bs4", Bs4HtmlExtractor().extract, None), ("lxml", lxml.extract, None)]
+    if max_chars:
+        engines.append(("stream", _streaming(lxml, max_chars), max_chars))
+
+    for name, extract, cut in engines:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for _, html in pages:
+                extract(html)
+        elapsed = time.perf_counter() - started
+
+        pages_per_sec = len(pages) * repeat / elapsed
+        mb_per_sec = total_bytes * repeat / elapsed / (1024 * 1024)
+        peak = max(_peak_kb(extract, html) for _, html in pages)
+        mismatched = [
+            page for page, html in pages if (extract(html) or "")[:cut] != (expected[page] or "")[:cut]
+        ]
+
+        print(
+            f"{name:<8} {pages_per_sec:>10.1f} {mb_per_sec:>8.2f} {peak:>9.1f} "
+            f"{len(pages) - len(mismatched):>4}/{len(pages):<4}"
+        )
+        for name in mismatched:
+            print(f"  расхождение: {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", nargs="?", type=Path, default=DEFAULT_FIXTURES)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--max-chars", type=int, default=None)
+    args = parser.parse_args()
+    run(args.directory, args.repeat, args.max_chars)
+
+
+if __name__ == "__main__":
+    main()
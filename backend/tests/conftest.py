@@ -11,6 +11,7 @@ from fastapi.testclient import TestClient
 
 from app.core.constants import MARKET_RU
 from app.domain.entities.news_block import NewsBlock, NewsIndicator
+from app.domain.entities.principal import Principal
 from app.domain.entities.user import User
 # Ensure settings can be initialized in tests without relying on local .env location.
 os.environ.setdefault("POSTGRES_USER", "test")
@@ -45,9 +46,11 @@ from app.infrastructure.dependencies import (
 from app.infrastructure.security.auth_jwt import create_access_token
 from app.presentation.api.admin_users import router as admin_users_router
 from app.presentation.api.auth import router as auth_router
+from app.presentation.api.chat import router as chat_router
 from app.presentation.api.files import router as files_router
 from app.presentation.api.me import router as me_router
 from app.presentation.api.meta import router as meta_router
+from app.presentation.api.metrics import router as metrics_router
 from app.presentation.api.public_moex import router as public_moex_router
 from app.presentation.api.public_news import router as public_news_router
 
@@ -79,12 +82,14 @@ ROLE_PERMS = {
         "profile:update_own",
         "admin_users:assign_role",
         "admin_users:list",
+        "metrics:read",
     ],
 }
 
 
 class InMemoryUserRepo:
     def __init__(self) -> None:
+        self.principal_calls = 0
         self._id_seq = 0
         self._users: dict[int, User] = {}
         self._roles: dict[int, set[str]] = {}
@@ -136,6 +141,17 @@ class InMemoryUserRepo:
             perms.update(ROLE_PERMS.get(role, []))
         return perms
 
+    def get_principal(self, user_id: int) -> Principal | None:
+        self.principal_calls += 1
+        user = self.get_by_id(user_id)
+        if user is None:
+            return None
+        return Principal(
+            user=user,
+            roles=frozenset(self.get_roles(user_id)),
+            permissions=frozenset(self.get_permissions(user_id)),
+        )
+
     def set_roles(self, user_id: int, role_names: list[str]) -> set[str]:
         if user_id not in self._users:
             raise ValueError("User not found")
@@ -391,9 +407,11 @@ def test_app(fake_user_repo, fake_chat_repo, fake_file_repo, fake_moex_service)
     app = FastAPI(title="FinPulse Test API")
     app.include_router(auth_router)
     app.include_router(me_router)
+    app.include_router(chat_router)
     app.include_router(admin_users_router)
     app.include_router(files_router)
     app.include_router(meta_router)
+    app.include_router(metrics_router)
     app.include_router(public_moex_router)
     app.include_router(public_news_router)
 
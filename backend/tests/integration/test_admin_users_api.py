@@ -1,5 +1,9 @@
 import pytest
 
+from app.core.settings import settings
+from app.infrastructure.database import principal_cache
+from app.infrastructure.security.auth_jwt import create_access_token
+
 
 @pytest.mark.integration
 def test_admin_users_list_forbidden_without_permission(client, auth_headers_for):
@@ -27,3 +31,33 @@ def test_set_roles_returns_400_for_unknown_role(client, auth_headers_for):
         json={"roles": ["superadmin"]},
     )
     assert res.status_code == 400
+
+
+@pytest.mark.integration
+def test_protected_request_loads_principal_once(client, auth_headers_for, fake_user_repo):
+    headers = auth_headers_for("user@example.com")
+    fake_user_repo.principal_calls = 0
+
+    # require_permissions, get_current_user и проверка ролей в хендлере
+    res = client.get("/chat", headers=headers)
+
+    assert res.status_code == 200
+    assert fake_user_repo.principal_calls == 1
+
+
+@pytest.mark.integration
+def test_token_claims_authorize_without_db_until_role_version_bump(client, fake_user_repo, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_TOKEN_CLAIMS_ENABLED", True)
+    monkeypatch.setattr(principal_cache, "_ROLE_VERSIONS", {})
+    admin = fake_user_repo.get_by_email("admin@example.com")
+    token = create_access_token(admin.id, admin.email, principal=fake_user_repo.get_principal(admin.id))
+    headers = {"Authorization": f"Bearer {token}"}
+    fake_user_repo.principal_calls = 0
+
+    assert client.get("/admin/users", headers=headers).status_code == 200
+    assert fake_user_repo.principal_calls == 0
+
+    # роли сменились в другом воркере: NOTIFY принёс новую версию, токен перепроверяется по БД
+    principal_cache.PrincipalCacheListener(engine=None).handle(f"{admin.id}:1")
+    assert client.get("/admin/users", headers=headers).status_code == 200
+    assert fake_user_repo.principal_calls == 1
@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.infrastructure.database.base import Base
+from app.infrastructure.database.chat_job_repo_impl import STATUS_PROCESSING, STATUS_QUEUED, ChatJobRepoSQL
+from app.infrastructure.database.models import ChatJobModel, ChatMessageModel, ChatSessionModel, UserModel
+
+# Нужен настоящий Postgres (SKIP LOCKED, advisory-локи, частичный индекс): TEST_DATABASE_URL=postgresql+psycopg2://...
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL не задан")
+
+
+class SlowCommitSession(Session):
+    """
+    Держит транзакцию claim открытой: соседний воркер успевает выбрать задачи до нашего commit.
+    """
+
+    def commit(self) -> None:
+        time.sleep(0.5)
+        super().commit()
+
+
+@pytest.fixture
+def pg_engine():
+    engine = create_engine(TEST_DATABASE_URL, future=True)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def chat_with_two_jobs(pg_engine):
+    factory = sessionmaker(bind=pg_engine, expire_on_commit=False)
+    with factory() as session:
+        user = UserModel(name="u", email="u@example.com", password_hash="hash")
+        session.add(user)
+        session.flush()
+        chat = ChatSessionModel(owner_id=user.id, title="t", is_default=True)
+        session.add(chat)
+        session.flush()
+        for text in ("q1", "q2"):
+            msg = ChatMessageModel(user_id=user.id, chat_id=chat.id, role="user", content=text)
+            session.add(msg)
+            session.flush()
+            session.add(ChatJobModel(user_id=user.id, chat_id=chat.id, message_id=msg.id, status=STATUS_QUEUED))
+        session.commit()
+        return chat.id
+
+
+@pytest.mark.integration
+def test_concurrent_claimers_take_at_most_one_job_per_chat(pg_engine, chat_with_two_jobs):
+    repo = ChatJobRepoSQL(sessionmaker(bind=pg_engine, class_=SlowCommitSession, expire_on_commit=False))
+    claimed: list = []
+    start = threading.Barrier(2)
+
+    def _claim() -> None:
+        start.wait()
+        claimed.extend(repo.claim(limit=2))
+
+    threads = [threading.Thread(target=_claim) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert [job.question.content for job in claimed] == ["q1"]
+    with sessionmaker(bind=pg_engine)() as session:
+        statuses = [s for (s,) in session.query(ChatJobModel.status).order_by(ChatJobModel.id)]
+    assert statuses == [STATUS_PROCESSING, STATUS_QUEUED]
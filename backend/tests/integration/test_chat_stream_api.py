@@ -0,0 +1,192 @@
+import json
+import threading
+
+import anyio
+import pytest
+
+from app.application.interfaces.llm import LLMUnavailableError
+from app.infrastructure.database.chat_job_repo_impl import STATUS_DONE, STATUS_QUEUED, ChatJob
+from app.infrastructure.dependencies import get_chat_jobs_use_case, get_chat_use_case
+
+
+class FakeStreamingChat:
+    def __init__(self, chunks: list[str], fail_after: int | None = None, retry_after: float | None = None) -> None:
+        self.chunks = chunks
+        self.fail_after = fail_after
+        self.retry_after = retry_after
+        self.calls: list[dict] = []
+
+    def ensure_llm_available(self) -> None:
+        if self.retry_after is not None:
+            raise LLMUnavailableError(retry_after=self.retry_after)
+
+    def execute(self, user_id: int, user_message: str, chat_id: int | None = None) -> str:
+        self.ensure_llm_available()
+        return "".join(self.stream(user_id, user_message, chat_id))
+
+    def stream(self, user_id: int, user_message: str, chat_id: int | None = None, cancel=None):
+        self.calls.append({"user_id": user_id, "message": user_message, "chat_id": chat_id})
+        for i, chunk in enumerate(self.chunks):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise RuntimeError("Ollama unreachable")
+            yield chunk
+
+
+def _events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = "message", None
+        for line in block.splitlines():
+            if line.startswith("event: "):
+                event = line[len("event: ") :]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: ") :])
+        events.append((event, data))
+    return events
+
+
+@pytest.mark.integration
+def test_chat_stream_sends_deltas_then_done(client, test_app, auth_headers_for, fake_chat_repo, fake_user_repo):
+    fake = FakeStreamingChat(["Индекс ", "вырос"])
+    test_app.dependency_overrides[get_chat_use_case] = lambda: fake
+    user = fake_user_repo.get_by_email("user@example.com")
+
+    response = client.post("/chat/stream", json={"message": "Что с рынком?"}, headers=auth_headers_for(user.email))
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    default_chat_id = fake_chat_repo.get_or_create_default(user.id).id
+    assert _events(response.text) == [
+        ("message", {"delta": "Индекс "}),
+        ("message", {"delta": "вырос"}),
+        ("done", {"chat_id": default_chat_id}),
+    ]
+    assert fake.calls == [{"user_id": user.id, "message": "Что с рынком?", "chat_id": default_chat_id}]
+
+
+@pytest.mark.integration
+def test_chat_stream_reports_llm_failure_as_error_event(client, test_app, auth_headers_for):
+    test_app.dependency_overrides[get_chat_use_case] = lambda: FakeStreamingChat(["a", "b"], fail_after=1)
+
+    response = client.post("/chat/stream", json={"message": "q"}, headers=auth_headers_for("user@example.com"))
+
+    assert _events(response.text) == [("message", {"delta": "a"}), ("error", {"detail": "LLM_UNAVAILABLE"})]
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("path", ["/chat/send", "/chat/stream"])
+def test_chat_fails_fast_with_retry_after_while_llm_circuit_is_open(client, test_app, auth_headers_for, path):
+    fake = FakeStreamingChat(["a"], retry_after=12.3)
+    test_app.dependency_overrides[get_chat_use_case] = lambda: fake
+
+    response = client.post(path, json={"message": "q"}, headers=auth_headers_for("user@example.com"))
+
+    assert response.status_code == 503
+    assert response.json() == {"detail": "LLM_UNAVAILABLE"}
+    assert response.headers["Retry-After"] == "13"
+    assert fake.calls == []
+
+
+class FakeChatJobs:
+    def __init__(self) -> None:
+        self.jobs: dict[int, ChatJob] = {}
+
+    def submit(self, user_id: int, user_message: str, chat_id: int | None = None) -> ChatJob:
+        job = ChatJob(id=len(self.jobs) + 1, user_id=user_id, chat_id=chat_id, status=STATUS_QUEUED)
+        self.jobs[job.id] = job
+        return job
+
+    def get(self, user_id: int, job_id: int) -> ChatJob | None:
+        job = self.jobs.get(job_id)
+        return job if job and job.user_id == user_id else None
+
+
+@pytest.mark.integration
+def test_chat_job_is_accepted_immediately_and_polled_until_done(client, test_app, auth_headers_for):
+    fake = FakeChatJobs()
+    test_app.dependency_overrides[get_chat_jobs_use_case] = lambda: fake
+    headers = auth_headers_for("user@example.com")
+
+    accepted = client.post("/chat/jobs", json={"message": "q"}, headers=headers)
+    assert accepted.status_code == 202
+    job_id = accepted.json()["job_id"]
+    assert accepted.json()["status"] == STATUS_QUEUED
+
+    fake.jobs[job_id].status, fake.jobs[job_id].answer = STATUS_DONE, "ответ"
+    polled = client.get(f"/chat/jobs/{job_id}", params={"wait": 5}, headers=headers)
+    assert polled.json()["status"] == STATUS_DONE and polled.json()["answer"] == "ответ"
+
+    other = client.get(f"/chat/jobs/{job_id}", headers=auth_headers_for("admin@example.com"))
+    assert other.status_code == 404
+
+
+class BlockingStreamingChat:
+    """
+    Первый кусок сразу, второй — только после отмены: поток "ждёт токен", когда клиент уходит.
+    """
+
+    def __init__(self) -> None:
+        self.waiting = threading.Event()
+        self.finished = threading.Event()
+        self.cancelled = False
+
+    def ensure_llm_available(self) -> None:
+        pass
+
+    def stream(self, user_id: int, user_message: str, chat_id: int | None = None, cancel=None):
+        released = threading.Event()
+        cancel.on_cancel(released.set)
+        try:
+            yield "a"
+            self.waiting.set()
+            self.cancelled = released.wait(5)
+        finally:
+            # здесь реальный сервис отпускает слот очереди и бэкенд Ollama
+            self.finished.set()
+
+
+@pytest.mark.integration
+def test_client_disconnect_cancels_stream_waiting_for_next_token(test_app, auth_headers_for):
+    fake = BlockingStreamingChat()
+    test_app.dependency_overrides[get_chat_use_case] = lambda: fake
+    headers = [(k.lower().encode(), v.encode()) for k, v in auth_headers_for("user@example.com").items()]
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/chat/stream",
+        "raw_path": b"/chat/stream",
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers + [(b"content-type", b"application/json")],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    sent: list[dict] = []
+
+    async def _run() -> None:
+        requested = False
+
+        async def receive() -> dict:
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": b'{"message": "q"}', "more_body": False}
+            # клиент уходит, когда поток уже ждёт второй кусок
+            while not fake.waiting.is_set():
+                await anyio.sleep(0.01)
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict) -> None:
+            sent.append(message)
+
+        with anyio.fail_after(5):
+            await test_app(scope, receive, send)
+
+    anyio.run(_run)
+
+    assert fake.finished.wait(5) and fake.cancelled
+    bodies = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    assert b'"delta": "a"' in bodies and b"event: done" not in bodies
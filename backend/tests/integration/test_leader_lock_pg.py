@@ -0,0 +1,34 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.infrastructure.database.leader_lock import PgLeaderLock
+
+# Нужен настоящий Postgres (advisory-локи): TEST_DATABASE_URL=postgresql+psycopg2://...
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL не задан")
+
+KEY = 0x54455354
+
+
+@pytest.fixture
+def pg_engine():
+    engine = create_engine(TEST_DATABASE_URL, future=True)
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.integration
+def test_single_leader_until_release(pg_engine):
+    leader, follower = PgLeaderLock(pg_engine, KEY), PgLeaderLock(pg_engine, KEY)
+
+    assert leader.acquire() is True
+    assert follower.acquire() is False
+    assert leader.is_held() is True
+
+    leader.release()
+    assert leader.is_held() is False
+    assert follower.acquire() is True
+    follower.release()
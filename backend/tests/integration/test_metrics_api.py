@@ -0,0 +1,20 @@
+import pytest
+
+
+@pytest.mark.integration
+def test_metrics_requires_auth(client):
+    # HTTPBearer без заголовка Authorization отвечает 403
+    assert client.get("/metrics").status_code == 403
+
+
+@pytest.mark.integration
+def test_metrics_forbidden_for_regular_user(client, auth_headers_for):
+    res = client.get("/metrics", headers=auth_headers_for("user@example.com"))
+    assert res.status_code == 403
+
+
+@pytest.mark.integration
+def test_metrics_available_to_admin(client, auth_headers_for):
+    res = client.get("/metrics", headers=auth_headers_for("admin@example.com"))
+    assert res.status_code == 200
+    assert isinstance(res.json(), dict)
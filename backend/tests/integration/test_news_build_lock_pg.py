@@ -0,0 +1,48 @@
+import os
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.database.news_cache_repo_impl import NewsCacheRepoSQL
+
+# Нужен настоящий Postgres (advisory-локи): TEST_DATABASE_URL=postgresql+psycopg2://...
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL не задан")
+
+
+@pytest.fixture
+def pg_engine():
+    engine = create_engine(TEST_DATABASE_URL, future=True)
+    yield engine
+    engine.dispose()
+
+
+def _locks_and_idle_tx(engine) -> tuple[int, int]:
+    with engine.connect() as conn:
+        locks = conn.execute(text("SELECT count(*) FROM pg_locks WHERE locktype = 'advisory'")).scalar()
+        idle_tx = conn.execute(
+            text(
+                "SELECT count(*) FROM pg_stat_activity "
+                "WHERE datname = current_database() AND state = 'idle in transaction'"
+            )
+        ).scalar()
+    return locks, idle_tx
+
+
+@pytest.mark.integration
+def test_build_lock_is_exclusive_and_holds_no_open_transaction(pg_engine):
+    repo = NewsCacheRepoSQL(sessionmaker(bind=pg_engine, expire_on_commit=False))
+    args = {"cache_date": date(2025, 1, 10), "category": "macro", "url": "https://example.com/a/1"}
+
+    with repo.build_lock(**args) as first:
+        assert first is True
+        assert _locks_and_idle_tx(pg_engine) == (1, 0)
+        with repo.build_lock(**args, timeout_sec=0.3) as second:
+            assert second is False
+
+    assert _locks_and_idle_tx(pg_engine)[0] == 0
+    with repo.build_lock(**args, timeout_sec=0.3) as again:
+        assert again is True
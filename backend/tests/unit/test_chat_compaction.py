@@ -0,0 +1,100 @@
+import datetime
+import itertools
+
+import pytest
+
+from app.application.interfaces.llm import ILLMService
+from app.application.use_cases.chat.chat_with_llm import ChatWithLLM
+from app.application.use_cases.chat.compact_chat import CompactChatHistory
+from app.core.constants import LLM_PRIORITY_BACKGROUND
+from app.domain.entities.chat_message import ChatMessage
+from app.infrastructure.database.chat_repo_impl import ChatSummary
+
+
+class MemoryChatRepo:
+    def __init__(self) -> None:
+        self.messages: list[ChatMessage] = []
+        self.summaries: dict[int, ChatSummary] = {}
+        self._ids = itertools.count(1)
+
+    def add_message(self, message, chat_id=None):
+        message.id = next(self._ids)
+        message.chat_id = chat_id
+        self.messages.append(message)
+        return message
+
+    def get_last_messages(self, user_id, limit=20, chat_id=None):
+        return [m for m in self.messages if m.chat_id == chat_id][-limit:]
+
+    def get_recent_within_budget(self, user_id, chat_id, budget_tokens, after_id=None, max_rows=50):
+        picked, used = [], 0
+        for m in reversed([m for m in self.messages if m.chat_id == chat_id and (m.id or 0) > (after_id or 0)]):
+            used += m.token_count or 0
+            if used > budget_tokens or len(picked) >= max_rows:
+                break
+            picked.append(m)
+        return picked[::-1]
+
+    def get_messages_after(self, user_id, chat_id, after_id, limit):
+        return [m for m in self.messages if m.chat_id == chat_id and m.id > (after_id or 0)][:limit]
+
+    def get_summary(self, chat_id):
+        return self.summaries.get(chat_id)
+
+    def save_summary(self, chat_id, text, upto_message_id, expected_upto):
+        current = self.summaries.get(chat_id)
+        if (current.upto_message_id if current else None) != expected_upto:
+            return False
+        self.summaries[chat_id] = ChatSummary(text, upto_message_id)
+        return True
+
+
+class RecordingLLM(ILLMService):
+    def __init__(self) -> None:
+        self.prompts: list[tuple[str, dict]] = []
+
+    def chat(self, prompt, user_context=None):
+        self.prompts.append((prompt, user_context))
+        return "  Пользователь   копит на квартиру, интересуется SBER.  "
+
+
+def _fill(repo: MemoryChatRepo, turns: int, size: int = 400) -> None:
+    for i in range(turns):
+        for role in ("user", "FinPulse"):
+            repo.add_message(
+                ChatMessage(None, 1, role, f"{role}{i} " + "x" * size, datetime.datetime.utcnow()), chat_id=7
+            )
+
+
+@pytest.mark.unit
+def test_old_messages_are_folded_into_summary_and_recent_ones_kept(monkeypatch):
+    repo, llm = MemoryChatRepo(), RecordingLLM()
+    _fill(repo, turns=10)  # 20 сообщений по ~400 символов
+    compactor = CompactChatHistory(llm=llm, chat_repo=repo)
+
+    assert compactor.execute(user_id=1, chat_id=7) is True
+
+    summary = repo.summaries[7]
+    assert summary.text == "Пользователь копит на квартиру, интересуется SBER."
+    assert summary.upto_message_id == repo.messages[-7].id  # последние 6 остаются как есть
+    prompt, user_context = llm.prompts[0]
+    assert "user0 " in prompt and "FinPulse6 " in prompt and "user7 " not in prompt
+    assert user_context["priority"] == LLM_PRIORITY_BACKGROUND
+
+    # ниже порога ничего не делаем
+    assert compactor.execute(user_id=1, chat_id=7) is False
+
+
+@pytest.mark.unit
+def test_chat_prompt_is_summary_plus_unsummarized_turns():
+    repo, llm = MemoryChatRepo(), RecordingLLM()
+    _fill(repo, turns=10)
+    compactor = CompactChatHistory(llm=llm, chat_repo=repo)
+    compactor.execute(user_id=1, chat_id=7)
+    use_case = ChatWithLLM(llm=llm, chat_repo=repo, compactor=compactor)
+
+    prompt = use_case._build_prompt(user_id=1, chat_id=7)
+
+    assert "Краткое содержание предыдущего разговора:\nПользователь копит на квартиру" in prompt
+    assert "user0 " not in prompt and "FinPulse6 " not in prompt
+    assert "user7 " in prompt and "FinPulse9 " in prompt
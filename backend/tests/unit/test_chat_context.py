@@ -0,0 +1,148 @@
+import itertools
+
+import pytest
+
+from app.application.interfaces.llm import ILLMService, LLMTurn
+from app.application.use_cases.chat.chat_with_llm import ChatWithLLM
+from app.infrastructure.database.chat_repo_impl import LLMContextState
+
+
+class MemoryChatRepo:
+    def __init__(self) -> None:
+        self.messages: list = []
+        self.contexts: dict[int, LLMContextState] = {}
+        self._ids = itertools.count(1)
+
+    def add_message(self, message, chat_id=None):
+        message.id = next(self._ids)
+        message.chat_id = chat_id
+        self.messages.append(message)
+        return message
+
+    def get_last_messages(self, user_id, limit=20, chat_id=None):
+        return [m for m in self.messages if m.chat_id == chat_id][-limit:]
+
+    def get_recent_within_budget(self, user_id, chat_id, budget_tokens, after_id=None, max_rows=50):
+        picked, used = [], 0
+        for m in reversed([m for m in self.messages if m.chat_id == chat_id and (m.id or 0) > (after_id or 0)]):
+            used += m.token_count or 0
+            if used > budget_tokens or len(picked) >= max_rows:
+                break
+            picked.append(m)
+        return picked[::-1]
+
+    def get_llm_context(self, chat_id):
+        return self.contexts.get(chat_id)
+
+    def save_llm_context(self, chat_id, context, model, upto_message_id):
+        if context:
+            self.contexts[chat_id] = LLMContextState(context, model, upto_message_id)
+        else:
+            self.contexts.pop(chat_id, None)
+
+
+class ContextLLM(ILLMService):
+    """
+    Контекст — "токены" всех промптов подряд: видно, что модель получила целиком.
+    """
+
+    def __init__(self, model_name: str = "m1") -> None:
+        self.model_name = model_name
+        self.calls: list[tuple[str, list | None]] = []
+
+    def chat(self, prompt, user_context=None):
+        return self.chat_turn(prompt, user_context=user_context).text
+
+    def chat_turn(self, prompt, context=None, user_context=None):
+        self.calls.append((prompt, context))
+        return LLMTurn(text=f"answer{len(self.calls)}", context=(context or []) + [len(self.calls)])
+
+    def stream_chat(self, prompt, user_context=None, cancel=None):
+        yield "streamed"
+
+
+@pytest.mark.unit
+def test_follow_up_turn_sends_only_the_new_message_with_saved_context():
+    repo, llm = MemoryChatRepo(), ContextLLM()
+    use_case = ChatWithLLM(llm=llm, chat_repo=repo)
+
+    use_case.execute(user_id=1, user_message="Что с нефтью?", chat_id=7)
+    use_case.execute(user_id=1, user_message="А с рублём?", chat_id=7)
+
+    (first_prompt, first_ctx), (second_prompt, second_ctx) = llm.calls
+    assert first_ctx is None and "User: Что с нефтью?" in first_prompt
+    assert (second_prompt, second_ctx) == ("User: А с рублём?\n", [1])
+    assert repo.contexts[7].context == [1, 2]
+    assert repo.contexts[7].upto_message_id == repo.messages[-1].id
+
+
+@pytest.mark.unit
+def test_context_is_rebuilt_after_model_change_or_out_of_band_messages():
+    repo = MemoryChatRepo()
+    ChatWithLLM(llm=ContextLLM("m1"), chat_repo=repo).execute(user_id=1, user_message="q1", chat_id=7)
+
+    llm = ContextLLM("m2")
+    use_case = ChatWithLLM(llm=llm, chat_repo=repo)
+    use_case.execute(user_id=1, user_message="q2", chat_id=7)
+    assert llm.calls[-1][1] is None and "User: q1" in llm.calls[-1][0]
+
+    # ответ через стрим в контекст не попал — следующий ход снова собирает историю
+    list(use_case.stream(user_id=1, user_message="q3", chat_id=7))
+    use_case.execute(user_id=1, user_message="q4", chat_id=7)
+    prompt, context = llm.calls[-1]
+    assert context is None and "FinPulse: streamed" in prompt
+
+
+class CharTokenLLM(ContextLLM):
+    """
+    Один символ — один токен: бюджет в тесте считается в символах.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(model_name=None)
+
+    def count_tokens(self, text):
+        return len(text)
+
+
+@pytest.mark.unit
+def test_prompt_takes_newest_messages_that_fit_the_token_budget(monkeypatch):
+    from app.core.settings import settings
+
+    repo, llm = MemoryChatRepo(), CharTokenLLM()
+    use_case = ChatWithLLM(llm=llm, chat_repo=repo)
+    for i in range(3):
+        use_case.execute(user_id=1, user_message=f"вопрос {i} " + "x" * 40, chat_id=7)
+    assert all(m.token_count for m in repo.messages)
+
+    system_tokens = len(llm.calls[0][0]) - repo.messages[0].token_count
+    monkeypatch.setattr(settings, "CHAT_RESPONSE_RESERVE_TOKENS", 0)
+    monkeypatch.setattr(settings, "OLLAMA_NUM_CTX", system_tokens + 120)
+    use_case.execute(user_id=1, user_message="последний", chat_id=7)
+
+    prompt = llm.calls[-1][0]
+    assert "User: последний" in prompt and "FinPulse: answer3" in prompt
+    assert "вопрос 0" not in prompt
+    assert len(prompt) <= settings.OLLAMA_NUM_CTX
+
+
+@pytest.mark.unit
+def test_saved_context_is_not_reused_when_it_leaves_no_room_for_the_answer(monkeypatch):
+    from app.core.settings import settings
+
+    class WindowLLM(ContextLLM):
+        def count_tokens(self, text):
+            return len(text)
+
+    repo, llm = MemoryChatRepo(), WindowLLM()
+    use_case = ChatWithLLM(llm=llm, chat_repo=repo)
+    use_case.execute(user_id=1, user_message="q1", chat_id=7)
+    state = repo.contexts[7]
+    repo.contexts[7] = LLMContextState(list(range(1000)), state.model, state.upto_message_id)
+
+    monkeypatch.setattr(settings, "OLLAMA_NUM_CTX", 1024)
+    monkeypatch.setattr(settings, "CHAT_RESPONSE_RESERVE_TOKENS", 64)
+    use_case.execute(user_id=1, user_message="q2", chat_id=7)
+
+    prompt, context = llm.calls[-1]
+    assert context is None and "User: q1" in prompt
@@ -0,0 +1,117 @@
+import datetime
+import itertools
+
+import pytest
+
+from app.application.interfaces.llm import LLMUnavailableError
+from app.application.use_cases.chat.chat_jobs import ChatJobs
+from app.domain.entities.chat_message import ChatMessage
+from app.infrastructure.database.chat_job_repo_impl import (
+    STATUS_DONE,
+    STATUS_FAILED,
+    STATUS_PROCESSING,
+    STATUS_QUEUED,
+    ChatJob,
+)
+
+
+class MemoryJobRepo:
+    def __init__(self) -> None:
+        self.jobs: dict[int, ChatJob] = {}
+        self.questions: dict[int, ChatMessage] = {}
+        self._ids = itertools.count(1)
+
+    def create(self, user_id, chat_id, message_id):
+        job = ChatJob(id=next(self._ids), user_id=user_id, chat_id=chat_id, status=STATUS_QUEUED)
+        self.jobs[job.id] = job
+        self.questions[job.id] = ChatMessage(
+            id=message_id, user_id=user_id, chat_id=chat_id, role="user", content="q", timestamp=None
+        )
+        return job
+
+    def get(self, user_id, job_id):
+        job = self.jobs.get(job_id)
+        return job if job and job.user_id == user_id else None
+
+    def claim(self, limit=1):
+        queued = [j for j in self.jobs.values() if j.status == STATUS_QUEUED][:limit]
+        for job in queued:
+            job.status = STATUS_PROCESSING
+            job.question = self.questions[job.id]
+        return queued
+
+    def finish(self, job_id, answer=None, error=None):
+        job = self.jobs[job_id]
+        job.status, job.answer, job.error = (STATUS_FAILED if error else STATUS_DONE), answer, error
+
+    def release(self, job_id):
+        self.jobs[job_id].status = STATUS_QUEUED
+
+
+class FakeLLM:
+    def __init__(self) -> None:
+        self.down_for: float | None = None
+
+    def retry_after(self):
+        return self.down_for
+
+
+class FakeChat:
+    def __init__(self, answer=lambda q: f"ответ на {q.content}") -> None:
+        self.llm = FakeLLM()
+        self._answer = answer
+        self.answered: list[int] = []
+
+    def submit(self, user_id, user_message, chat_id=None):
+        return ChatMessage(
+            id=100,
+            user_id=user_id,
+            chat_id=chat_id or 7,
+            role="user",
+            content=user_message,
+            timestamp=datetime.datetime.utcnow(),
+        )
+
+    def answer(self, user_id, question):
+        self.answered.append(question.id)
+        return self._answer(question)
+
+
+@pytest.mark.unit
+def test_submitted_job_is_answered_by_worker_and_visible_only_to_owner():
+    repo, chat = MemoryJobRepo(), FakeChat()
+    jobs = ChatJobs(chat=chat, job_repo=repo)
+
+    job = jobs.submit(user_id=1, user_message="Что с рублём?")
+    assert (job.status, job.chat_id) == (STATUS_QUEUED, 7)
+    assert chat.answered == []
+
+    assert jobs.run_next() is True
+    assert jobs.run_next() is False
+
+    done = jobs.get(1, job.id)
+    assert (done.status, done.answer) == (STATUS_DONE, "ответ на q")
+    assert chat.answered == [100]
+    assert jobs.get(2, job.id) is None
+
+
+@pytest.mark.unit
+def test_job_waits_in_queue_while_llm_is_down_and_fails_on_errors():
+    def _answer(question):
+        raise LLMUnavailableError(retry_after=5)
+
+    repo, chat = MemoryJobRepo(), FakeChat(answer=_answer)
+    jobs = ChatJobs(chat=chat, job_repo=repo)
+    job = jobs.submit(user_id=1, user_message="q")
+
+    chat.llm.down_for = 5.0
+    assert jobs.run_next() is False
+    assert repo.jobs[job.id].status == STATUS_QUEUED
+
+    chat.llm.down_for = None
+    jobs.run_next()
+    assert repo.jobs[job.id].status == STATUS_QUEUED
+
+    chat._answer = lambda q: 1 / 0
+    jobs.run_next()
+    assert (repo.jobs[job.id].status, repo.jobs[job.id].error) == (STATUS_FAILED, "LLM_FAILED")
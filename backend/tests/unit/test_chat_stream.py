@@ -0,0 +1,185 @@
+import json
+import threading
+
+import pytest
+
+from app.application.interfaces.llm import ILLMService, StreamCancel
+from app.application.use_cases.chat.chat_with_llm import ChatWithLLM
+from app.infrastructure.llm import ollama_llm_service
+from app.infrastructure.llm.ollama_llm_service import OllamaLLMService
+
+
+class MemoryChatRepo:
+    def __init__(self) -> None:
+        self.messages: list = []
+
+    def add_message(self, message, chat_id=None):
+        message.chat_id = chat_id
+        self.messages.append(message)
+        return message
+
+    def get_last_messages(self, user_id, limit=20, chat_id=None):
+        return [m for m in self.messages if m.chat_id == chat_id][-limit:]
+
+    def get_recent_within_budget(self, user_id, chat_id, budget_tokens, after_id=None, max_rows=50):
+        picked, used = [], 0
+        for m in reversed([m for m in self.messages if m.chat_id == chat_id and (m.id or 0) > (after_id or 0)]):
+            used += m.token_count or 0
+            if used > budget_tokens or len(picked) >= max_rows:
+                break
+            picked.append(m)
+        return picked[::-1]
+
+
+class ChunkedLLM(ILLMService):
+    def __init__(self, chunks: list[str]) -> None:
+        self.chunks = chunks
+        self.closed = False
+
+    def chat(self, prompt, user_context=None):
+        return "".join(self.chunks)
+
+    def stream_chat(self, prompt, user_context=None, cancel=None):
+        try:
+            yield from self.chunks
+        finally:
+            self.closed = True
+
+
+@pytest.mark.unit
+def test_stream_saves_full_answer_once_stream_ends():
+    repo = MemoryChatRepo()
+    use_case = ChatWithLLM(llm=ChunkedLLM(["Ставка ", "не ", "изменилась"]), chat_repo=repo)
+
+    chunks = list(use_case.stream(user_id=1, user_message="Что со ставкой?", chat_id=7))
+
+    assert chunks == ["Ставка ", "не ", "изменилась"]
+    assert [(m.role, m.content) for m in repo.messages] == [
+        ("user", "Что со ставкой?"),
+        ("FinPulse", "Ставка не изменилась"),
+    ]
+
+
+@pytest.mark.unit
+def test_closing_stream_cancels_generation_without_saving_answer():
+    repo = MemoryChatRepo()
+    llm = ChunkedLLM(["a", "b", "c"])
+    stream = ChatWithLLM(llm=llm, chat_repo=repo).stream(user_id=1, user_message="q", chat_id=7)
+
+    assert next(stream) == "a"
+    stream.close()
+
+    assert llm.closed is True
+    assert [m.role for m in repo.messages] == ["user"]
+
+
+class FakeStreamResponse:
+    status_code = 200
+
+    def __init__(self, lines: list[dict]) -> None:
+        self.lines = [json.dumps(line).encode() for line in lines]
+        self.closed = False
+
+    def iter_lines(self):
+        yield from self.lines
+
+    def close(self):
+        self.closed = True
+
+
+class FakeOllamaSession:
+    def __init__(self, response: FakeStreamResponse) -> None:
+        self.response = response
+        self.payloads: list[dict] = []
+
+    def post(self, url, json, stream, timeout):
+        self.payloads.append(json)
+        return self.response
+
+
+@pytest.mark.unit
+def test_ollama_stream_chat_yields_tokens_and_releases_slot_on_close(monkeypatch):
+    response = FakeStreamResponse(
+        [{"response": "При", "done": False}, {"response": "вет", "done": False}, {"response": "", "done": True}]
+    )
+    service = OllamaLLMService()
+    service.session = FakeOllamaSession(response)
+
+    assert list(service.stream_chat("hi")) == ["При", "вет"]
+    assert service.session.payloads[0]["stream"] is True
+    assert response.closed is True
+
+    early = FakeStreamResponse([{"response": "x", "done": False}, {"response": "y", "done": False}])
+    service.session = FakeOllamaSession(early)
+    stream = service.stream_chat("hi")
+    assert next(stream) == "x"
+    stream.close()
+
+    assert early.closed is True
+    classes = ollama_llm_service._LLM_SCHEDULER.stats()["classes"]
+    assert all(c["in_flight"] == 0 for c in classes.values())
+
+
+class BlockingSocket:
+    def __init__(self) -> None:
+        self.shut = threading.Event()
+
+    def shutdown(self, how) -> None:
+        self.shut.set()
+
+
+class BlockingStreamResponse(FakeStreamResponse):
+    """
+    После первого токена чтение висит, пока сокет не закроют (как ждущий ответа Ollama).
+    """
+
+    def __init__(self) -> None:
+        super().__init__([{"response": "x", "done": False}])
+        self.sock = BlockingSocket()
+        self.raw = type("Raw", (), {"connection": type("Conn", (), {"sock": self.sock})()})()
+
+    def iter_lines(self):
+        yield from self.lines
+        assert self.sock.shut.wait(5)
+
+
+@pytest.mark.unit
+def test_ollama_stream_cancel_from_another_thread_releases_slot_and_backend():
+    response = BlockingStreamResponse()
+    service = OllamaLLMService()
+    service.session = FakeOllamaSession(response)
+    cancel = StreamCancel()
+    got: list[str] = []
+    first = threading.Event()
+
+    def _consume() -> None:
+        for chunk in service.stream_chat("hi", cancel=cancel):
+            got.append(chunk)
+            first.set()
+
+    worker = threading.Thread(target=_consume)
+    worker.start()
+    assert first.wait(5)
+    cancel.cancel()
+    worker.join(5)
+
+    assert not worker.is_alive() and got == ["x"]
+    assert response.closed is True
+    classes = ollama_llm_service._LLM_SCHEDULER.stats()["classes"]
+    assert all(c["in_flight"] == 0 for c in classes.values())
+    assert all(b.in_flight == 0 and b.errors == 0 for b in service.pool.backends)
+
+
+@pytest.mark.unit
+def test_cancelled_stream_does_not_save_partial_answer():
+    repo = MemoryChatRepo()
+    cancel = StreamCancel()
+    stream = ChatWithLLM(llm=ChunkedLLM(["a", "b"]), chat_repo=repo).stream(
+        user_id=1, user_message="q", chat_id=7, cancel=cancel
+    )
+
+    assert next(stream) == "a"
+    cancel.cancel()
+
+    assert list(stream) == ["b"]
+    assert [m.role for m in repo.messages] == ["user"]
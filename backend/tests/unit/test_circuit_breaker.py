@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from app.infrastructure.concurrency.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.infrastructure.concurrency.priority_scheduler import QueueDeadlineExceeded
+from app.infrastructure.llm.ollama_llm_service import _is_ollama_failure
+from app.infrastructure.llm.ollama_pool import NoHealthyBackendError, OllamaHTTPError
+
+
+def _call(breaker: CircuitBreaker, ok: bool = True, exc: type[Exception] = RuntimeError) -> None:
+    with breaker.guard():
+        if not ok:
+            raise exc("boom")
+
+
+def _fail(breaker: CircuitBreaker, exc: type[Exception] = RuntimeError) -> None:
+    with pytest.raises(exc):
+        _call(breaker, ok=False, exc=exc)
+
+
+@pytest.mark.unit
+def test_breaker_opens_on_failure_rate_and_rejects_fast():
+    breaker = CircuitBreaker("t", failure_rate=0.5, min_calls=4, window_sec=60, cooldown_sec=30)
+
+    _call(breaker)
+    _fail(breaker)
+    _call(breaker)
+    assert breaker.state == "closed"  # 1/3 и вызовов меньше min_calls
+    _fail(breaker)
+
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as info:
+        _call(breaker)
+    assert 29 < info.value.retry_after <= 30
+    assert breaker.stats()["rejected"] == 1
+
+
+@pytest.mark.unit
+def test_half_open_lets_one_probe_through_and_closes_on_success():
+    breaker = CircuitBreaker("t", failure_rate=0.5, min_calls=1, cooldown_sec=0.05)
+    _fail(breaker)
+    time.sleep(0.06)
+
+    assert breaker.state == "half_open"
+    with breaker.guard():
+        # пока идёт проба, остальные отклоняются
+        assert breaker.retry_after() is not None
+        with pytest.raises(CircuitOpenError):
+            _call(breaker)
+
+    assert breaker.state == "closed"
+    assert breaker.retry_after() is None
+
+
+@pytest.mark.unit
+def test_failed_probe_reopens_and_ignored_errors_do_not_count():
+    breaker = CircuitBreaker("t", failure_rate=0.5, min_calls=1, cooldown_sec=0.05, ignored=(QueueDeadlineExceeded,))
+    _fail(breaker, QueueDeadlineExceeded)
+    assert breaker.state == "closed"
+
+    _fail(breaker)
+    time.sleep(0.06)
+    _fail(breaker)
+
+    assert breaker.state == "open"
+    assert breaker.stats()["opened"] == 2
+
+
+@pytest.mark.unit
+def test_ollama_client_errors_do_not_open_breaker():
+    breaker = CircuitBreaker("t", failure_rate=0.5, min_calls=2, cooldown_sec=30, is_failure=_is_ollama_failure)
+
+    for _ in range(3):
+        with pytest.raises(OllamaHTTPError):
+            with breaker.guard():
+                raise OllamaHTTPError(400, "invalid format")
+    assert breaker.state == "closed" and breaker.stats()["window_calls"] == 0
+
+    with pytest.raises(OllamaHTTPError):
+        with breaker.guard():
+            raise OllamaHTTPError(503, "overloaded")
+    _fail(breaker, NoHealthyBackendError)
+    assert breaker.state == "open"
@@ -0,0 +1,43 @@
+from pathlib import Path
+
+import pytest
+
+from app.infrastructure.llm.html_extractors import Bs4HtmlExtractor, LxmlHtmlExtractor, get_html_extractor
+
+FIXTURES = sorted((Path(__file__).parent.parent / "fixtures" / "html").glob("*.html"))
+
+SNIPPETS = [
+    "<p>a<b>b</b>c</p>",
+    "<div>раз<!-- comment -->два</div><footer>подвал</footer>хвост",
+    "<html><body><nav>menu</nav>text <script>var x = '<p>';</script>after</body></html>",
+    "<article><p>first</p></article><article><p>second</p></article>",
+    "<p>unclosed <i>tags<p>next &amp; &nbsp; entity",
+    "<?xml version='1.0' encoding='utf-8'?><html><body><p>xml decl</p></body></html>",
+    "",
+    "<script>only</script>",
+    "<div>text<template><p>lazy banner</p></template>after</div>",
+]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda p: p.name)
+def test_lxml_extractor_matches_bs4_on_fixture_pages(path):
+    html = path.read_text(encoding="utf-8")
+
+    expected = Bs4HtmlExtractor().extract(html)
+
+    assert expected
+    assert LxmlHtmlExtractor().extract(html) == expected
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("html", SNIPPETS)
+def test_lxml_extractor_matches_bs4_on_edge_cases(html):
+    assert LxmlHtmlExtractor().extract(html) == Bs4HtmlExtractor().extract(html)
+
+
+@pytest.mark.unit
+def test_get_html_extractor_respects_explicit_choice():
+    assert get_html_extractor("bs4").name == "bs4"
+    assert get_html_extractor("lxml").name == "lxml"
+    assert get_html_extractor("auto").name == "lxml"
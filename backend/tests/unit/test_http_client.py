@@ -0,0 +1,95 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.core.settings import settings
+from app.infrastructure.http.client import _build_session
+
+
+class FlakyServer:
+    """
+    Отвечает 503 или рвёт соединение, не ответив; считает, сколько запросов дошло.
+    """
+
+    def __init__(self, mode: str) -> None:
+        self.hits = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                server.hits += 1
+                if mode == "drop":
+                    self.close_connection = True
+                    return
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            do_GET = _handle
+            do_POST = _handle
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def shutdown(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(settings, "HTTP_RETRIES", 2)
+    monkeypatch.setattr(settings, "HTTP_BACKOFF_SEC", 0)
+    s = _build_session(pool_maxsize=1)
+    yield s
+    s.close()
+
+
+@pytest.fixture
+def flaky(request):
+    server = FlakyServer(request.param)
+    yield server
+    server.shutdown()
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("flaky", ["503"], indirect=True)
+def test_get_is_retried_on_server_error(session, flaky):
+    r = session.get(flaky.url, timeout=5)
+
+    assert r.status_code == 503
+    assert flaky.hits == 1 + settings.HTTP_RETRIES
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("flaky", ["drop"], indirect=True)
+def test_get_is_retried_on_dropped_connection(session, flaky):
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.get(flaky.url, timeout=5)
+
+    assert flaky.hits == 1 + settings.HTTP_RETRIES
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("flaky", ["503"], indirect=True)
+def test_post_is_not_retried_on_server_error(session, flaky):
+    r = session.post(flaky.url, json={"prompt": "x"}, timeout=5)
+
+    assert r.status_code == 503
+    assert flaky.hits == 1
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("flaky", ["drop"], indirect=True)
+def test_post_is_not_retried_on_dropped_connection(session, flaky):
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.post(flaky.url, json={"prompt": "x"}, timeout=5)
+
+    assert flaky.hits == 1
@@ -0,0 +1,153 @@
+import pytest
+
+from app.application.use_cases.public_news.public_news import CrawlNewArticles
+from app.core.constants import NEWS_SOURCES
+from app.infrastructure.database.crawl_frontier_repo_impl import STATUS_PENDING, FrontierItem
+from app.infrastructure.llm.html_extractors import LxmlHtmlExtractor
+from app.infrastructure.llm.scraper_service import ArticleLink, select_article_links
+
+INDEX = """
+<html><body>
+<header><a href="/economics/18/10/2026/aaa111">Шапка: ссылка на статью в меню сайта</a></header>
+<nav><a href="/economics/">Экономика</a><a href="/finances/">Финансы</a></nav>
+<div class="list">
+  <a href="/economics/18/10/2026/671234abc">Минфин разместил ОФЗ на 100 млрд рублей</a>
+  <a href="https://www.rbc.ru/economics/18/10/2026/671235def#comments">ЦБ сохранил ключевую ставку на уровне 21%</a>
+  <a href="/economics/18/10/2026/671234abc">Минфин разместил ОФЗ на 100 млрд рублей</a>
+  <a href="/economics/?page=2">Показать ещё новости раздела экономики</a>
+  <a href="/tags/?tag=2026">Все материалы по тегу инфляция 2026</a>
+  <a href="https://other.example.com/news/12345">Чужой сайт с очень длинным заголовком</a>
+  <a href="/economics/18/10/2026/671236">2</a>
+  <a href="mailto:news@rbc.ru">Написать в редакцию новостей 24/7</a>
+</div>
+<footer><a href="/economics/18/10/2026/zzz999">Подвал: ссылка на статью в подвале</a></footer>
+</body></html>
+"""
+
+
+@pytest.mark.unit
+def test_select_article_links_keeps_same_site_article_urls_only():
+    raw = LxmlHtmlExtractor().links(INDEX)
+
+    links = select_article_links(raw, "https://www.rbc.ru/economics/", limit=10)
+
+    assert links == [
+        ArticleLink("https://www.rbc.ru/economics/18/10/2026/671234abc", "Минфин разместил ОФЗ на 100 млрд рублей"),
+        ArticleLink("https://www.rbc.ru/economics/18/10/2026/671235def", "ЦБ сохранил ключевую ставку на уровне 21%"),
+    ]
+
+
+class StubScraper:
+    def __init__(self) -> None:
+        self.links: dict[str, list[ArticleLink]] = {}
+        self.unchanged: set[str] = set()
+
+    def fetch_article_links(self, index_url: str, limit: int = 40):
+        if index_url in self.unchanged:
+            return self.links.get(index_url, []), True
+        return self.links.get(index_url, []), False
+
+
+class MemoryFrontier:
+    def __init__(self) -> None:
+        self.items: dict[str, FrontierItem] = {}
+        self.status: dict[str, str] = {}
+        self.db_lookups = 0
+
+    def filter_unseen(self, urls):
+        self.db_lookups += 1
+        return [u for u in urls if u not in self.items]
+
+    def enqueue(self, items):
+        new = [i for i in items if i.url not in self.items]
+        for item in new:
+            self.items[item.url] = item
+            self.status[item.url] = STATUS_PENDING
+        return len(new)
+
+    def claim_pending(self, limit):
+        pending = [u for u in reversed(list(self.items)) if self.status[u] == STATUS_PENDING][:limit]
+        for url in pending:
+            self.status[url] = "processing"
+            self.items[url].attempts += 1
+        return [self.items[u] for u in pending]
+
+    def mark(self, url, status):
+        self.status[url] = status
+
+
+class StubGenerator:
+    def __init__(self, failing: set[str] | None = None, retry_after: float | None = None) -> None:
+        self.summarized: list[str] = []
+        self.failing = failing or set()
+        self.retry_after = retry_after
+
+    def llm_retry_after(self):
+        return self.retry_after
+
+    def summarize_article(self, *, market, category, url, title, slot_time=None):
+        self.summarized.append(url)
+        return {"summary": title, "_fallback": url in self.failing}
+
+
+def _index_url() -> str:
+    return next(iter(next(iter(NEWS_SOURCES.values())).values()))[0]
+
+
+def _link(n: int) -> ArticleLink:
+    return ArticleLink(f"https://www.rbc.ru/economics/18/10/2026/{n}", f"Заголовок статьи номер {n}")
+
+
+@pytest.mark.unit
+def test_crawler_summarizes_only_new_articles():
+    scraper, frontier, generator = StubScraper(), MemoryFrontier(), StubGenerator()
+    scraper.links[_index_url()] = [_link(1), _link(2)]
+    crawler = CrawlNewArticles(scraper, generator, frontier, max_articles=10)
+
+    assert crawler.execute() == 2
+    assert crawler.execute() == 0
+
+    scraper.links[_index_url()] = [_link(3), _link(1), _link(2)]
+    assert crawler.execute() == 1
+    assert sorted(generator.summarized) == sorted(link.url for link in (_link(1), _link(2), _link(3)))
+
+
+@pytest.mark.unit
+def test_crawler_caps_work_per_run_and_skips_unchanged_index():
+    scraper, frontier, generator = StubScraper(), MemoryFrontier(), StubGenerator()
+    scraper.links[_index_url()] = [_link(n) for n in range(5)]
+    crawler = CrawlNewArticles(scraper, generator, frontier, max_articles=2)
+
+    assert crawler.execute() == 2
+    scraper.unchanged.add(_index_url())
+    lookups = frontier.db_lookups
+    assert crawler.execute() == 2
+
+    assert frontier.db_lookups == lookups
+    assert len(generator.summarized) == 4
+
+
+@pytest.mark.unit
+def test_crawler_retries_failed_articles_up_to_max_attempts():
+    failing = _link(1).url
+    scraper, frontier, generator = StubScraper(), MemoryFrontier(), StubGenerator(failing={failing})
+    scraper.links[_index_url()] = [_link(1)]
+    crawler = CrawlNewArticles(scraper, generator, frontier, max_articles=10, max_attempts=2)
+
+    crawler.execute()
+    crawler.execute()
+    crawler.execute()
+
+    assert generator.summarized == [failing, failing]
+    assert frontier.status[failing] == "failed"
+
+
+@pytest.mark.unit
+def test_crawler_keeps_articles_pending_while_llm_is_down():
+    scraper, frontier, generator = StubScraper(), MemoryFrontier(), StubGenerator(retry_after=30)
+    scraper.links[_index_url()] = [_link(1)]
+    crawler = CrawlNewArticles(scraper, generator, frontier, max_articles=10)
+
+    assert crawler.execute() == 0
+    assert generator.summarized == []
+    assert frontier.status == {_link(1).url: STATUS_PENDING}
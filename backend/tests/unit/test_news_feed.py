@@ -0,0 +1,382 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.application.interfaces.llm import ILLMService, LLMUnavailableError
+from app.application.use_cases.summarize_article import GetNewsFeed
+from app.domain.entities.user import User
+from app.infrastructure.concurrency.priority_scheduler import QueueDeadlineExceeded
+
+
+class SlowScraper:
+    def __init__(self, delay: float = 0.2) -> None:
+        self.delay = delay
+
+    def fetch_article_text(self, url: str, max_chars=None):
+        time.sleep(self.delay)
+        return f"Текст статьи {url}"
+
+
+class EchoLLM(ILLMService):
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.calls = 0
+
+    def chat(self, prompt: str, user_context=None) -> str:
+        self.calls += 1
+        time.sleep(self.delay)
+        return json.dumps(
+            {
+                "summary": prompt.rsplit("Текст статьи ", 1)[-1],
+                "facts": ["f"],
+                "conclusion": "c",
+                "risks": ["r"],
+                "indicator": {"impact": "neutral", "confidence": "low", "rationale": []},
+            }
+        )
+
+
+class MemoryCacheRepo:
+    def __init__(self) -> None:
+        self.rows: dict = {}
+
+    @contextmanager
+    def build_lock(self, cache_date, category, url):
+        yield True
+
+    def get(self, cache_date, category, url):
+        return self.rows.get((cache_date, category, url))
+
+    def get_latest(self, category_prefix, url, since, before_slot):
+        candidates = [
+            row
+            for (cache_date, category, row_url), row in self.rows.items()
+            if row_url == url
+            and cache_date >= since
+            and category.startswith(f"{category_prefix}::slot=")
+            and category < f"{category_prefix}::slot={before_slot}"
+        ]
+        return max(candidates, key=lambda r: r.category, default=None)
+
+    def upsert(self, cache_date, market, category, url, source, title, payload_json):
+        from app.infrastructure.database.news_cache_repo_impl import CachedSummaryRow
+
+        row = CachedSummaryRow(cache_date, market, category, url, source, title, payload_json)
+        self.rows[(cache_date, category, url)] = row
+        return row
+
+
+class MemorySummaryRepo:
+    def __init__(self) -> None:
+        self.rows: dict[str, str] = {}
+
+    def get(self, content_hash: str):
+        return self.rows.get(content_hash)
+
+    def put(self, content_hash: str, prompt_version: str, category: str, payload_json: str) -> None:
+        self.rows.setdefault(content_hash, payload_json)
+
+
+class NullNewsRepo:
+    def upsert_by_url(self, **kwargs):
+        return None
+
+
+def _public_user() -> User:
+    return User(id=0, name="Public", email="public@finpulse.local", password_hash="")
+
+
+@pytest.fixture
+def feed_factory():
+    def _factory(scraper=None, llm=None, cache_repo=None, summary_repo=None):
+        return GetNewsFeed(
+            scraper=scraper or SlowScraper(),
+            llm=llm or EchoLLM(),
+            cache_repo=cache_repo or MemoryCacheRepo(),
+            news_repo=NullNewsRepo(),
+            summary_repo=summary_repo,
+        )
+
+    return _factory
+
+
+@pytest.mark.unit
+def test_feed_sources_are_built_in_parallel_and_keep_order(feed_factory):
+    use_case = feed_factory(scraper=SlowScraper(delay=0.3))
+    expected_urls = [url for _, _, url in use_case._pick_sources(None, audience="public", max_blocks=3)]
+
+    started = time.perf_counter()
+    blocks = use_case.execute(_public_user(), audience="public")
+    elapsed = time.perf_counter() - started
+
+    assert [b.url for b in blocks] == expected_urls
+    assert [b.summary for b in blocks] == expected_urls
+    assert elapsed < 0.3 * len(expected_urls)
+
+
+@pytest.mark.unit
+def test_feed_records_per_stage_timings(feed_factory):
+    use_case = feed_factory(scraper=SlowScraper(delay=0.01))
+
+    use_case.execute(_public_user(), audience="public")
+
+    sources = use_case.last_timings["sources"]
+    assert len(sources) == 3
+    assert all({"cache_ms", "scrape_ms", "llm_ms", "store_ms"} <= set(s) for s in sources)
+    assert use_case.last_timings["total_ms"] >= max(s["scrape_ms"] for s in sources)
+
+
+@pytest.mark.unit
+def test_concurrent_misses_for_same_slot_share_one_llm_call(feed_factory):
+    llm = EchoLLM(delay=0.2)
+    use_case = feed_factory(scraper=SlowScraper(delay=0.05), llm=llm)
+    results: list = []
+
+    def _run():
+        results.append(use_case.execute(_public_user(), audience="public"))
+
+    threads = [threading.Thread(target=_run) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(results) == 5
+    assert llm.calls == 3
+    assert all([b.summary for b in r] == [b.summary for b in results[0]] for r in results)
+
+
+@pytest.mark.unit
+def test_unchanged_text_in_next_slot_reuses_summary_without_llm(feed_factory):
+    llm = EchoLLM()
+    use_case = feed_factory(scraper=SlowScraper(delay=0), llm=llm, summary_repo=MemorySummaryRepo())
+
+    nine = datetime(2025, 1, 10, 9, tzinfo=timezone.utc)
+    ten = datetime(2025, 1, 10, 10, tzinfo=timezone.utc)
+
+    first = use_case.execute(_public_user(), audience="public", slot_time=nine)
+    second = use_case.execute(_public_user(), audience="public", slot_time=ten)
+
+    assert llm.calls == 3
+    assert [b.summary for b in second] == [b.summary for b in first]
+
+
+def _investor(user_id: int, **profile) -> User:
+    return User(id=user_id, name=f"U{user_id}", email=f"u{user_id}@example.com", password_hash="", **profile)
+
+
+@pytest.mark.unit
+def test_persona_bucket_ignores_tickers_and_groups_sectors():
+    a = _investor(1, investment_horizon="long", risk_level="low", tickers=["SBER"], sectors=["banks"])
+    b = _investor(2, investment_horizon="long", risk_level="low", tickers=["VTBR"], sectors=["financials_other"])
+    c = _investor(3, investment_horizon="long", risk_level="low", sectors=["banks", "oil_gas"])
+
+    assert GetNewsFeed._persona_bucket(a) == GetNewsFeed._persona_bucket(b) == "h=long,r=low,s=financials"
+    assert GetNewsFeed._persona_bucket(c) == "h=long,r=low,s=mixed"
+    assert GetNewsFeed._persona_bucket(_investor(4)) == "h=any,r=any,s=any"
+
+
+@pytest.mark.unit
+def test_personal_feed_llm_calls_scale_with_buckets_not_users(feed_factory):
+    llm = EchoLLM()
+    use_case = feed_factory(scraper=SlowScraper(delay=0), llm=llm)
+    users = [
+        _investor(i, investment_horizon="mid", risk_level="high", sectors=["it"], tickers=[f"T{i}"]) for i in range(5)
+    ]
+
+    for user in users:
+        use_case.execute(user, audience="personal")
+
+    assert llm.calls == 3
+
+
+@pytest.mark.unit
+def test_previous_slot_is_served_stale_and_refreshed_in_background(feed_factory):
+    llm = EchoLLM()
+    cache_repo = MemoryCacheRepo()
+    use_case = feed_factory(scraper=SlowScraper(delay=0), llm=llm, cache_repo=cache_repo)
+    previous = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)
+    previous_slot = previous.strftime("%Y%m%d%H")
+    sources = use_case._pick_sources(None, audience="public", max_blocks=3)
+    for market, category, url in sources:
+        cache_repo.upsert(
+            previous.date(),
+            market,
+            f"{category}::aud=public::slot={previous_slot}",
+            url,
+            "src",
+            "title",
+            json.dumps({"summary": "stale"}),
+        )
+
+    blocks = use_case.execute(_public_user(), audience="public")
+
+    assert [b.summary for b in blocks] == ["stale"] * len(sources)
+    deadline = time.time() + 2
+    while llm.calls < len(sources) and time.time() < deadline:
+        time.sleep(0.02)
+    assert llm.calls == len(sources)
+
+
+class RecordingNewsRepo:
+    def __init__(self) -> None:
+        self.rows: list[dict] = []
+
+    def upsert_by_url(self, **kwargs):
+        self.rows.append(kwargs)
+
+
+class EmptyScraper:
+    def fetch_article_text(self, url: str, max_chars=None):
+        return None
+
+
+@pytest.mark.unit
+def test_crawled_article_is_published_under_its_own_title():
+    news_repo = RecordingNewsRepo()
+    use_case = GetNewsFeed(SlowScraper(delay=0), EchoLLM(), MemoryCacheRepo(), news_repo)
+
+    use_case.summarize_article(market="RU", category="macro", url="https://example.com/a/1", title="ЦБ сохранил ставку")
+
+    assert [(r["url"], r["title"]) for r in news_repo.rows] == [("https://example.com/a/1", "ЦБ сохранил ставку")]
+
+
+@pytest.mark.unit
+def test_crawled_article_fallback_card_is_not_published():
+    news_repo = RecordingNewsRepo()
+    use_case = GetNewsFeed(EmptyScraper(), EchoLLM(), MemoryCacheRepo(), news_repo)
+
+    payload = use_case.summarize_article(market="RU", category="macro", url="https://example.com/a/1", title="T")
+
+    assert payload["_fallback"] is True
+    assert news_repo.rows == []
+
+
+class CountingScraper(SlowScraper):
+    def __init__(self) -> None:
+        super().__init__(delay=0)
+        self.calls = 0
+
+    def fetch_article_text(self, url: str, max_chars=None):
+        self.calls += 1
+        return super().fetch_article_text(url, max_chars)
+
+
+class DownLLM(EchoLLM):
+    def retry_after(self):
+        return 30.0
+
+
+@pytest.mark.unit
+def test_open_llm_circuit_serves_stale_or_uncached_fallback_without_scraping(feed_factory):
+    llm, scraper, cache_repo = DownLLM(), CountingScraper(), MemoryCacheRepo()
+    use_case = feed_factory(scraper=scraper, llm=llm, cache_repo=cache_repo)
+    previous = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)
+    sources = use_case._pick_sources(None, audience="public", max_blocks=3)
+    market, category, url = sources[0]
+    cache_repo.upsert(
+        previous.date(),
+        market,
+        f"{category}::aud=public::slot={previous.strftime('%Y%m%d%H')}",
+        url,
+        "src",
+        "title",
+        json.dumps({"summary": "stale"}),
+    )
+
+    blocks = use_case.execute(_public_user(), audience="public")
+
+    assert blocks[0].summary == "stale"
+    assert all("временно недоступен" in b.summary for b in blocks[1:])
+    assert (llm.calls, scraper.calls) == (0, 0)
+    assert len(cache_repo.rows) == 1
+
+
+class TrippingLLM(EchoLLM):
+    def chat(self, prompt: str, user_context=None) -> str:
+        self.calls += 1
+        raise LLMUnavailableError("circuit is open", retry_after=30)
+
+
+@pytest.mark.unit
+def test_fallback_after_circuit_opens_mid_build_is_not_cached(feed_factory):
+    cache_repo = MemoryCacheRepo()
+    use_case = feed_factory(scraper=SlowScraper(delay=0), llm=TrippingLLM(), cache_repo=cache_repo)
+
+    blocks = use_case.execute(_public_user(), audience="public")
+
+    assert blocks and cache_repo.rows == {}
+
+
+class OverloadedLLM(EchoLLM):
+    def chat(self, prompt: str, user_context=None) -> str:
+        self.calls += 1
+        raise QueueDeadlineExceeded("LLM queue deadline exceeded for 'personal_feed' after 60.0s")
+
+
+@pytest.mark.unit
+def test_queue_deadline_drop_fallback_is_not_cached(feed_factory):
+    cache_repo = MemoryCacheRepo()
+    use_case = feed_factory(scraper=SlowScraper(delay=0), llm=OverloadedLLM(), cache_repo=cache_repo)
+    user = User(id=7, name="U7", email="u7@example.com", password_hash="", risk_level="low")
+
+    blocks = use_case.execute(user, audience="personal")
+
+    assert blocks and cache_repo.rows == {}
+
+
+class TruncatingLLM(EchoLLM):
+    """
+    Первый ответ обрезан после facts; дозапрос возвращает только недостающие поля.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.schemas: list[dict] = []
+
+    def chat_json(self, prompt: str, schema: dict, user_context=None) -> str:
+        self.calls += 1
+        self.schemas.append(schema)
+        if self.calls == 1:
+            return '{"summary": "Кратко", "facts": ["f1", "f2"], "conclusion": "Выв'
+        return json.dumps(
+            {"conclusion": "Вывод", "risks": ["r"], "indicator": {"impact": "positive", "confidence": "high"}}
+        )
+
+
+@pytest.mark.unit
+def test_almost_valid_summary_is_repaired_with_a_request_for_missing_fields_only(feed_factory):
+    llm = TruncatingLLM()
+    use_case = feed_factory(scraper=SlowScraper(delay=0), llm=llm)
+
+    payload = use_case.summarize_article(market="RU", category="macro", url="https://example.com/a/1", title="T")
+
+    assert llm.calls == 2
+    assert set(llm.schemas[1]["properties"]) == {"conclusion", "risks", "indicator"}
+    assert payload["summary"] == "Кратко" and payload["facts"] == ["f1", "f2"]
+    assert payload["conclusion"] == "Вывод"
+    assert payload["indicator"]["impact"] == "positive"
+    assert not payload.get("_fallback")
+
+
+class FailedRepairLLM(TruncatingLLM):
+    def chat_json(self, prompt: str, schema: dict, user_context=None) -> str:
+        if self.calls == 1:
+            self.calls += 1
+            raise RuntimeError("Ollama HTTP 500")
+        return super().chat_json(prompt, schema, user_context)
+
+
+@pytest.mark.unit
+def test_incomplete_summary_is_not_stored_for_reuse(feed_factory):
+    summary_repo = MemorySummaryRepo()
+    use_case = feed_factory(scraper=SlowScraper(delay=0), llm=FailedRepairLLM(), summary_repo=summary_repo)
+
+    payload = use_case.summarize_article(market="RU", category="macro", url="https://example.com/a/1", title="T")
+
+    assert payload["summary"] == "Кратко" and "conclusion" not in payload
+    assert summary_repo.rows == {}
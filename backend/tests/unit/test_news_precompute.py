@@ -0,0 +1,126 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.application.use_cases.public_news.public_news import GetPublicNewsFeed, PrecomputePublicNews
+from app.infrastructure.scheduler.news_precompute import PublicNewsPrecomputeScheduler
+
+
+class StubGenerator:
+    def __init__(self) -> None:
+        self.calls: list[dict] = []
+
+    def execute(self, user, force=False, audience="personal", slot_time=None):
+        self.calls.append({"audience": audience, "force": force, "slot_time": slot_time})
+        return ["block-1", "block-2"]
+
+
+class StubNewsRepo:
+    def list_public(self, limit: int = 50):
+        return []
+
+    def to_news_block_out(self, item):
+        return item
+
+
+@pytest.mark.unit
+def test_public_feed_get_does_not_trigger_generation():
+    generator = StubGenerator()
+
+    GetPublicNewsFeed(StubNewsRepo(), generator).execute(limit=10)
+
+    assert generator.calls == []
+
+
+@pytest.mark.unit
+def test_public_feed_force_rebuilds_current_slot():
+    generator = StubGenerator()
+
+    GetPublicNewsFeed(StubNewsRepo(), generator).execute(limit=10, force=True)
+
+    assert generator.calls == [{"audience": "public", "force": True, "slot_time": None}]
+
+
+@pytest.mark.unit
+def test_precompute_builds_requested_slot():
+    generator = StubGenerator()
+    slot = datetime(2025, 1, 10, 12, tzinfo=timezone.utc)
+
+    built = PrecomputePublicNews(generator).execute(slot_time=slot)
+
+    assert built == 2
+    assert generator.calls[0]["slot_time"] == slot
+    assert generator.calls[0]["audience"] == "public"
+
+
+@pytest.mark.unit
+def test_scheduler_runs_lead_seconds_before_slot():
+    scheduler = PublicNewsPrecomputeScheduler(use_case=PrecomputePublicNews(StubGenerator()), lead_sec=300)
+    slot = datetime(2025, 1, 10, 12, tzinfo=timezone.utc)
+
+    assert scheduler.seconds_until_run(slot, datetime(2025, 1, 10, 11, 50, tzinfo=timezone.utc)) == 300
+    assert scheduler.seconds_until_run(slot, datetime(2025, 1, 10, 11, 58, tzinfo=timezone.utc)) == 0
+
+
+class FakeLeaderLock:
+    def __init__(self, grants: list[bool], held: bool = True) -> None:
+        self.grants = grants
+        self.held = held
+        self.acquire_calls = 0
+        self.released = False
+        self.on_check = lambda: None
+
+    def acquire(self) -> bool:
+        self.acquire_calls += 1
+        return self.grants.pop(0) if self.grants else False
+
+    def is_held(self) -> bool:
+        self.on_check()
+        return self.held
+
+    def release(self) -> None:
+        self.released = True
+
+
+class StoppingPrecompute:
+    """Собирает один слот и останавливает планировщик."""
+
+    def __init__(self) -> None:
+        self.slots: list[datetime] = []
+        self.scheduler: PublicNewsPrecomputeScheduler | None = None
+
+    def execute(self, slot_time=None) -> int:
+        self.slots.append(slot_time)
+        self.scheduler._stop.set()
+        return 0
+
+
+def _scheduler(lock: FakeLeaderLock) -> tuple[PublicNewsPrecomputeScheduler, StoppingPrecompute]:
+    use_case = StoppingPrecompute()
+    scheduler = PublicNewsPrecomputeScheduler(use_case=use_case, leader_lock=lock, leader_retry_sec=0)
+    use_case.scheduler = scheduler
+    return scheduler, use_case
+
+
+@pytest.mark.unit
+def test_scheduler_follower_builds_nothing_until_it_becomes_leader():
+    lock = FakeLeaderLock(grants=[False, False, True])
+    scheduler, use_case = _scheduler(lock)
+
+    scheduler.run_forever()
+
+    assert lock.acquire_calls == 3
+    assert len(use_case.slots) == 1
+    assert lock.released is True
+
+
+@pytest.mark.unit
+def test_scheduler_skips_slot_after_losing_leadership():
+    lock = FakeLeaderLock(grants=[True], held=False)
+    scheduler, use_case = _scheduler(lock)
+    lock.on_check = scheduler._stop.set
+
+    scheduler.run_forever()
+
+    assert use_case.slots == []
+    assert lock.released is True
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.infrastructure.database import news_repo_impl
+from app.infrastructure.database.models import News
+from app.infrastructure.database.news_repo_impl import NewsRepositorySQL
+
+
+@pytest.fixture
+def repo():
+    # одна таблица news в SQLite в памяти: проверяем L1 репозитория, а не SQL Postgres
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    News.__table__.create(engine)
+    news_repo_impl._ROWS_CACHE.clear()
+    news_repo_impl._BLOCKS_CACHE.clear()
+    yield NewsRepositorySQL(sessionmaker(bind=engine, autoflush=False, expire_on_commit=False))
+    news_repo_impl._ROWS_CACHE.clear()
+    news_repo_impl._BLOCKS_CACHE.clear()
+    engine.dispose()
+
+
+def _upsert(repo: NewsRepositorySQL, summary: str):
+    return repo.upsert_by_url(
+        url="https://example.com/a/1",
+        title="Заголовок",
+        slug="zagolovok",
+        source="example.com",
+        payload_json=json.dumps({"summary": summary}),
+    )
+
+
+def _block(repo: NewsRepositorySQL, news_id: int):
+    return repo.to_news_block_out(repo.get_public_by_id(news_id))
+
+
+@pytest.mark.unit
+def test_update_is_visible_in_same_process_without_waiting_for_ttl(repo):
+    row = _upsert(repo, "старое")
+    assert _block(repo, row.id).summary == "старое"
+    assert [n.id for n in repo.list_public()] == [row.id]
+
+    _upsert(repo, "новое")
+
+    assert _block(repo, row.id).summary == "новое"
+    assert repo.to_news_block_out(repo.get_public_by_slug("zagolovok")).summary == "новое"
+    assert json.loads(repo.list_public()[0].payload_json)["summary"] == "новое"
+
+
+@pytest.mark.unit
+def test_cached_block_is_not_shared_with_callers(repo):
+    row = _upsert(repo, "текст")
+
+    first = _block(repo, row.id)
+    first.bullets.append("чужая правка")
+    first.summary = "изменено"
+
+    second = _block(repo, row.id)
+    assert second.summary == "текст" and second.bullets == []
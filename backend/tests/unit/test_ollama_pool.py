@@ -0,0 +1,131 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.infrastructure.llm.ollama_llm_service import OllamaLLMService
+from app.infrastructure.llm.ollama_pool import NoHealthyBackendError, OllamaBackendPool, OllamaHTTPError
+
+
+class StubOllama:
+    """
+    Минимальный Ollama: /api/tags для health-check и /api/generate с задержкой.
+    """
+
+    def __init__(self, name: str, delay: float = 0.0, status: int = 200) -> None:
+        self.name = name
+        self.delay = delay
+        self.status = status
+        self.generated = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, payload: dict, status: int = 200) -> None:
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._reply({"models": []})
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                time.sleep(stub.delay)
+                stub.generated += 1
+                self._reply({"response": stub.name, "done": True}, stub.status)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def shutdown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stubs():
+    servers = [StubOllama("a", delay=0.2), StubOllama("b", delay=0.2)]
+    yield servers
+    for s in servers:
+        s.shutdown()
+
+
+def _pool(urls, **kwargs) -> OllamaBackendPool:
+    return OllamaBackendPool(urls, session=requests.Session(), **kwargs)
+
+
+@pytest.mark.unit
+def test_concurrent_calls_are_spread_across_backends(stubs):
+    service = OllamaLLMService(pool=_pool([s.url for s in stubs]))
+    results: list[str] = []
+
+    def _call() -> None:
+        results.append(service._generate({}, set())["response"])
+
+    threads = [threading.Thread(target=_call) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(results) == ["a", "a", "b", "b"]
+    stats = service.pool.stats()
+    assert all(s["requests"] == 2 and s["errors"] == 0 and s["avg_ms"] >= 200 for s in stats.values())
+
+
+@pytest.mark.unit
+def test_dead_backend_is_skipped_ejected_and_readmitted(stubs):
+    alive, dead = stubs
+    dead_url = dead.url
+    dead.shutdown()
+    pool = _pool([dead_url, alive.url], fail_threshold=1, eject_sec=60)
+    service = OllamaLLMService(pool=pool)
+
+    assert [service.chat("hi") for _ in range(3)] == ["a", "a", "a"]
+    assert pool.stats()[dead_url]["healthy"] is False
+    assert pool.stats()[dead_url]["ejections"] == 1
+
+    revived = StubOllama("c")
+    pool.backends[0].base_url = revived.url
+    try:
+        pool.probe_once()
+        assert pool.backends[0].healthy is True
+    finally:
+        revived.shutdown()
+
+
+@pytest.mark.unit
+def test_pool_fails_fast_when_every_backend_is_ejected(stubs):
+    pool = _pool([s.url for s in stubs], eject_sec=60)
+    for backend in pool.backends:
+        pool._eject(backend)
+
+    with pytest.raises(NoHealthyBackendError):
+        with pool.lease():
+            pass
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("status,ejected", [(404, False), (503, True)])
+def test_only_server_errors_eject_backend(status, ejected):
+    stub = StubOllama("a", status=status)
+    pool = _pool([stub.url], fail_threshold=1, eject_sec=60)
+    try:
+        with pytest.raises(OllamaHTTPError) as exc:
+            OllamaLLMService(pool=pool)._generate({}, set())
+    finally:
+        stub.shutdown()
+
+    assert exc.value.status_code == status
+    assert pool.backends[0].healthy is not ejected
+    assert pool.stats()[stub.url]["errors"] == int(ejected)
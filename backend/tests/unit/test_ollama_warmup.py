@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import pytest
+
+from app.infrastructure.llm.ollama_pool import OllamaBackendPool
+from app.infrastructure.llm.ollama_warmup import MSK, OllamaWarmup, is_trading_hours, ollama_keep_alive
+from app.infrastructure.metrics import metrics
+
+
+class FakeResponse:
+    status_code = 200
+    text = ""
+
+    def __init__(self, body: dict) -> None:
+        self.body = body
+
+    def json(self) -> dict:
+        return self.body
+
+
+class LoadingSession:
+    """
+    Первый запрос к модели — холодная загрузка (3 с), дальше модель уже в памяти.
+    """
+
+    def __init__(self) -> None:
+        self.payloads: list[dict] = []
+
+    def post(self, url, json, timeout):
+        self.payloads.append(json)
+        load_ns = 3_000_000_000 if len(self.payloads) == 1 else 2_000_000
+        return FakeResponse({"done": True, "load_duration": load_ns, "total_duration": load_ns})
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ("moment", "expected"),
+    [
+        (datetime(2026, 10, 19, 10, 0, tzinfo=MSK), True),  # понедельник, основная сессия
+        (datetime(2026, 10, 19, 5, 0, tzinfo=MSK), False),  # до открытия
+        (datetime(2026, 10, 18, 12, 0, tzinfo=MSK), False),  # воскресенье
+    ],
+)
+def test_keep_alive_follows_moex_trading_hours(moment, expected):
+    assert is_trading_hours(moment) is expected
+    assert ollama_keep_alive(moment) == ("2h" if expected else "10m")
+
+
+@pytest.mark.unit
+def test_warmup_preloads_model_and_counts_only_cold_loads():
+    metrics.reset()
+    session = LoadingSession()
+    warmup = OllamaWarmup(OllamaBackendPool(["http://a:11434", "http://b:11434"], session=session))
+
+    assert warmup.warm_all() == 2
+
+    assert [p["prompt"] for p in session.payloads] == ["", ""]
+    assert all(p["keep_alive"] in ("2h", "10m") for p in session.payloads)
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"]["llm.cold_load"] == 1
+    assert snapshot["timers"]["llm.cold_load"]["count"] == 1
@@ -0,0 +1,83 @@
+import pytest
+
+from app.domain.entities.principal import Principal
+from app.domain.entities.user import User
+from app.infrastructure.database.principal_cache import (
+    ALL,
+    PrincipalCacheListener,
+    cache_principal,
+    get_cached_principal,
+    invalidate_principal,
+    principal_generation,
+)
+
+
+def _principal(user_id: int, roles: set[str]) -> Principal:
+    user = User(id=user_id, name="u", email=f"u{user_id}@example.com", password_hash="hash")
+    return Principal(user=user, roles=frozenset(roles), permissions=frozenset())
+
+
+@pytest.fixture(autouse=True)
+def _clean_cache():
+    invalidate_principal()
+    yield
+    invalidate_principal()
+
+
+@pytest.mark.unit
+def test_notification_drops_only_the_changed_user():
+    cache_principal(_principal(1, {"user"}))
+    cache_principal(_principal(2, {"pro"}))
+    listener = PrincipalCacheListener(engine=None)
+
+    listener.handle("1")
+
+    assert get_cached_principal(1) is None
+    assert get_cached_principal(2).roles == {"pro"}
+    assert listener.stats()["received"] == 1
+
+
+@pytest.mark.unit
+def test_wildcard_notification_clears_whole_cache():
+    cache_principal(_principal(1, {"user"}))
+    cache_principal(_principal(2, {"admin"}))
+
+    PrincipalCacheListener(engine=None).handle(ALL)
+
+    assert get_cached_principal(1) is None and get_cached_principal(2) is None
+
+
+@pytest.mark.unit
+def test_load_that_raced_with_invalidation_is_not_cached():
+    # get_principal: снимок поколения -> запрос в БД -> cache_principal
+    generation = principal_generation(1)
+    stale = _principal(1, {"user"})
+    PrincipalCacheListener(engine=None).handle("1")  # роли сменились, пока шёл запрос
+
+    cache_principal(stale, generation)
+    assert get_cached_principal(1) is None
+
+    cache_principal(_principal(1, {"admin"}), principal_generation(1))
+    assert get_cached_principal(1).roles == {"admin"}
+
+
+@pytest.mark.unit
+def test_full_reset_during_load_also_discards_the_result():
+    generation = principal_generation(2)
+    invalidate_principal()
+
+    cache_principal(_principal(2, {"user"}), generation)
+
+    assert get_cached_principal(2) is None
+
+
+@pytest.mark.unit
+def test_malformed_notification_is_counted_and_ignored():
+    cache_principal(_principal(1, {"user"}))
+    listener = PrincipalCacheListener(engine=None)
+
+    listener.handle("not-a-user")
+    listener.handle("1:v2")
+
+    assert get_cached_principal(1).roles == {"user"}
+    assert listener.stats()["malformed"] == 2
@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from app.infrastructure.concurrency.priority_scheduler import PriorityScheduler, QueueDeadlineExceeded
+
+PRIORITIES = ["chat", "personal_feed", "public_precompute"]
+
+
+def _wait_until(predicate, timeout: float = 2.0) -> None:
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.005)
+    assert predicate()
+
+
+def _run_in_thread(scheduler, priority, order, hold: float = 0.0):
+    def _target():
+        with scheduler.slot(priority):
+            order.append(priority)
+            time.sleep(hold)
+
+    thread = threading.Thread(target=_target)
+    thread.start()
+    return thread
+
+
+@pytest.mark.unit
+def test_waiting_chat_overtakes_earlier_background_work():
+    scheduler = PriorityScheduler(max_concurrency=1, priorities=PRIORITIES)
+    order: list[str] = []
+    blocker = threading.Event()
+
+    def _busy():
+        with scheduler.slot("public_precompute"):
+            blocker.wait()
+
+    busy = threading.Thread(target=_busy)
+    busy.start()
+    _wait_until(lambda: scheduler.stats()["classes"]["public_precompute"]["in_flight"] == 1)
+
+    threads = [_run_in_thread(scheduler, "public_precompute", order)]
+    _wait_until(lambda: scheduler.stats()["classes"]["public_precompute"]["waiting"] == 1)
+    threads.append(_run_in_thread(scheduler, "personal_feed", order))
+    threads.append(_run_in_thread(scheduler, "chat", order))
+    _wait_until(lambda: sum(c["waiting"] for c in scheduler.stats()["classes"].values()) == 3)
+
+    blocker.set()
+    for t in [busy, *threads]:
+        t.join()
+
+    assert order == ["chat", "personal_feed", "public_precompute"]
+
+
+@pytest.mark.unit
+def test_class_limit_leaves_slots_for_other_classes():
+    scheduler = PriorityScheduler(max_concurrency=2, priorities=PRIORITIES, class_limits={"public_precompute": 1})
+    release = threading.Event()
+
+    def _hold(priority):
+        with scheduler.slot(priority):
+            release.wait()
+
+    threads = [threading.Thread(target=_hold, args=("public_precompute",)) for _ in range(2)]
+    for t in threads:
+        t.start()
+    _wait_until(lambda: scheduler.stats()["classes"]["public_precompute"]["waiting"] == 1)
+
+    started = time.perf_counter()
+    with scheduler.slot("chat"):
+        assert time.perf_counter() - started < 0.5
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert scheduler.stats()["classes"]["public_precompute"]["granted"] == 2
+
+
+@pytest.mark.unit
+def test_request_is_dropped_after_queue_deadline():
+    scheduler = PriorityScheduler(max_concurrency=1, priorities=PRIORITIES)
+
+    with scheduler.slot("chat"):
+        with pytest.raises(QueueDeadlineExceeded):
+            with scheduler.slot("personal_feed", deadline_sec=0.05):
+                pass
+
+    stats = scheduler.stats()["classes"]["personal_feed"]
+    assert stats["dropped"] == 1
+    assert stats["waiting"] == 0
+    with scheduler.slot("personal_feed", deadline_sec=0.05):
+        pass
@@ -0,0 +1,166 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.settings import settings
+from app.infrastructure.database.scrape_validator_repo_impl import ScrapeValidatorRow
+from app.infrastructure.llm.html_extractors import Bs4HtmlExtractor, LxmlHtmlExtractor
+from app.infrastructure.llm.scraper_service import ScraperService
+
+PAGE = "<html><body><nav>menu</nav><article><h1>Ставка</h1><p>ЦБ сохранил ставку.</p></article></body></html>"
+
+
+class MemoryValidatorRepo:
+    def __init__(self) -> None:
+        self.rows: dict[str, ScrapeValidatorRow] = {}
+
+    def get(self, url: str):
+        return self.rows.get(url)
+
+    def upsert(self, url, etag, last_modified, body_hash, text):
+        self.rows[url] = ScrapeValidatorRow(url, etag, last_modified, body_hash, text)
+
+
+def _response(status_code: int, body: str = "", headers: dict | None = None):
+    content = body.encode("utf-8")
+
+    def _raise():
+        if status_code >= 400:
+            raise RuntimeError(f"HTTP {status_code}")
+
+    def _iter_content(chunk_size):
+        for start in range(0, len(content), chunk_size):
+            response.bytes_sent += chunk_size
+            yield content[start : start + chunk_size]
+
+    response = SimpleNamespace(
+        status_code=status_code,
+        encoding="utf-8",
+        headers=headers or {},
+        raise_for_status=_raise,
+        iter_content=_iter_content,
+        close=lambda: None,
+        bytes_sent=0,
+    )
+    return response
+
+
+class FakeSession:
+    def __init__(self) -> None:
+        self.calls: list[dict] = []
+        self.responses: list = []
+
+    def get(self, url, timeout, headers, stream=False):
+        self.calls.append(headers)
+        return self.responses.pop(0)
+
+
+class FailingExtractor:
+    name = "failing"
+
+    def extract(self, html: str):
+        pytest.fail("must not parse")
+
+
+@pytest.fixture
+def fake_http() -> FakeSession:
+    return FakeSession()
+
+
+@pytest.mark.unit
+def test_scraper_extracts_article_text_and_stores_validators(fake_http):
+    repo = MemoryValidatorRepo()
+    fake_http.responses.append(_response(200, PAGE, {"ETag": '"v1"'}))
+
+    result = ScraperService(validator_repo=repo, session=fake_http).fetch_article("https://example.com/a")
+
+    assert result.text == "Ставка ЦБ сохранил ставку."
+    assert result.unchanged is False
+    assert repo.rows["https://example.com/a"].etag == '"v1"'
+
+
+@pytest.mark.unit
+def test_scraper_sends_validators_and_reuses_text_on_304(fake_http):
+    repo = MemoryValidatorRepo()
+    repo.upsert("https://example.com/a", '"v1"', "Mon, 01 Jan 2024 00:00:00 GMT", "h", "cached text")
+    fake_http.responses.append(_response(304))
+    scraper = ScraperService(validator_repo=repo, session=fake_http, extractor=FailingExtractor())
+
+    result = scraper.fetch_article("https://example.com/a")
+
+    assert result.text == "cached text"
+    assert result.unchanged is True
+    assert fake_http.calls[0]["If-None-Match"] == '"v1"'
+    assert fake_http.calls[0]["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+@pytest.mark.unit
+def test_scraper_skips_parsing_when_body_is_identical(fake_http):
+    repo = MemoryValidatorRepo()
+    fake_http.responses.extend([_response(200, PAGE), _response(200, PAGE)])
+    scraper = ScraperService(validator_repo=repo, session=fake_http)
+    first = scraper.fetch_article("https://example.com/a")
+    scraper.extractor = FailingExtractor()
+
+    second = scraper.fetch_article("https://example.com/a")
+
+    assert second.text == first.text
+    assert second.unchanged is True
+
+
+@pytest.mark.unit
+def test_scraper_returns_none_on_http_error(fake_http):
+    fake_http.responses.append(_response(503))
+
+    assert ScraperService(session=fake_http).fetch_article_text("https://example.com/a") is None
+
+
+def _long_page(paragraphs: int, tail_bytes: int = 0) -> str:
+    body = "".join(f"<p>Абзац {i}: ЦБ сохранил ставку, инфляция замедлилась.</p>" for i in range(paragraphs))
+    return f"<html><body><nav>menu</nav><article>{body}</article><div>{'x' * tail_bytes}</div></body></html>"
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("max_chars", [1, 100, 2000])
+def test_scraper_stops_reading_once_enough_article_text_is_collected(fake_http, max_chars):
+    page = _long_page(paragraphs=2000)
+    full_text = Bs4HtmlExtractor().extract(page)
+    response = _response(200, page)
+    fake_http.responses.append(response)
+
+    text = ScraperService(session=fake_http, extractor=LxmlHtmlExtractor()).fetch_article_text(
+        "https://example.com/a", max_chars=max_chars
+    )
+
+    assert text[:max_chars] == full_text[:max_chars]
+    assert len(text) > max_chars
+    assert response.bytes_sent < len(page.encode("utf-8")) / 2
+
+
+@pytest.mark.unit
+def test_scraper_reads_only_up_to_byte_cap(fake_http, monkeypatch):
+    monkeypatch.setattr(settings, "SCRAPER_MAX_BYTES", 64_000)
+    page = "<html><body><p>начало</p>" + "<p>шум</p>" * 50_000 + "</body></html>"
+    response = _response(200, page)
+    fake_http.responses.append(response)
+
+    text = ScraperService(session=fake_http, extractor=LxmlHtmlExtractor()).fetch_article_text("https://example.com/a")
+
+    assert text.startswith("начало шум")
+    assert response.bytes_sent <= 64_000 + settings.SCRAPER_CHUNK_BYTES
+
+
+@pytest.mark.unit
+def test_scraper_returns_stored_links_when_index_is_not_modified(fake_http):
+    repo = MemoryValidatorRepo()
+    index = '<html><body><a href="/news/2026/10/18/abc">Минфин разместил ОФЗ на 100 млрд рублей</a></body></html>'
+    fake_http.responses.extend([_response(200, index, {"ETag": '"i1"'}), _response(304)])
+    scraper = ScraperService(validator_repo=repo, session=fake_http)
+
+    first, first_unchanged = scraper.fetch_article_links("https://example.com/news/")
+    second, second_unchanged = scraper.fetch_article_links("https://example.com/news/")
+
+    assert [link.url for link in first] == ["https://example.com/news/2026/10/18/abc"]
+    assert (first_unchanged, second_unchanged) == (False, True)
+    assert second == first
+    assert fake_http.calls[1]["If-None-Match"] == '"i1"'
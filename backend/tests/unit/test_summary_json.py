@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from app.application.use_cases.summary_json import REQUIRED_FIELDS, parse_summary, summary_schema
+
+FULL = {
+    "summary": "ЦБ сохранил ставку.",
+    "facts": ["Ставка 21%", "Решение единогласное"],
+    "conclusion": "Давление на рынок сохраняется.",
+    "explanation": ["Инфляция выше цели"],
+    "risks": ["Ускорение инфляции"],
+    "indicator": {"impact": "Negative", "confidence": "medium", "rationale": ["Жёсткая политика"]},
+}
+
+
+@pytest.mark.unit
+def test_valid_json_is_parsed_and_normalized():
+    fields, missing = parse_summary(json.dumps(FULL, ensure_ascii=False))
+
+    assert missing == []
+    assert fields["indicator"] == {"impact": "negative", "confidence": "medium", "rationale": ["Жёсткая политика"]}
+
+
+@pytest.mark.unit
+def test_truncated_and_fenced_output_keeps_closed_fields():
+    text = json.dumps(FULL, ensure_ascii=False)
+    truncated = "```json\n" + text[: text.index('"risks"') + len('"risks": ["Ускор')]
+
+    fields, missing = parse_summary(truncated)
+
+    assert set(fields) == {"summary", "facts", "conclusion", "explanation"}
+    assert missing == ["risks", "indicator"]
+
+
+@pytest.mark.unit
+def test_invalid_values_count_as_missing():
+    broken = dict(FULL, summary="  ", facts="не список", indicator={"impact": "bullish", "confidence": "high"})
+
+    fields, missing = parse_summary(json.dumps(broken, ensure_ascii=False))
+
+    assert missing == ["summary", "facts", "indicator"]
+    assert parse_summary("не JSON вообще") == ({}, list(REQUIRED_FIELDS))
+
+
+@pytest.mark.unit
+def test_schema_for_repair_covers_only_requested_fields():
+    schema = summary_schema(("risks", "indicator"))
+
+    assert set(schema["properties"]) == {"risks", "indicator"}
+    assert schema["required"] == ["risks", "indicator"]
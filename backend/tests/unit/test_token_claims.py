@@ -0,0 +1,79 @@
+import pytest
+
+from app.core.settings import settings
+from app.domain.entities.principal import Principal
+from app.domain.entities.user import User
+from app.infrastructure.database import principal_cache
+from app.infrastructure.database.principal_cache import ROLE_VERSION_DELETED, PrincipalCacheListener
+from app.infrastructure.database.seed_rbac import ROLE_PERMS
+from app.infrastructure.security.token_claims import claimed_permissions, permissions_from_bits, principal_claims
+
+
+@pytest.fixture(autouse=True)
+def _claims_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_TOKEN_CLAIMS_ENABLED", True)
+    monkeypatch.setattr(principal_cache, "_ROLE_VERSIONS", {})
+    monkeypatch.setattr(principal_cache, "_CLAIMS_NOT_BEFORE", 0.0)
+    principal_cache.invalidate_principal()
+
+
+def _principal(role: str, role_version: int = 0) -> Principal:
+    user = User(id=5, name="u", email="u@example.com", password_hash="hash")
+    return Principal(
+        user=user, roles=frozenset({role}), permissions=frozenset(ROLE_PERMS[role]), role_version=role_version
+    )
+
+
+def _payload(role: str, role_version: int = 0, iat: float = 1000.0) -> dict:
+    return {"sub": "5", "type": "access", "iat": iat, **principal_claims(_principal(role, role_version))}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("role", list(ROLE_PERMS))
+def test_permission_bitmap_round_trips(role):
+    payload = _payload(role)
+    assert payload["roles"] == [role]
+    assert permissions_from_bits(payload["perm"]) == set(ROLE_PERMS[role])
+    assert claimed_permissions(payload) == set(ROLE_PERMS[role])
+
+
+@pytest.mark.unit
+def test_claims_ignored_when_disabled_absent_or_older_than_known_role_version(monkeypatch):
+    payload = _payload("admin", role_version=2)
+
+    principal_cache.note_role_version(5, 2)
+    assert claimed_permissions(payload) is not None
+    principal_cache.note_role_version(5, 3)
+    assert claimed_permissions(payload) is None
+
+    assert claimed_permissions({"sub": "5", "type": "access"}) is None
+    monkeypatch.setattr(settings, "AUTH_TOKEN_CLAIMS_ENABLED", False)
+    assert claimed_permissions(_payload("user")) is None
+
+
+@pytest.mark.unit
+def test_claims_of_deleted_user_are_rejected():
+    payload = _payload("admin", role_version=7)
+
+    PrincipalCacheListener(engine=None).handle(f"5:{ROLE_VERSION_DELETED}")
+
+    assert claimed_permissions(payload) is None
+
+
+@pytest.mark.unit
+def test_tokens_issued_before_listen_are_checked_against_db(monkeypatch):
+    # воркер не видел смены ролей (known_role_version is None), но LISTEN установлен позже выпуска токена
+    monkeypatch.setattr(principal_cache, "_CLAIMS_NOT_BEFORE", 2000.0)
+
+    assert claimed_permissions(_payload("admin", iat=1000.0)) is None
+    assert claimed_permissions({k: v for k, v in _payload("admin").items() if k != "iat"}) is None
+    assert claimed_permissions(_payload("admin", iat=2500.0)) == set(ROLE_PERMS["admin"])
+
+
+@pytest.mark.unit
+def test_cached_principal_role_version_makes_older_token_stale():
+    principal_cache.cache_principal(_principal("user", role_version=4))
+    principal_cache._ROLE_VERSIONS.clear()
+
+    assert claimed_permissions(_payload("admin", role_version=3)) is None
+    assert claimed_permissions(_payload("user", role_version=4)) == set(ROLE_PERMS["user"])
@@ -0,0 +1,26 @@
+import pytest
+
+from app.infrastructure.llm.token_estimator import TokenEstimator
+
+
+@pytest.mark.unit
+def test_cyrillic_costs_more_tokens_than_latin_of_same_length():
+    est = TokenEstimator()
+    assert est.estimate("") == 0
+    assert est.estimate("привет" * 20) > est.estimate("privet" * 20)
+
+
+@pytest.mark.unit
+def test_calibration_moves_factor_towards_actual_counts_within_bounds():
+    est = TokenEstimator(alpha=0.5)
+    text = "Индекс Мосбиржи вырос на 1.2% " * 10
+    raw = est.raw_estimate(text)
+
+    for _ in range(20):
+        est.calibrate(text, int(raw * 1.5))
+    assert est.estimate(text) == pytest.approx(raw * 1.5, rel=0.02)
+
+    est.calibrate("коротко", 1000)  # короткие строки не калибруют
+    est.calibrate(text, int(raw * 100))
+    assert est.factor <= est.max_factor
+    assert est.stats()["samples"] == 21
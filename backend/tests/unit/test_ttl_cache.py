@@ -0,0 +1,47 @@
+import pytest
+
+from app.infrastructure.cache.ttl_cache import TTLCache
+
+
+@pytest.mark.unit
+def test_ttl_cache_evicts_least_recently_used():
+    cache: TTLCache[int] = TTLCache(maxsize=2, ttl_sec=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.unit
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.infrastructure.cache.ttl_cache.time.monotonic", lambda: now[0])
+    cache: TTLCache[str] = TTLCache(maxsize=10, ttl_sec=5)
+    cache.set("k", "v")
+
+    now[0] += 6
+
+    assert cache.get("k") is None
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.unit
+def test_ttl_cache_reports_hit_ratio_and_invalidates_by_predicate():
+    cache: TTLCache[dict] = TTLCache(maxsize=10, ttl_sec=60)
+    cache.set(("id", 1), {"url": "u1"})
+    cache.set(("id", 2), {"url": "u2"})
+
+    cache.get(("id", 1))
+    cache.get(("id", 3))
+    removed = cache.invalidate_where(lambda key, value: value["url"] == "u2")
+
+    stats = cache.stats()
+    assert removed == 1
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+    assert stats["size"] == 1